@@ -9,18 +9,19 @@ from datetime import timedelta
 from pathlib import Path
 
 from flask import Flask, jsonify, request
-from flask_compress import Compress
 from werkzeug.middleware.proxy_fix import ProxyFix
-from werkzeug.security import generate_password_hash
 from werkzeug.exceptions import HTTPException
 
 from .core.database import db  # Import correcto desde core.database
+from .utils.passwords import hash_password
 from .features.users.models import User
 from .features.cases.models import Case, CaseStatus
 from .features.cases.promise import Promise
 from .features.activities.models import Activity
-from .features.contact.models import ContactSubmission
+from .features.contact.models import ContactSubmission, OutboundEmail
 from .features.carteras.models import Cartera
+from .features.stats.models import DailyStat
+from .features.audit.models import AuditEvent
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +61,11 @@ def create_app() -> Flask:
     app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(hours=int(os.environ.get("SESSION_LIFETIME_HOURS", "8")))
     app.config["SEND_FILE_MAX_AGE_DEFAULT"] = int(os.environ.get("SEND_FILE_MAX_AGE_DEFAULT", "3600"))
 
+    # Login: política de hash y bloqueo por usuario tras intentos fallidos
+    app.config["PASSWORD_HASH_METHOD"] = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    app.config["LOGIN_MAX_FAILURES"] = int(os.environ.get("LOGIN_MAX_FAILURES", "5"))
+    app.config["LOGIN_LOCKOUT_SECONDS"] = int(os.environ.get("LOGIN_LOCKOUT_SECONDS", "900"))
+
     # Proxy headers (for Nginx/LB)
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_port=1, x_prefix=1)  # type: ignore
 
@@ -72,6 +78,19 @@ def create_app() -> Flask:
     app.config["MAIL_PASSWORD"] = os.environ.get("MAIL_PASSWORD", "")
     app.config["MAIL_DEFAULT_SENDER"] = os.environ.get("MAIL_DEFAULT_SENDER", app.config["MAIL_USERNAME"])
     app.config["MAIL_TIMEOUT"] = 20
+    # Sesiones SMTP reutilizables para envíos en lote (send_many)
+    app.config["MAIL_POOL_SIZE"] = int(os.environ.get("MAIL_POOL_SIZE", "2"))
+    app.config["MAIL_POOL_MAX_MESSAGES"] = int(os.environ.get("MAIL_POOL_MAX_MESSAGES", "100"))
+    app.config["MAIL_POOL_MAX_IDLE"] = float(os.environ.get("MAIL_POOL_MAX_IDLE", "60"))
+    # Outbox: los emails se encolan en la base y los envía un thread por proceso
+    app.config["MAIL_OUTBOX_WORKER"] = _env_bool("MAIL_OUTBOX_WORKER", not _env_bool("TESTING", False))
+    app.config["MAIL_OUTBOX_POLL_INTERVAL"] = float(os.environ.get("MAIL_OUTBOX_POLL_INTERVAL", "15"))
+    app.config["MAIL_OUTBOX_BATCH_SIZE"] = int(os.environ.get("MAIL_OUTBOX_BATCH_SIZE", "20"))
+    app.config["MAIL_OUTBOX_MAX_ATTEMPTS"] = int(os.environ.get("MAIL_OUTBOX_MAX_ATTEMPTS", "8"))
+    app.config["MAIL_OUTBOX_BACKOFF_BASE"] = float(os.environ.get("MAIL_OUTBOX_BACKOFF_BASE", "30"))
+    app.config["MAIL_OUTBOX_BACKOFF_MAX"] = float(os.environ.get("MAIL_OUTBOX_BACKOFF_MAX", "3600"))
+    # Segundos que un email queda reservado por el proceso que lo está enviando
+    app.config["MAIL_OUTBOX_LEASE"] = float(os.environ.get("MAIL_OUTBOX_LEASE", "120"))
 
     # Database config
     database_url = os.environ.get("DATABASE_URL")
@@ -85,11 +104,99 @@ def create_app() -> Flask:
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["SQLALCHEMY_ECHO"] = _env_bool("SQLALCHEMY_ECHO", False)
 
+    # Redis (cache): pool compartido por proceso, timeouts cortos y circuit breaker
+    app.config["REDIS_URL"] = os.environ.get("REDIS_URL", "")
+    app.config["REDIS_MAX_CONNECTIONS"] = int(os.environ.get("REDIS_MAX_CONNECTIONS", "50"))
+    app.config["REDIS_SOCKET_TIMEOUT"] = float(os.environ.get("REDIS_SOCKET_TIMEOUT", "0.5"))
+    app.config["REDIS_CONNECT_TIMEOUT"] = float(os.environ.get("REDIS_CONNECT_TIMEOUT", "0.5"))
+    app.config["REDIS_HEALTH_CHECK_INTERVAL"] = int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+    app.config["REDIS_BREAKER_THRESHOLD"] = int(os.environ.get("REDIS_BREAKER_THRESHOLD", "3"))
+    app.config["REDIS_BREAKER_COOLDOWN"] = float(os.environ.get("REDIS_BREAKER_COOLDOWN", "30"))
+    # Cache L1 en memoria de cada proceso (delante de Redis, o solo si no hay Redis)
+    app.config["CACHE_L1_ENABLED"] = _env_bool("CACHE_L1_ENABLED", True)
+    app.config["CACHE_L1_MAX_ENTRIES"] = int(os.environ.get("CACHE_L1_MAX_ENTRIES", "2048"))
+    app.config["CACHE_L1_MAX_BYTES"] = int(os.environ.get("CACHE_L1_MAX_BYTES", str(16 * 1024 * 1024)))
+    app.config["CACHE_L1_TTL"] = float(os.environ.get("CACHE_L1_TTL", "30"))
+    # Segundos que se reutilizan los contadores de generación leídos de Redis (0 = leer siempre)
+    app.config["CACHE_GENERATION_CHECK_INTERVAL"] = float(os.environ.get("CACHE_GENERATION_CHECK_INTERVAL", "2"))
+    # Estados y carteras en memoria de cada proceso (generación en Redis; TTL si no hay Redis)
+    app.config["REFDATA_TTL"] = float(os.environ.get("REFDATA_TTL", "60"))
+    app.config["REFDATA_CHECK_INTERVAL"] = float(os.environ.get("REFDATA_CHECK_INTERVAL", "5"))
+    # Instrumentación por request: Server-Timing, log JSON por request y consultas lentas (0 = sin log)
+    app.config["PROFILING_ENABLED"] = _env_bool("PROFILING_ENABLED", True)
+    app.config["SERVER_TIMING"] = _env_bool("SERVER_TIMING", True)
+    app.config["REQUEST_LOG"] = _env_bool("REQUEST_LOG", True)
+    app.config["SLOW_QUERY_MS"] = float(os.environ.get("SLOW_QUERY_MS", "0"))
+    # Métricas Prometheus en /metrics (token opcional: Authorization: Bearer <METRICS_TOKEN>)
+    app.config["METRICS_ENABLED"] = _env_bool("METRICS_ENABLED", True)
+    app.config["METRICS_TOKEN"] = os.environ.get("METRICS_TOKEN")
+    # Readiness (/readyz): límite por chequeo, reutilización del resultado y si Redis es crítico
+    app.config["READYZ_TIMEOUT"] = float(os.environ.get("READYZ_TIMEOUT", "1"))
+    app.config["READYZ_CACHE_SECONDS"] = float(os.environ.get("READYZ_CACHE_SECONDS", "5"))
+    app.config["READYZ_REQUIRE_REDIS"] = _env_bool("READYZ_REQUIRE_REDIS", False)
+
     # Initialize database
     db.init_app(app)
 
-    # Compression
-    Compress(app)
+    # Consultas, tiempo de base y cache por request
+    from .services.profiling import init_profiling
+
+    init_profiling(app)
+
+    # Métricas Prometheus (latencia por endpoint, pool de la base, cache, cola de emails)
+    from .services.metrics import init_metrics
+
+    init_metrics(app)
+
+    # Readiness probe: base, migraciones y Redis con timeouts cortos
+    from .services.readiness import init_readiness
+
+    init_readiness(app)
+
+    from .core.redis_client import init_redis
+
+    init_redis(app)
+
+    from .services.login_throttle import init_login_throttle
+
+    init_login_throttle(app)
+
+    # Cache: invalidación por generaciones al confirmar escrituras
+    from .services.cache import init_cache
+
+    init_cache(app)
+
+    # Datos de referencia (estados, carteras) resueltos en memoria
+    from .services.reference_data import init_reference_data
+
+    init_reference_data(app)
+
+    # Rollup diario de dashboards (mantenimiento incremental + comando CLI)
+    from .services.daily_stats import init_daily_stats
+
+    init_daily_stats(app)
+
+    # Resumen por cliente (DNI): mantenimiento en cada escritura de casos + comando CLI
+    from .services.debtors import init_debtors
+
+    init_debtors(app)
+
+    # Búsqueda de casos: índice FTS5 (SQLite) / pg_trgm (PostgreSQL) creado con la tabla
+    from .features.cases.search import init_case_search
+
+    init_case_search(app)
+
+    # Envío de emails: pool de sesiones SMTP y cola email_outbox en segundo plano
+    from .services.email_service import init_email
+    from .services.email_outbox import init_email_outbox
+
+    init_email(app)
+    init_email_outbox(app)
+
+    # Compression (las respuestas en streaming se comprimen aparte, ver utils/streaming.py)
+    from .utils.streaming import StreamingCompress
+
+    StreamingCompress(app)
 
     # Create tables if they don't exist
     with app.app_context():
@@ -109,6 +216,20 @@ def create_app() -> Flask:
     data_dir.mkdir(exist_ok=True)
     app.config["CONTACT_SUBMISSIONS_FILE"] = str(data_dir / "contact_submissions.json")
 
+    # Auditoría: cola en memoria escrita en lotes por un thread (tabla audit_events o JSONL)
+    app.config["AUDIT_SINK"] = os.environ.get("AUDIT_SINK", "db")  # db | file | log
+    app.config["AUDIT_FILE"] = os.environ.get("AUDIT_FILE", str(data_dir / "audit.jsonl"))
+    app.config["AUDIT_WORKER"] = _env_bool("AUDIT_WORKER", not _env_bool("TESTING", False))
+    app.config["AUDIT_QUEUE_SIZE"] = int(os.environ.get("AUDIT_QUEUE_SIZE", "10000"))
+    app.config["AUDIT_QUEUE_POLICY"] = os.environ.get("AUDIT_QUEUE_POLICY", "drop")  # drop | block
+    app.config["AUDIT_BLOCK_TIMEOUT"] = float(os.environ.get("AUDIT_BLOCK_TIMEOUT", "0.05"))
+    app.config["AUDIT_BATCH_SIZE"] = int(os.environ.get("AUDIT_BATCH_SIZE", "200"))
+    app.config["AUDIT_FLUSH_INTERVAL"] = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "2"))
+
+    from .services.audit import init_audit
+
+    init_audit(app)
+
     # Recipients (env override supported)
     app.config["CONTACT_RECIPIENTS"] = _env_list(
         "CONTACT_RECIPIENTS",
@@ -139,12 +260,16 @@ def create_app() -> Flask:
         from flask_limiter import Limiter
         from flask_limiter.util import get_remote_address
 
-        limiter = Limiter(  # noqa: F841
+        limiter = Limiter(
             app=app,
             key_func=get_remote_address,
             default_limits=["200 per day", "50 per hour"],
             storage_uri=os.environ.get("REDIS_URL", "memory://"),
         )
+        # Los probes de los balanceadores y el scrape de métricas no consumen el límite por IP
+        for endpoint in ("readyz", "metrics"):
+            if endpoint in app.view_functions:
+                limiter.exempt(app.view_functions[endpoint])
         app.config["RATELIMIT_ENABLED"] = True
         logger.info("Rate limiting habilitado")
     except Exception as e:
@@ -210,7 +335,7 @@ def _migrate_default_users(app):
         if not existing_user:
             new_user = User(
                 username=user_data["username"],
-                password_hash=generate_password_hash(user_data["password"]),
+                password_hash=hash_password(user_data["password"]),
                 role=user_data["role"],
                 active=True,
             )
@@ -3,29 +3,44 @@ Endpoints API para datos del dashboard y casos.
 """
 
 from datetime import datetime
+from decimal import Decimal
 from flask import request, jsonify, session
 from flask import current_app as app
-from sqlalchemy import or_
+from sqlalchemy import and_, or_
 
 from ...core.database import db
-from ...features.cases.models import Case, CaseStatus
+from ...features.cases.models import Case
 from ...features.cases.promise import Promise
+from ...features.cases.search import apply_search
+from ...features.cases.serialization import (
+    FIELD_SETS,
+    iter_project_cases,
+    project_cases,
+    project_rows,
+    projection_query,
+)
 from ...features.activities.models import Activity
 from ...features.carteras.models import Cartera
 from ...services.dashboard import (
     get_kpis,
     get_performance_chart_data,
     get_cartera_distribution,
+    get_carteras_con_casos,
     get_gestores_ranking,
     get_cases_status_distribution,
     get_comparison_data,
     get_clientes_con_multiples_deudas,
-    get_casos_agrupados_por_dni,
+    get_gestor_worklist,
+    iter_casos_agrupados_por_dni,
+    paginate_casos_agrupados_por_dni,
 )
 from ...utils.security import require_role
 from ...utils.exceptions import ValidationError
+from ...utils.pagination import decode_cursor, encode_cursor, parse_cursor_datetime, parse_cursor_int
+from ...utils.streaming import stream_format, stream_response
 from ...services.audit import audit_log
-from ...services.cache import invalidate_cache
+from ...services.cache import invalidate_scopes
+from ...services.reference_data import get_reference_data
 
 # Use the parent blueprint from __init__.py
 from . import bp
@@ -66,9 +81,12 @@ def dashboard_performance_chart():
         start_date = _parse_date(request.args.get("start_date"))
         end_date = _parse_date(request.args.get("end_date"))
         cartera_id = request.args.get("cartera_id", type=int)
+        granularity = request.args.get("granularity", "week")
 
-        data = get_performance_chart_data(start_date, end_date, cartera_id)
+        data = get_performance_chart_data(start_date, end_date, cartera_id, granularity)
         return jsonify({"success": True, "data": data})
+    except ValidationError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error obteniendo datos de rendimiento: {e}", exc_info=True)
         return jsonify({"success": False, "error": str(e)}), 500
@@ -92,7 +110,11 @@ def dashboard_gestores_ranking():
     """Obtiene ranking de gestores."""
     try:
         limit = request.args.get("limit", 10, type=int)
-        ranking = get_gestores_ranking(limit)
+        start_date = _parse_date(request.args.get("start_date"))
+        end_date = _parse_date(request.args.get("end_date"))
+        cartera_id = request.args.get("cartera_id", type=int)
+
+        ranking = get_gestores_ranking(limit, start_date, end_date, cartera_id)
         return jsonify({"success": True, "data": ranking})
     except Exception as e:
         app.logger.error(f"Error obteniendo ranking: {e}", exc_info=True)
@@ -127,7 +149,7 @@ def dashboard_cases_status():
 def get_case_statuses():
     """Obtiene todos los estados de casos activos."""
     try:
-        statuses = CaseStatus.query.filter_by(activo=True).order_by(CaseStatus.nombre).all()
+        statuses = get_reference_data().statuses()
         return jsonify([s.to_dict() for s in statuses])
     except Exception as e:
         app.logger.error(f"Error obteniendo estados de casos: {e}", exc_info=True)
@@ -136,15 +158,21 @@ def get_case_statuses():
 
 @bp.route("/carteras")
 def get_carteras():
-    """Obtiene todas las carteras (activas e inactivas para admin)."""
+    """
+    Obtiene todas las carteras (activas e inactivas para admin).
+
+    Con `con_casos=true` cada cartera indica si tiene casos (para un gestor, asignados
+    a él), para que el panel del gestor elija de entrada una cartera con trabajo.
+    """
     try:
         # Si es admin, mostrar todas las carteras; si no, solo activas
         user_role = session.get("role")
-        if user_role == "admin":
-            carteras = Cartera.query.order_by(Cartera.nombre).all()
-        else:
-            carteras = Cartera.query.filter_by(activo=True).order_by(Cartera.nombre).all()
-        return jsonify([c.to_dict() for c in carteras])
+        carteras = [c.to_dict() for c in get_reference_data().carteras(active_only=user_role != "admin")]
+        if request.args.get("con_casos", "false").lower() == "true":
+            con_casos = set(get_carteras_con_casos(gestor_id=session.get("user_id") if user_role == "gestor" else None))
+            for cartera in carteras:
+                cartera["con_casos"] = cartera["id"] in con_casos
+        return jsonify(carteras)
     except Exception as e:
         app.logger.error(f"Error obteniendo carteras: {e}", exc_info=True)
         return jsonify({"error": "Error obteniendo carteras"}), 500
@@ -177,7 +205,7 @@ def create_cartera():
         db.session.commit()
         
         audit_log("cartera_created", {"cartera_id": cartera.id, "nombre": cartera.nombre})
-        invalidate_cache("cartera")
+        invalidate_scopes(cartera_ids=[cartera.id])
         
         return jsonify({"success": True, "data": cartera.to_dict()}), 201
     except ValidationError as e:
@@ -203,7 +231,7 @@ def delete_cartera(cartera_id):
             cartera.activo = False
             db.session.commit()
             audit_log("cartera_deactivated", {"cartera_id": cartera_id, "nombre": cartera.nombre, "casos_count": casos_count})
-            invalidate_cache("cartera")
+            invalidate_scopes(cartera_ids=[cartera_id])
             return jsonify({
                 "success": True,
                 "message": f"Cartera desactivada (tiene {casos_count} casos asignados)",
@@ -215,7 +243,7 @@ def delete_cartera(cartera_id):
             db.session.delete(cartera)
             db.session.commit()
             audit_log("cartera_deleted", {"cartera_id": cartera_id, "nombre": nombre})
-            invalidate_cache("cartera")
+            invalidate_scopes(cartera_ids=[cartera_id])
             return jsonify({"success": True, "message": "Cartera eliminada correctamente"})
     except Exception as e:
         db.session.rollback()
@@ -226,7 +254,17 @@ def delete_cartera(cartera_id):
 @bp.route("/cases")
 @require_role("admin")
 def list_cases():
-    """Lista casos con filtros y paginación."""
+    """
+    Lista casos con filtros y paginación.
+
+    Si se envía `cursor` (vacío para la primera página) se pagina por cursor sobre
+    (created_at, id) y la respuesta incluye `next_cursor`. Sin `cursor` se mantiene la
+    paginación por `page`. Con `with_total=false` se omite el COUNT(*) del total.
+    `fields` elige los campos de cada caso: "detail" (default, todos los de Case.to_dict)
+    o "list" (sin notas ni dirección, opcional para listados livianos). `search` usa el índice de búsqueda
+    (app.features.cases.search); con paginación por página los resultados se ordenan
+    por relevancia, con cursor se mantiene el orden por fecha.
+    """
     try:
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
@@ -234,6 +272,11 @@ def list_cases():
         cartera_id = request.args.get("cartera_id", type=int)
         gestor_id = request.args.get("gestor_id", type=int)
         search = request.args.get("search")
+        cursor = request.args.get("cursor")
+        with_total = request.args.get("with_total", "true").lower() != "false"
+        fields = request.args.get("fields", "detail")
+        if fields not in FIELD_SETS:
+            raise ValidationError(f"fields debe ser uno de: {', '.join(FIELD_SETS)}", field="fields")
 
         query = Case.query
 
@@ -245,33 +288,68 @@ def list_cases():
                 query = query.filter(Case.status_id == status_id)
             except ValueError:
                 # Es un nombre, buscar por nombre
-                status_obj = CaseStatus.query.filter_by(nombre=status, activo=True).first()
+                status_obj = get_reference_data().status_by_name(status)
                 if status_obj:
                     query = query.filter(Case.status_id == status_obj.id)
         if cartera_id:
             query = query.filter(Case.cartera_id == cartera_id)
         if gestor_id:
             query = query.filter(Case.assigned_to_id == gestor_id)
+        relevance = []
         if search:
-            query = query.filter(
-                or_(
-                    Case.name.ilike(f"%{search}%"),
-                    Case.lastname.ilike(f"%{search}%"),
-                    Case.dni.ilike(f"%{search}%"),
-                    Case.nro_cliente.ilike(f"%{search}%")
+            query, relevance = apply_search(query, search)
+
+        if cursor is not None:
+            # Paginación por cursor: cada página cuesta lo mismo que la primera
+            if per_page < 1:
+                raise ValidationError("per_page debe ser mayor a 0", field="per_page")
+            total = query.order_by(None).count() if with_total else None
+            after = decode_cursor(cursor, 2)
+            if after:
+                after_created_at = parse_cursor_datetime(after[0])
+                after_id = parse_cursor_int(after[1])
+                query = query.filter(
+                    or_(
+                        Case.created_at < after_created_at,
+                        and_(Case.created_at == after_created_at, Case.id < after_id),
+                    )
                 )
+            rows = projection_query(query, fields).order_by(Case.created_at.desc(), Case.id.desc()).limit(per_page + 1)
+            items = project_rows(rows, fields)
+            next_cursor = None
+            if len(items) > per_page:
+                items = items[:per_page]
+                next_cursor = encode_cursor(items[-1]["created_at"], items[-1]["id"])
+
+            return jsonify(
+                {
+                    "success": True,
+                    "data": items,
+                    "pagination": {"per_page": per_page, "total": total, "next_cursor": next_cursor},
+                }
             )
 
-        # Paginación
-        pagination = query.order_by(Case.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        # Paginación por página
+        pagination = (
+            projection_query(query, fields)
+            .order_by(*relevance, Case.created_at.desc(), Case.id.desc())
+            .paginate(page=page, per_page=per_page, error_out=False, count=with_total)
+        )
 
         return jsonify(
             {
                 "success": True,
-                "data": [c.to_dict() for c in pagination.items],
-                "pagination": {"page": page, "per_page": per_page, "total": pagination.total, "pages": pagination.pages},
+                "data": project_rows(pagination.items, fields),
+                "pagination": {
+                    "page": page,
+                    "per_page": per_page,
+                    "total": pagination.total,
+                    "pages": pagination.pages if with_total else None,
+                },
             }
         )
+    except ValidationError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error listando casos: {e}", exc_info=True)
         return jsonify({"success": False, "error": str(e)}), 500
@@ -293,13 +371,14 @@ def create_case():
         # nro_cliente es opcional
 
         # Validar que cartera_id exista y esté activa
-        cartera = Cartera.query.filter_by(id=data["cartera_id"], activo=True).first()
+        refdata = get_reference_data()
+        cartera = refdata.cartera(data["cartera_id"])
         if not cartera:
             raise ValidationError("Cartera no encontrada o inactiva", field="cartera_id")
 
         # Validar status_id (default: 1 = "Sin Arreglo")
         status_id = data.get("status_id", 1)
-        status_obj = CaseStatus.query.filter_by(id=status_id, activo=True).first()
+        status_obj = refdata.status(status_id)
         if not status_obj:
             raise ValidationError("Estado no encontrado o inactivo", field="status_id")
 
@@ -335,10 +414,6 @@ def create_case():
         db.session.add(case)
         db.session.commit()
 
-        # Invalidar cache relacionado
-        invalidate_cache("cache:dashboard:*")
-        invalidate_cache("cache:kpis:*")
-
         audit_log("create_case", {"case_id": case.id, "name": case.name, "lastname": case.lastname, "total": float(case.total)})
 
         return jsonify({"success": True, "data": case.to_dict()}), 201
@@ -412,7 +487,7 @@ def update_case(case_id):
         if "provincia" in data:
             case.provincia = data["provincia"]
         if "status_id" in data:
-            status_obj = CaseStatus.query.filter_by(id=data["status_id"], activo=True).first()
+            status_obj = get_reference_data().status(data["status_id"])
             if not status_obj:
                 raise ValidationError("Estado no encontrado o inactivo", field="status_id")
             case.status_id = data["status_id"]
@@ -434,10 +509,6 @@ def update_case(case_id):
 
         db.session.commit()
 
-        # Invalidar cache relacionado
-        invalidate_cache("cache:dashboard:*")
-        invalidate_cache("cache:kpis:*")
-
         audit_log("update_case", {"case_id": case_id, "changes": data})
 
         return jsonify({"success": True, "data": case.to_dict()})
@@ -611,21 +682,19 @@ def update_status():
         status_nombre = status_name_map.get(status, "Sin Arreglo")
         
         # Buscar el estado en la BD
-        status_obj = CaseStatus.query.filter_by(nombre=status_nombre, activo=True).first()
+        refdata = get_reference_data()
+        status_obj = refdata.status_by_name(status_nombre)
         if not status_obj:
             return jsonify({"success": False, "error": f"Estado '{status_nombre}' no encontrado"}), 400
 
         old_status_id = case.status_id
-        old_status_nombre = case.status_rel.nombre if case.status_rel else None
+        old_status = refdata.status(old_status_id, active_only=False)
+        old_status_nombre = old_status.nombre if old_status else None
 
         # Actualizar status_id
         case.status_id = status_obj.id
         db.session.commit()
 
-        # Invalidar cache
-        invalidate_cache("cache:dashboard:*")
-        invalidate_cache("cache:kpis:*")
-
         audit_log(
             "update_case_status",
             {
@@ -665,7 +734,7 @@ def update_status():
                 "A Juicio": "con-arreglo",
                 "De baja": "de-baja",
             }
-            status_nombre = case.status_rel.nombre if case.status_rel else "Sin Arreglo"
+            status_nombre = status_obj.nombre
             frontend_status = status_nombre_to_frontend.get(status_nombre, "sin-gestion")
 
             return (
@@ -720,7 +789,12 @@ def update_status():
 
 @bp.route("/cases/gestor")
 def get_gestor_cases():
-    """Obtiene casos del gestor actual."""
+    """
+    Obtiene casos del gestor actual.
+
+    Con `stream=json|ndjson` la respuesta se envía en streaming a medida que se leen
+    los casos.
+    """
     try:
         user_id = session.get("user_id")
         user_role = session.get("role")
@@ -747,14 +821,23 @@ def get_gestor_cases():
                 query = query.filter(Case.status_id == status_id)
             except ValueError:
                 # Es un nombre, buscar por nombre
-                status_obj = CaseStatus.query.filter_by(nombre=status, activo=True).first()
+                status_obj = get_reference_data().status_by_name(status)
                 if status_obj:
                     query = query.filter(Case.status_id == status_obj.id)
 
         # Ordenar por fecha de creación
-        cases = query.order_by(Case.created_at.desc()).all()
+        query = query.order_by(Case.created_at.desc())
 
-        return jsonify({"success": True, "data": [c.to_dict(include_relations=True) for c in cases]})
+        fmt = stream_format()
+        if fmt:
+            return stream_response(
+                iter_project_cases(query, "detail", include_relations=True), fmt, envelope={"success": True}
+            )
+
+        data = project_cases(query, "detail", include_relations=True)
+        return jsonify({"success": True, "data": data})
+    except ValidationError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error obteniendo casos del gestor: {e}", exc_info=True)
         return jsonify({"success": False, "error": str(e)}), 500
@@ -875,6 +958,11 @@ def get_gestor_cases_agrupados():
     """
     Obtiene casos del gestor agrupados por DNI.
     Retorna estructura: [{ dni, cliente, deudas[], total_deudas, deuda_consolidada }]
+
+    Con `limit` la respuesta se pagina por cursor: incluye `next_cursor`, que se envía
+    como `cursor` para pedir la página siguiente. Sin `limit` se retornan todos los grupos.
+    Con `stream=json|ndjson` se retornan todos los grupos en streaming (los totales van
+    al final del documento JSON).
     """
     try:
         user_id = session.get("user_id")
@@ -886,20 +974,129 @@ def get_gestor_cases_agrupados():
         # Filtros opcionales
         cartera_id = request.args.get("cartera_id", type=int)
         include_relations = request.args.get("include_relations", "false").lower() == "true"
+        limit = request.args.get("limit", type=int)
+        cursor = request.args.get("cursor")
+        if limit is not None and not 1 <= limit <= 500:
+            raise ValidationError("limit debe estar entre 1 y 500", field="limit")
+
+        fmt = stream_format()
+        if fmt:
+            if limit or cursor:
+                raise ValidationError("stream no se combina con limit/cursor", field="stream")
+            totales = {"total_grupos": 0, "total_deudas": 0}
+
+            def grupos_contados():
+                for grupo in iter_casos_agrupados_por_dni(
+                    cartera_id=cartera_id,
+                    gestor_id=user_id if user_role == "gestor" else None,
+                    include_relations=include_relations,
+                ):
+                    totales["total_grupos"] += 1
+                    totales["total_deudas"] += grupo["total_deudas"]
+                    yield grupo
+
+            return stream_response(grupos_contados(), fmt, envelope={"success": True}, summary=lambda: totales)
         
         # Obtener casos agrupados por DNI
-        grupos = get_casos_agrupados_por_dni(
+        grupos, next_cursor = paginate_casos_agrupados_por_dni(
             cartera_id=cartera_id,
             gestor_id=user_id if user_role == "gestor" else None,
-            include_relations=include_relations
+            include_relations=include_relations,
+            limit=limit,
+            cursor=cursor,
         )
         
-        return jsonify({
+        response = {
             "success": True,
             "data": grupos,
             "total_grupos": len(grupos),
             "total_deudas": sum(g["total_deudas"] for g in grupos)
-        })
+        }
+        if limit:
+            response["next_cursor"] = next_cursor
+        return jsonify(response)
+    except ValidationError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error obteniendo casos agrupados: {e}", exc_info=True)
         return jsonify({"success": False, "error": str(e)}), 500
+
+
+@bp.route("/cases/gestor/worklist")
+def get_gestor_worklist_endpoint():
+    """
+    Lista de trabajo del gestor: clientes agrupados por DNI, paginados por `page` y
+    `per_page` (máx. 200), con el mismo formato de grupo que /cases/gestor/agrupados.
+
+    Filtros: `cartera_id`, `status_id`, `search` (nombre, DNI o nro de cliente),
+    `min_deuda` / `max_deuda` (deuda consolidada del cliente) y `min_meses_mora` /
+    `max_meses_mora`. Orden: `sort` = reciente (default) | deuda | nombre | mora y
+    `order` = desc (default) | asc. Un gestor ve solo sus clientes; un admin puede
+    filtrar por `gestor_id`.
+    """
+    try:
+        user_id = session.get("user_id")
+        user_role = session.get("role")
+
+        if not user_id:
+            return jsonify({"success": False, "error": "Usuario no autenticado"}), 401
+
+        page = request.args.get("page", 1, type=int)
+        per_page = request.args.get("per_page", 50, type=int)
+        order = request.args.get("order", "desc").lower()
+        if page < 1:
+            raise ValidationError("page debe ser mayor a 0", field="page")
+        if not 1 <= per_page <= 200:
+            raise ValidationError("per_page debe estar entre 1 y 200", field="per_page")
+        if order not in ("asc", "desc"):
+            raise ValidationError("order debe ser asc o desc", field="order")
+
+        rangos = {}
+        for name, convert, maximo in (
+            ("min_deuda", Decimal, 10**13),
+            ("max_deuda", Decimal, 10**13),
+            ("min_meses_mora", int, 1200),
+            ("max_meses_mora", int, 1200),
+        ):
+            value = request.args.get(name)
+            if value in (None, ""):
+                continue
+            try:
+                rangos[name] = convert(value)
+                valido = 0 <= rangos[name] <= maximo
+            except (ArithmeticError, ValueError):
+                valido = False
+            if not valido:
+                raise ValidationError(f"{name} debe ser un número entre 0 y {maximo}", field=name)
+
+        grupos, total = get_gestor_worklist(
+            gestor_id=user_id if user_role == "gestor" else request.args.get("gestor_id", type=int),
+            cartera_id=request.args.get("cartera_id", type=int),
+            status_id=request.args.get("status_id", type=int),
+            search=request.args.get("search"),
+            sort=request.args.get("sort", "reciente"),
+            descending=order == "desc",
+            page=page,
+            per_page=per_page,
+            include_relations=request.args.get("include_relations", "false").lower() == "true",
+            **rangos,
+        )
+
+        return jsonify(
+            {
+                "success": True,
+                "data": grupos,
+                "total_deudas": sum(g["total_deudas"] for g in grupos),
+                "pagination": {
+                    "page": page,
+                    "per_page": per_page,
+                    "total": total,
+                    "pages": (total + per_page - 1) // per_page,
+                },
+            }
+        )
+    except ValidationError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error obteniendo lista de trabajo: {e}", exc_info=True)
+        return jsonify({"success": False, "error": str(e)}), 500
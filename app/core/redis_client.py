@@ -0,0 +1,163 @@
+"""
+Cliente Redis compartido por proceso (pool de conexiones + circuit breaker).
+
+El pool se crea de forma perezosa en el primer uso y se recrea si el PID cambió
+(workers de gunicorn forkeados desde un master con --preload), así los procesos
+hijos nunca comparten sockets con el padre.
+
+Si Redis falla `REDIS_BREAKER_THRESHOLD` veces seguidas, el breaker se abre y
+get_redis_client() devuelve None durante `REDIS_BREAKER_COOLDOWN` segundos: el
+cache se saltea en lugar de sumar el timeout de conexión a cada request. Pasado el
+cooldown se deja pasar una llamada de prueba (half-open).
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from flask import current_app
+
+try:
+    import redis
+
+    redis_available = True
+except ImportError:
+    redis_available = False
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "redis_pool"
+SUPPORTED_SCHEMES = ("redis://", "rediss://", "unix://")
+
+
+class CircuitBreaker:
+    """Breaker simple por conteo de fallas consecutivas con cooldown."""
+
+    def __init__(self, threshold: int = 3, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Indica si se puede intentar usar Redis (cerrado, o half-open tras el cooldown)."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                # Half-open: una llamada de prueba; si falla vuelve a abrirse
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        if self.failures or self.opened_at is not None:
+            with self._lock:
+                if self.opened_at is not None:
+                    logger.info("Redis disponible nuevamente, cerrando circuit breaker")
+                self.failures = 0
+                self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Redis no disponible ({self.failures} fallas), salteando cache por {self.cooldown}s")
+                self.opened_at = time.monotonic()
+
+
+class RedisPool:
+    """Pool de conexiones Redis de la app, seguro ante fork."""
+
+    def __init__(self, app):
+        config = app.config
+        self.url = config.get("REDIS_URL") or ""
+        self.max_connections = int(config.get("REDIS_MAX_CONNECTIONS", 50))
+        self.socket_timeout = float(config.get("REDIS_SOCKET_TIMEOUT", 0.5))
+        self.connect_timeout = float(config.get("REDIS_CONNECT_TIMEOUT", 0.5))
+        self.health_check_interval = int(config.get("REDIS_HEALTH_CHECK_INTERVAL", 30))
+        self.breaker = CircuitBreaker(
+            threshold=int(config.get("REDIS_BREAKER_THRESHOLD", 3)),
+            cooldown=float(config.get("REDIS_BREAKER_COOLDOWN", 30)),
+        )
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return redis_available and self.url.startswith(SUPPORTED_SCHEMES)
+
+    def _create_client(self):
+        pool = redis.ConnectionPool.from_url(
+            self.url,
+            decode_responses=True,
+            max_connections=self.max_connections,
+            socket_timeout=self.socket_timeout,
+            socket_connect_timeout=self.connect_timeout,
+            health_check_interval=self.health_check_interval,
+        )
+        return redis.Redis(connection_pool=pool)
+
+    def client(self):
+        """Cliente Redis del proceso actual, o None si está deshabilitado o el breaker abierto."""
+        if not self.enabled or not self.breaker.allow():
+            return None
+        pid = os.getpid()
+        if self._client is None or self._pid != pid:
+            with self._lock:
+                if self._client is None or self._pid != pid:
+                    # Tras un fork no se cierran las conexiones heredadas: pertenecen al padre
+                    self._client = self._create_client()
+                    self._pid = pid
+        return self._client
+
+    def reset(self):
+        """Descarta el pool (se recrea en el próximo uso)."""
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.connection_pool.disconnect()
+            self._client = None
+            self._pid = None
+
+
+def init_redis(app):
+    """Registra el pool Redis de la app (las conexiones se abren recién al usarlo)."""
+    app.extensions[EXTENSION_KEY] = RedisPool(app)
+
+
+def _get_pool() -> Optional[RedisPool]:
+    try:
+        return current_app.extensions.get(EXTENSION_KEY)
+    except RuntimeError:
+        return None
+
+
+def get_redis_client():
+    """Obtiene el cliente Redis compartido si está disponible."""
+    pool = _get_pool()
+    return pool.client() if pool else None
+
+
+def record_redis_success():
+    """Informa al breaker que una operación contra Redis funcionó."""
+    pool = _get_pool()
+    if pool:
+        pool.breaker.record_success()
+
+
+def record_redis_failure(error: Exception = None):
+    """Informa al breaker que una operación contra Redis falló."""
+    pool = _get_pool()
+    if pool:
+        if error is not None:
+            logger.debug(f"Error de Redis: {error}")
+        pool.breaker.record_failure()
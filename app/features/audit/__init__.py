@@ -0,0 +1,3 @@
+"""
+Audit feature - persisted audit events.
+"""
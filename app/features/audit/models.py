@@ -0,0 +1,44 @@
+"""
+Modelo de eventos de auditoría.
+"""
+
+from datetime import datetime
+
+from ...core.database import db
+
+
+class AuditEvent(db.Model):
+    """
+    Evento de auditoría persistido.
+
+    Se escribe en lotes desde app.services.audit (nunca dentro del request).
+    """
+
+    __tablename__ = "audit_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    action = db.Column(db.String(100), nullable=False, index=True)
+    user_id = db.Column(db.Integer, nullable=True, index=True)
+    username = db.Column(db.String(80), nullable=True)
+    role = db.Column(db.String(20), nullable=True)
+    ip_address = db.Column(db.String(45), nullable=True)
+    user_agent = db.Column(db.String(500), nullable=True)
+    details = db.Column(db.JSON, nullable=True)
+
+    def to_dict(self):
+        """Convierte el evento a diccionario."""
+        return {
+            "id": self.id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "action": self.action,
+            "user_id": self.user_id,
+            "username": self.username,
+            "role": self.role,
+            "ip_address": self.ip_address,
+            "user_agent": self.user_agent,
+            "details": self.details or {},
+        }
+
+    def __repr__(self):
+        return f"<AuditEvent {self.id}: {self.action} ({self.username})>"
@@ -33,6 +33,10 @@ class Case(db.Model):
     """Modelo de caso de deuda."""
 
     __tablename__ = "cases"
+    __table_args__ = (
+        # Orden estable para la paginación por cursor del listado de casos
+        db.Index("ix_cases_created_at_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False, index=True)  # Nombre del deudor
@@ -0,0 +1,199 @@
+"""
+Búsqueda de casos por nombre, apellido, DNI y nro de cliente, servida por índices.
+
+- Términos numéricos (DNI / nro de cliente): subcadena sobre el DNI sin puntos y el nro
+  de cliente (en PostgreSQL servida por índices GIN de pg_trgm, uno de ellos sobre la
+  expresión replace(dni, '.', '')); primero las coincidencias exactas, luego las de prefijo.
+- PostgreSQL: cada palabra se busca con ILIKE '%...%' sobre índices GIN de pg_trgm y
+  el resultado se ordena por similarity() con el nombre completo.
+- SQLite: tabla FTS5 `cases_fts` (contenido externo sobre `cases`, sincronizada por
+  triggers); cada palabra matchea por prefijo de palabra (no por subcadena) y se
+  ordena por bm25().
+
+Si el índice no existe (base creada antes de esta versión, o FTS5 no disponible) se
+busca con ILIKE sobre las cuatro columnas, como antes, sin ranking. La ausencia del
+índice se vuelve a verificar cada INDEX_RECHECK_SECONDS, así una migración aplicada
+con la app en marcha se aprovecha sin reiniciar.
+"""
+
+import re
+import time
+import weakref
+from typing import List, Tuple
+
+import click
+from sqlalchemy import DDL, Float, Integer, case, event, func, or_, text
+
+from ...core.database import db
+from .models import Case
+
+MAX_TERM_LENGTH = 100
+MAX_WORDS = 5
+FTS_TABLE = "cases_fts"
+INDEX_RECHECK_SECONDS = 60
+
+_NUMERIC = re.compile(r"^[\d.\-\s]+$")
+
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, lastname, dni, nro_cliente, content='cases', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS cases_fts_ai AFTER INSERT ON cases BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, lastname, dni, nro_cliente) "
+    "VALUES (new.id, new.name, new.lastname, new.dni, new.nro_cliente); END",
+    f"CREATE TRIGGER IF NOT EXISTS cases_fts_ad AFTER DELETE ON cases BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, lastname, dni, nro_cliente) "
+    "VALUES ('delete', old.id, old.name, old.lastname, old.dni, old.nro_cliente); END",
+    f"CREATE TRIGGER IF NOT EXISTS cases_fts_au AFTER UPDATE OF name, lastname, dni, nro_cliente ON cases BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, lastname, dni, nro_cliente) "
+    "VALUES ('delete', old.id, old.name, old.lastname, old.dni, old.nro_cliente); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, lastname, dni, nro_cliente) "
+    "VALUES (new.id, new.name, new.lastname, new.dni, new.nro_cliente); END",
+)
+
+POSTGRES_DDL = (
+    ("CREATE EXTENSION IF NOT EXISTS pg_trgm",)
+    + tuple(
+        f"CREATE INDEX IF NOT EXISTS ix_cases_{column}_trgm ON cases USING gin ({column} gin_trgm_ops)"
+        for column in ("name", "lastname", "dni", "nro_cliente")
+    )
+    + ("CREATE INDEX IF NOT EXISTS ix_cases_dni_digits_trgm ON cases USING gin ((replace(dni, '.', '')) gin_trgm_ops)",)
+)
+
+# El índice se crea junto con la tabla (db.create_all) y se descarta con ella
+for _statement in SQLITE_DDL:
+    event.listen(Case.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in POSTGRES_DDL:
+    event.listen(Case.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+event.listen(Case.__table__, "before_drop", DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"))
+
+# engine -> (bool, monotonic): si la base tiene el índice de búsqueda y cuándo se consultó
+_index_available = weakref.WeakKeyDictionary()
+
+
+def normalize_term(term: str) -> str:
+    """Recorta el término y colapsa espacios."""
+    return " ".join((term or "").split())[:MAX_TERM_LENGTH]
+
+
+def _escape_like(word: str) -> str:
+    return word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _has_index(dialect: str) -> bool:
+    engine = db.engine
+    cached = _index_available.get(engine)
+    if cached is not None and (cached[0] or time.monotonic() - cached[1] < INDEX_RECHECK_SECONDS):
+        return cached[0]
+    with engine.connect() as connection:
+        if dialect == "sqlite":
+            found = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+            ).first()
+        else:
+            found = connection.execute(
+                text("SELECT 1 FROM pg_indexes WHERE tablename = 'cases' AND indexname = 'ix_cases_name_trgm'")
+            ).first()
+    _index_available[engine] = (found is not None, time.monotonic())
+    return found is not None
+
+
+def _ilike_all(term: str):
+    pattern = f"%{_escape_like(term)}%"
+    return or_(
+        Case.name.ilike(pattern, escape="\\"),
+        Case.lastname.ilike(pattern, escape="\\"),
+        Case.dni.ilike(pattern, escape="\\"),
+        Case.nro_cliente.ilike(pattern, escape="\\"),
+    )
+
+
+def apply_search(query, term: str) -> Tuple[object, List]:
+    """
+    Filtra una query de Case por el término de búsqueda.
+
+    Args:
+        query: Query de Case
+        term: Texto buscado (nombre y/o apellido, DNI o nro de cliente)
+
+    Returns:
+        (query filtrada, cláusulas ORDER BY de relevancia; vacía si no hay ranking)
+    """
+    term = normalize_term(term)
+    if not term:
+        return query, []
+
+    if _NUMERIC.match(term):
+        digits = re.sub(r"\D", "", term)
+        if digits:
+            # Los DNI pueden estar guardados con puntos (30.111.222)
+            dni = func.replace(Case.dni, ".", "")
+            query = query.filter(or_(dni.like(f"%{digits}%"), Case.nro_cliente.like(f"%{digits}%")))
+            rank = case(
+                (or_(dni == digits, Case.nro_cliente == digits), 0),
+                (or_(dni.like(f"{digits}%"), Case.nro_cliente.like(f"{digits}%")), 1),
+                else_=2,
+            )
+            return query, [rank]
+
+    dialect = db.engine.dialect.name
+    if dialect not in ("postgresql", "sqlite") or not _has_index(dialect):
+        return query.filter(_ilike_all(term)), []
+
+    words = term.split()[:MAX_WORDS]
+    if dialect == "postgresql":
+        for word in words:
+            pattern = f"%{_escape_like(word)}%"
+            query = query.filter(
+                or_(
+                    Case.name.ilike(pattern, escape="\\"),
+                    Case.lastname.ilike(pattern, escape="\\"),
+                    Case.dni.ilike(pattern, escape="\\"),
+                    Case.nro_cliente.ilike(pattern, escape="\\"),
+                )
+            )
+        similarity = func.similarity(func.concat_ws(" ", Case.name, Case.lastname), term)
+        return query, [similarity.desc()]
+
+    # SQLite FTS5: cada palabra como prefijo entre comillas (AND implícito)
+    match = " ".join('"{}"*'.format(word.replace('"', '""')) for word in words)
+    fts = (
+        text(f"SELECT rowid AS id, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match")
+        .bindparams(match=match)
+        .columns(id=Integer, rank=Float)
+        .subquery("fts")
+    )
+    query = query.join(fts, fts.c.id == Case.id)
+    return query, [fts.c.rank.asc()]
+
+
+def rebuild_search_index() -> str:
+    """Crea (si falta) y recarga el índice de búsqueda de la base activa. Devuelve el dialecto."""
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as connection:
+        if dialect == "sqlite":
+            for statement in SQLITE_DDL:
+                connection.exec_driver_sql(statement)
+            connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif dialect == "postgresql":
+            for statement in POSTGRES_DDL:
+                connection.exec_driver_sql(statement)
+    _index_available.pop(db.engine, None)
+    return dialect
+
+
+@click.group("case-search")
+def case_search_cli():
+    """Administra el índice de búsqueda de casos."""
+
+
+@case_search_cli.command("rebuild")
+def rebuild_command():
+    """Crea el índice de búsqueda si falta y lo recarga desde la tabla cases."""
+    dialect = rebuild_search_index()
+    click.echo(f"case-search: índice listo ({dialect})")
+
+
+def init_case_search(app):
+    """Registra el comando CLI del índice de búsqueda."""
+    app.cli.add_command(case_search_cli)
@@ -0,0 +1,252 @@
+"""
+Serialización de casos en bloque (sin N+1 sobre gestor, promesas y actividades).
+
+`projection_query()` + `project_rows()` (o `project_cases()`) seleccionan solo las
+columnas del field set pedido y arman los diccionarios directo desde las tuplas, sin
+instanciar objetos Case; las promesas y últimas actividades se cargan en bloque.
+"""
+
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterator, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import aliased, joinedload
+
+from ...core.database import db
+from ..activities.models import Activity
+from ..carteras.models import Cartera
+from ..users.models import User
+from .models import Case, CaseStatus
+from .promise import Promise
+
+# Cantidad de actividades recientes que se incluyen por caso
+ACTIVITIES_PER_CASE = 10
+
+
+def load_promises(case_ids: List[int]) -> Dict[int, List[Promise]]:
+    """Promesas de los casos dados, en una query, agrupadas por caso."""
+    promises = defaultdict(list)
+    if case_ids:
+        for promise in Promise.query.filter(Promise.case_id.in_(case_ids)).order_by(Promise.case_id, Promise.id):
+            promises[promise.case_id].append(promise)
+    return promises
+
+
+def load_recent_activities(case_ids: List[int], limit: int = ACTIVITIES_PER_CASE) -> Dict[int, List[Activity]]:
+    """
+    Últimas `limit` actividades de cada caso en una query (top-N por caso con
+    row_number()), con el usuario creador cargado por join.
+    """
+    activities = defaultdict(list)
+    if not case_ids:
+        return activities
+
+    ranked = (
+        db.session.query(
+            Activity.id.label("id"),
+            func.row_number()
+            .over(partition_by=Activity.case_id, order_by=(Activity.created_at.desc(), Activity.id.desc()))
+            .label("rn"),
+        )
+        .filter(Activity.case_id.in_(case_ids))
+        .subquery()
+    )
+    query = (
+        Activity.query.join(ranked, ranked.c.id == Activity.id)
+        .filter(ranked.c.rn <= limit)
+        .options(joinedload(Activity.creator))
+        .order_by(Activity.case_id, Activity.created_at.desc(), Activity.id.desc())
+    )
+    for activity in query:
+        activities[activity.case_id].append(activity)
+    return activities
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _money(value):
+    return float(value) if value else 0.0
+
+
+def _optional_money(value):
+    return float(value) if value else None
+
+
+# Campos de Case.to_dict(): nombre -> (origen, formateador). El origen es una columna de
+# Case o el nombre de una relación ("status", "cartera", "gestor") y su columna.
+_FIELDS = {
+    "id": (Case.id, None),
+    "name": (Case.name, None),
+    "lastname": (Case.lastname, None),
+    "dni": (Case.dni, None),
+    "nro_cliente": (Case.nro_cliente, None),
+    "total": (Case.total, _money),
+    "monto_inicial": (Case.monto_inicial, _optional_money),
+    "fecha_ultimo_pago": (Case.fecha_ultimo_pago, _iso),
+    "telefono": (Case.telefono, None),
+    "calle_nombre": (Case.calle_nombre, None),
+    "calle_nro": (Case.calle_nro, None),
+    "localidad": (Case.localidad, None),
+    "cp": (Case.cp, None),
+    "provincia": (Case.provincia, None),
+    "status_id": (Case.status_id, None),
+    "status_nombre": (("status", "nombre"), None),
+    "cartera_id": (Case.cartera_id, None),
+    "cartera_nombre": (("cartera", "nombre"), None),
+    "assigned_to_id": (Case.assigned_to_id, None),
+    "assigned_to": (("gestor", "username"), None),
+    "notes": (Case.notes, None),
+    "created_at": (Case.created_at, _iso),
+    "updated_at": (Case.updated_at, _iso),
+}
+
+# Campos que devuelve cada tipo de endpoint
+FIELD_SETS = {
+    # Listados de administración: sin notas ni dirección
+    "list": (
+        "id",
+        "name",
+        "lastname",
+        "dni",
+        "nro_cliente",
+        "total",
+        "monto_inicial",
+        "fecha_ultimo_pago",
+        "telefono",
+        "status_id",
+        "status_nombre",
+        "cartera_id",
+        "cartera_nombre",
+        "assigned_to_id",
+        "assigned_to",
+        "created_at",
+        "updated_at",
+    ),
+    # Igual que Case.to_dict()
+    "detail": tuple(_FIELDS),
+    # Deudas de la vista agrupada por DNI (lo que usa la ficha del gestor)
+    "grouped": (
+        "id",
+        "name",
+        "lastname",
+        "dni",
+        "nro_cliente",
+        "total",
+        "monto_inicial",
+        "fecha_ultimo_pago",
+        "telefono",
+        "calle_nombre",
+        "calle_nro",
+        "localidad",
+        "cp",
+        "provincia",
+        "status_id",
+        "status_nombre",
+        "cartera_id",
+        "cartera_nombre",
+        "assigned_to_id",
+        "notes",
+        "created_at",
+    ),
+}
+
+
+def projection_query(query, field_set: str = "list"):
+    """
+    Convierte una query de Case (con filtros y orden, sin LIMIT: se aplica después) en
+    una query de solo las columnas del field set.
+
+    Las relaciones se resuelven con outer joins a alias propios, así no chocan con
+    joins que ya tenga la query.
+    """
+    related = {
+        "status": aliased(CaseStatus),
+        "cartera": aliased(Cartera),
+        "gestor": aliased(User),
+    }
+    joins = {
+        "status": lambda a: a.id == Case.status_id,
+        "cartera": lambda a: a.id == Case.cartera_id,
+        "gestor": lambda a: a.id == Case.assigned_to_id,
+    }
+
+    columns = []
+    used = []
+    for name in FIELD_SETS[field_set]:
+        source, _ = _FIELDS[name]
+        if isinstance(source, tuple):
+            relation, column = source
+            if relation not in used:
+                used.append(relation)
+            source = getattr(related[relation], column)
+        columns.append(source.label(name))
+
+    query = query.with_entities(*columns)
+    for relation in used:
+        query = query.outerjoin(related[relation], joins[relation](related[relation]))
+    return query
+
+
+def project_rows(rows, field_set: str = "list") -> List[Dict]:
+    """Arma los diccionarios de respuesta desde las tuplas de projection_query()."""
+    names = FIELD_SETS[field_set]
+    formatters = [(i, _FIELDS[name][1]) for i, name in enumerate(names) if _FIELDS[name][1]]
+    result = []
+    for row in rows:
+        values = list(row)
+        for i, formatter in formatters:
+            values[i] = formatter(values[i])
+        result.append(dict(zip(names, values)))
+    return result
+
+
+def project_cases(query, field_set: str = "list", include_relations: bool = False) -> List[Dict]:
+    """
+    Ejecuta una query de Case como proyección y devuelve los diccionarios de respuesta.
+
+    Args:
+        query: Query de Case con filtros y orden aplicados
+        field_set: "list", "detail" o "grouped" (ver FIELD_SETS)
+        include_relations: Si agregar promesas y últimas actividades (2 queries más)
+
+    Returns:
+        Lista de diccionarios con los campos del field set
+    """
+    data = project_rows(projection_query(query, field_set).all(), field_set)
+    if include_relations:
+        _attach_relations(data)
+    return data
+
+
+def _attach_relations(data: List[Dict]) -> None:
+    if not data:
+        return
+    case_ids = [d["id"] for d in data]
+    promises = load_promises(case_ids)
+    activities = load_recent_activities(case_ids)
+    for d in data:
+        d["promises"] = [p.to_dict() for p in promises.get(d["id"], [])]
+        d["activities"] = [a.to_dict() for a in activities.get(d["id"], [])]
+
+
+def iter_project_cases(
+    query, field_set: str = "list", include_relations: bool = False, chunk_size: int = 500
+) -> Iterator[Dict]:
+    """
+    Versión generador de project_cases() para respuestas en streaming.
+
+    Lee la proyección con yield_per (cursor del lado del servidor en PostgreSQL) y
+    procesa de a `chunk_size` filas: la memoria queda acotada a un chunk y, con
+    relaciones, se hacen 2 queries por chunk en lugar de 2 por caso.
+    """
+    rows = iter(projection_query(query, field_set).yield_per(chunk_size))
+    while True:
+        chunk = project_rows(islice(rows, chunk_size), field_set)
+        if not chunk:
+            return
+        if include_relations:
+            _attach_relations(chunk)
+        yield from chunk
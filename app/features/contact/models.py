@@ -33,3 +33,55 @@ class ContactSubmission(db.Model):
 
     def __repr__(self):
         return f"<ContactSubmission {self.id}: {self.entity} - {self.email}>"
+
+
+class OutboundEmail(db.Model):
+    """
+    Email pendiente de envío (outbox).
+
+    El request que lo genera solo inserta la fila; el envío, con reintentos y backoff,
+    lo hace app.services.email_outbox en segundo plano.
+    """
+
+    __tablename__ = "email_outbox"
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipients = db.Column(db.Text, nullable=False)  # separados por coma
+    subject = db.Column(db.String(300), nullable=False)
+    body_text = db.Column(db.Text, nullable=False)
+    body_html = db.Column(db.Text, nullable=True)
+    reply_to = db.Column(db.String(254), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default=PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),)
+
+    @property
+    def recipient_list(self):
+        return [r for r in self.recipients.split(",") if r]
+
+    def to_dict(self):
+        """Convierte el email a diccionario."""
+        return {
+            "id": self.id,
+            "recipients": self.recipient_list,
+            "subject": self.subject,
+            "status": self.status,
+            "attempts": self.attempts,
+            "next_attempt_at": self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "sent_at": self.sent_at.isoformat() if self.sent_at else None,
+        }
+
+    def __repr__(self):
+        return f"<OutboundEmail {self.id}: {self.status} ({self.attempts} intentos)>"
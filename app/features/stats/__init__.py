@@ -0,0 +1,3 @@
+"""
+Stats feature - dashboard rollup tables.
+"""
@@ -0,0 +1,94 @@
+"""
+Modelos de agregados para dashboards: rollup diario y resumen por cliente (DNI).
+"""
+
+from ...core.database import db
+
+# gestor_id de las filas de casos sin asignar (NULL no sirve en la clave única)
+SIN_GESTOR = 0
+
+
+class DailyStat(db.Model):
+    """
+    Agregado diario por (fecha, cartera, gestor, estado).
+
+    Cada hecho se acumula en la fecha de su propio created_at: los casos por su fecha de
+    alta y las promesas/actividades por la suya, con la cartera, gestor y estado del caso.
+    Se mantiene incrementalmente desde app.services.daily_stats.
+    """
+
+    __tablename__ = "daily_stats"
+    __table_args__ = (db.UniqueConstraint("fecha", "cartera_id", "gestor_id", "status_id", name="uq_daily_stats_key"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False, index=True)
+    cartera_id = db.Column(db.Integer, nullable=False, index=True)
+    gestor_id = db.Column(db.Integer, nullable=False, default=SIN_GESTOR, index=True)
+    status_id = db.Column(db.Integer, nullable=False)
+
+    casos_count = db.Column(db.Integer, nullable=False, default=0)
+    casos_total = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    promesas_count = db.Column(db.Integer, nullable=False, default=0)
+    promesas_cumplidas = db.Column(db.Integer, nullable=False, default=0)
+    actividades_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        """Convierte el agregado a diccionario."""
+        return {
+            "fecha": self.fecha.isoformat() if self.fecha else None,
+            "cartera_id": self.cartera_id,
+            "gestor_id": self.gestor_id or None,
+            "status_id": self.status_id,
+            "casos_count": self.casos_count,
+            "casos_total": float(self.casos_total) if self.casos_total else 0.0,
+            "promesas_count": self.promesas_count,
+            "promesas_cumplidas": self.promesas_cumplidas,
+            "actividades_count": self.actividades_count,
+        }
+
+    def __repr__(self):
+        return f"<DailyStat {self.fecha} cartera={self.cartera_id} gestor={self.gestor_id} status={self.status_id}>"
+
+
+class Debtor(db.Model):
+    """
+    Resumen por cliente (DNI) de todas sus deudas.
+
+    Reemplaza el GROUP BY dni sobre cases en las vistas agrupadas y el reporte de
+    múltiples deudas. Se recalcula por DNI desde app.services.debtors cada vez que se
+    escribe un caso de ese DNI; los casos sin DNI no tienen fila.
+    """
+
+    __tablename__ = "debtors"
+    __table_args__ = (
+        db.Index("ix_debtors_ultima_deuda_dni", "ultima_deuda", "dni"),
+        db.Index("ix_debtors_deuda_consolidada", "deuda_consolidada"),
+    )
+
+    dni = db.Column(db.String(50), primary_key=True)
+    total_deudas = db.Column(db.Integer, nullable=False, default=0)
+    deuda_consolidada = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    monto_inicial_total = db.Column(db.Numeric(15, 2), nullable=False, default=0)
+    fecha_ultimo_pago = db.Column(db.Date, nullable=True)  # Último pago entre todas sus deudas
+    primera_deuda = db.Column(db.DateTime, nullable=True)  # created_at de la deuda más vieja
+    ultima_deuda = db.Column(db.DateTime, nullable=True)  # created_at de la deuda más reciente
+    cartera_ids = db.Column(db.JSON, nullable=False, default=list)
+    gestor_ids = db.Column(db.JSON, nullable=False, default=list)  # Gestores asignados (sin los no asignados)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        """Convierte el resumen a diccionario."""
+        return {
+            "dni": self.dni,
+            "total_deudas": self.total_deudas,
+            "deuda_consolidada": float(self.deuda_consolidada) if self.deuda_consolidada else 0.0,
+            "monto_inicial_total": float(self.monto_inicial_total) if self.monto_inicial_total else 0.0,
+            "fecha_ultimo_pago": self.fecha_ultimo_pago.isoformat() if self.fecha_ultimo_pago else None,
+            "primera_deuda": self.primera_deuda.isoformat() if self.primera_deuda else None,
+            "ultima_deuda": self.ultima_deuda.isoformat() if self.ultima_deuda else None,
+            "cartera_ids": self.cartera_ids or [],
+            "gestor_ids": self.gestor_ids or [],
+        }
+
+    def __repr__(self):
+        return f"<Debtor {self.dni} deudas={self.total_deudas}>"
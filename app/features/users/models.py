@@ -3,8 +3,8 @@ Modelo de Usuario.
 """
 
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from ...core.database import db
+from ...utils.passwords import hash_password, needs_rehash, verify_password
 
 
 class User(db.Model):
@@ -25,12 +25,16 @@ class User(db.Model):
     activities = db.relationship("Activity", backref="creator", lazy="dynamic")
 
     def set_password(self, password: str):
-        """Establece la contraseña hasheada."""
-        self.password_hash = generate_password_hash(password)
+        """Establece la contraseña hasheada (con la política de PASSWORD_HASH_METHOD)."""
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
         """Verifica la contraseña."""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        """True si el hash guardado no usa la política actual (se actualiza al loguearse)."""
+        return needs_rehash(self.password_hash)
 
     def to_dict(self):
         """Convierte el usuario a diccionario (sin contraseña)."""
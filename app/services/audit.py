@@ -1,13 +1,202 @@
 """
 Utilidades para logging de auditoría.
+
+audit_log() arma el evento y lo deja en una cola en memoria: no toca la base ni el
+disco dentro del request. Un thread por proceso (AuditSink) vacía la cola en lotes
+hacia la tabla `audit_events` (AUDIT_SINK=db) o a un archivo JSONL rotativo
+(AUDIT_SINK=file).
+
+La cola está acotada (AUDIT_QUEUE_SIZE). Si se llena, con AUDIT_QUEUE_POLICY=drop
+(default) el evento nuevo se descarta y se cuenta; con "block" se espera hasta
+AUDIT_BLOCK_TIMEOUT segundos antes de descartarlo. Cada evento se emite además por el
+logger "audit", como antes.
 """
 
+import atexit
+import json
 import logging
+import os
+import queue
+import threading
+import time
+import weakref
 from datetime import datetime
-from flask import request, session
 from functools import wraps
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+from flask import current_app, has_request_context, request, session
+from sqlalchemy import insert
+
+from ..core.database import db
+from ..features.audit.models import AuditEvent
 
 logger = logging.getLogger("audit")
+sink_logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "audit_sink"
+
+# Sinks a vaciar al terminar el proceso: un solo handler de atexit para todas las apps
+_exit_sinks: "weakref.WeakSet[AuditSink]" = weakref.WeakSet()
+_exit_handler_registered = False
+
+
+class AuditSink:
+    """
+    Cola acotada de eventos de auditoría con escritura en lotes en segundo plano.
+
+    El thread se arranca en el primer evento de cada proceso (los threads no
+    sobreviven al fork) y escribe cuando junta AUDIT_BATCH_SIZE eventos o pasan
+    AUDIT_FLUSH_INTERVAL segundos desde el primero del lote.
+    """
+
+    def __init__(self, app):
+        config = app.config
+        self.app = app
+        self.sink = config.get("AUDIT_SINK", "db")
+        self.batch_size = int(config.get("AUDIT_BATCH_SIZE", 200))
+        self.flush_interval = float(config.get("AUDIT_FLUSH_INTERVAL", 2.0))
+        self.policy = config.get("AUDIT_QUEUE_POLICY", "drop")
+        self.block_timeout = float(config.get("AUDIT_BLOCK_TIMEOUT", 0.05))
+        self.worker = bool(config.get("AUDIT_WORKER", True))
+        self.queue_size = int(config.get("AUDIT_QUEUE_SIZE", 10000))
+        self.file_path = config.get("AUDIT_FILE")
+        self._file_handler: Optional[RotatingFileHandler] = None
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=self.queue_size)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _check_fork(self):
+        """Un proceso hijo arranca con la cola vacía (los eventos del padre son del padre)."""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self.queue_size)
+                    self._thread = None
+                    self._file_handler = None
+                    self._pid = os.getpid()
+
+    def _ensure_started(self):
+        if not self.worker or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+                self._thread.start()
+
+    def put(self, event: Dict) -> bool:
+        """
+        Encola un evento sin bloquear (salvo AUDIT_QUEUE_POLICY=block, con timeout).
+
+        Returns:
+            False si la cola estaba llena y el evento se descartó
+        """
+        self._check_fork()
+        self._ensure_started()
+        try:
+            if self.policy == "block":
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                sink_logger.warning(f"Cola de auditoría llena: {self.dropped} eventos descartados")
+            return False
+        self.enqueued += 1
+        return True
+
+    def _drain(self) -> List[Dict]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            # Junta el lote hasta batch_size o hasta que pase flush_interval
+            deadline = time.monotonic() + self.flush_interval
+            batch = [first]
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def flush(self) -> int:
+        """Escribe en el momento todo lo encolado (tests, apagado del proceso). Devuelve lo escrito."""
+        self._check_fork()
+        total = 0
+        while True:
+            batch = self._drain()
+            if not batch:
+                return total
+            total += self._write(batch)
+
+    def _write(self, batch: List[Dict]) -> int:
+        try:
+            with self._write_lock:
+                if self.sink == "file":
+                    self._write_file(batch)
+                else:
+                    self._write_db(batch)
+        except Exception:
+            self.failed += len(batch)
+            sink_logger.exception(f"No se pudieron escribir {len(batch)} eventos de auditoría")
+            return 0
+        self.written += len(batch)
+        return len(batch)
+
+    def _write_db(self, batch: List[Dict]):
+        # Conexión propia del engine: no se mezcla con la sesión de ningún request
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(insert(AuditEvent.__table__), batch)
+
+    def _write_file(self, batch: List[Dict]):
+        if self._file_handler is None:
+            self._file_handler = RotatingFileHandler(
+                self.file_path,
+                maxBytes=int(self.app.config.get("AUDIT_FILE_MAX_BYTES", 10 * 1024 * 1024)),
+                backupCount=int(self.app.config.get("AUDIT_FILE_BACKUP_COUNT", 5)),
+                encoding="utf-8",
+            )
+        handler = self._file_handler
+        for event in batch:
+            line = json.dumps({**event, "created_at": event["created_at"].isoformat()}, ensure_ascii=False)
+            handler.emit(logging.makeLogRecord({"msg": line, "levelno": logging.INFO, "levelname": "INFO"}))
+        handler.flush()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de la cola."""
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+def get_audit_sink() -> Optional[AuditSink]:
+    try:
+        return current_app.extensions.get(EXTENSION_KEY)
+    except RuntimeError:
+        return None
 
 
 def audit_log(action: str, details: dict = None):
@@ -18,24 +207,32 @@ def audit_log(action: str, details: dict = None):
         action: Acción realizada (ej: 'login', 'create_case', 'update_case')
         details: Detalles adicionales del evento
     """
-    user_id = session.get("user_id")
-    username = session.get("username")
-    role = session.get("role")
-    ip_address = request.remote_addr if request else None
-    user_agent = request.headers.get("User-Agent") if request else None
-
-    log_data = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "action": action,
-        "user_id": user_id,
-        "username": username,
-        "role": role,
-        "ip_address": ip_address,
-        "user_agent": user_agent,
-        "details": details or {},
-    }
-
-    logger.info(f"AUDIT: {action} | User: {username} ({role}) | IP: {ip_address} | Details: {log_data['details']}")
+    in_request = has_request_context()
+    user_id = session.get("user_id") if in_request else None
+    username = session.get("username") if in_request else None
+    role = session.get("role") if in_request else None
+    ip_address = request.remote_addr if in_request else None
+    user_agent = request.headers.get("User-Agent") if in_request else None
+
+    # Copia serializable: el evento se escribe después y no debe ver cambios posteriores
+    details = json.loads(json.dumps(details or {}, default=str))
+
+    logger.info(f"AUDIT: {action} | User: {username} ({role}) | IP: {ip_address} | Details: {details}")
+
+    sink = get_audit_sink()
+    if sink:
+        sink.put(
+            {
+                "created_at": datetime.utcnow(),
+                "action": action[:100],
+                "user_id": user_id,
+                "username": username,
+                "role": role,
+                "ip_address": ip_address,
+                "user_agent": user_agent[:500] if user_agent else None,
+                "details": details,
+            }
+        )
 
 
 def audit_decorator(action: str):
@@ -60,3 +257,24 @@ def audit_decorator(action: str):
         return decorated_function
 
     return decorator
+
+
+def _flush_at_exit():
+    for sink in list(_exit_sinks):
+        sink.flush()
+
+
+def init_audit(app):
+    """Registra la cola de auditoría de la app y el vaciado al terminar el proceso."""
+    global _exit_handler_registered
+    if app.config.get("AUDIT_SINK", "db") == "log":
+        return
+    sink = AuditSink(app)
+    app.extensions[EXTENSION_KEY] = sink
+    if sink.worker:
+        # create_app puede llamarse muchas veces por proceso (tests, CLI): el handler se
+        # registra una vez y las apps descartadas salen del WeakSet
+        _exit_sinks.add(sink)
+        if not _exit_handler_registered:
+            atexit.register(_flush_at_exit)
+            _exit_handler_registered = True
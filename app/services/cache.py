@@ -4,15 +4,41 @@ Utilidades de cache para optimización de performance.
 
 import json
 import hashlib
+import inspect
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
 from functools import wraps
+from typing import Dict, Iterable, List, Optional, Tuple
 from flask import current_app
+from sqlalchemy import event
 
-try:
-    import redis
+from ..core.database import db
+from ..core.redis_client import get_redis_client, record_redis_failure, record_redis_success
+from ..utils.local_cache import LocalCache
+from .metrics import count_cache
+from .profiling import record_cache
 
-    redis_available = True
-except ImportError:
-    redis_available = False
+logger = logging.getLogger(__name__)
+
+# Prefijo de los contadores de generación por scope (ver invalidate_scopes)
+GENERATION_PREFIX = "cache:gen"
+GLOBAL_SCOPE = "all"
+
+LOCK_PREFIX = "cache:lock"
+# Marca de las entradas con stale_ttl: {"__swr__": fresh_until, "v": valor}
+SWR_MARKER = "__swr__"
+
+LOCAL_CACHE_KEY = "cache_l1"
+GENERATIONS_KEY = "cache_generations"
+STATS_KEY = "cache_l2_stats"
+_MISSING = object()
+
+# Claves con un refresco en segundo plano en curso en este proceso
+_refreshing = set()
+_refreshing_lock = threading.Lock()
 
 
 def get_cache_key(prefix: str, *args, **kwargs) -> str:
@@ -32,72 +58,446 @@ def get_cache_key(prefix: str, *args, **kwargs) -> str:
     return f"cache:{prefix}:{key_hash}"
 
 
-def get_redis_client():
-    """Obtiene cliente Redis si está disponible."""
-    if not redis_available:
+def _scope_tags(f, scope: Tuple[str, ...], args, kwargs) -> List[str]:
+    """
+    Tags de generación de una entrada según los argumentos de scope de la llamada.
+
+    Una entrada filtrada por cartera/gestor depende de los contadores de esa cartera y
+    ese gestor; sin filtros depende del contador global.
+    """
+    bound = inspect.signature(f).bind_partial(*args, **kwargs).arguments
+    tags = []
+    for name in scope:
+        value = bound.get(name)
+        if value:
+            tags.append(f"{name.replace('_id', '')}:{value}")
+    return tags or [GLOBAL_SCOPE]
+
+
+class GenerationCache:
+    """
+    Copia en el proceso de los contadores de generación de Redis.
+
+    Un contador leído hace menos de `interval` segundos se usa sin consultar Redis, así
+    un hit en L1 no cuesta un round trip. Las invalidaciones de este proceso descartan
+    la copia de sus tags (se ven en la llamada siguiente); las de otros workers, a lo
+    sumo `interval` segundos después.
+    """
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._values: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, redis_client, tags: List[str]) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            known = {tag: self._values.get(tag) for tag in tags}
+        stale = [tag for tag, entry in known.items() if entry is None or now - entry[0] >= self.interval]
+        if stale:
+            values = redis_client.mget([f"{GENERATION_PREFIX}:{tag}" for tag in stale])
+            fetched = {tag: (now, value or "0") for tag, value in zip(stale, values)}
+            known.update(fetched)
+            if self.interval > 0:
+                with self._lock:
+                    self._values.update(fetched)
+        return [known[tag][1] for tag in tags]
+
+    def forget(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._values.pop(tag, None)
+
+
+def _get_generations() -> Optional[GenerationCache]:
+    try:
+        return current_app.extensions.get(GENERATIONS_KEY)
+    except RuntimeError:
         return None
 
+
+def _generation_suffix(redis_client, local, tags: List[str]) -> str:
+    """
+    Sufijo de generaciones de los tags para la clave de cache.
+
+    Con Redis se usan los contadores compartidos por todos los procesos (leídos en un
+    round trip y reutilizados durante CACHE_GENERATION_CHECK_INTERVAL); sin Redis, los
+    contadores locales del proceso (prefijo "l" para que ambas fuentes nunca produzcan
+    la misma clave).
+    """
+    if redis_client:
+        try:
+            generations = _get_generations() or GenerationCache(interval=0)
+            return "g" + ".".join(generations.get_many(redis_client, tags))
+        except Exception as e:
+            record_redis_failure(e)
+    if local is None:
+        return "gl0"
+    return "gl" + ".".join(str(local.generation(tag)) for tag in tags)
+
+
+def get_local_cache() -> Optional[LocalCache]:
+    """Tier L1 (en memoria del proceso) de la app actual, si está habilitado."""
     try:
-        redis_url = current_app.config.get("REDIS_URL")
-        if redis_url and redis_url.startswith("redis://"):
-            return redis.from_url(redis_url, decode_responses=True)
+        return current_app.extensions.get(LOCAL_CACHE_KEY)
+    except RuntimeError:
         return None
+
+
+def _count(name: str):
+    try:
+        current_app.extensions[STATS_KEY][name] += 1
+    except (RuntimeError, KeyError):
+        pass
+
+
+def _record_lookup(hit: bool):
+    """Hit o miss de cache_result para el request en curso y las métricas del proceso."""
+    record_cache(hit)
+    count_cache(hit)
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Contadores del cache: L1 (entradas, bytes, hits, misses, evictions) y L2 (hits y
+    misses de Redis, esperas por el cálculo de otro proceso, entradas vencidas servidas
+    y refrescos en segundo plano).
+    """
+    local = get_local_cache()
+    return {
+        "l1": local.stats() if local else {},
+        "l2": dict(current_app.extensions.get(STATS_KEY, {})),
+    }
+
+
+def _acquire_lock(redis_client, cache_key: str, lock_timeout: int) -> bool:
+    """Toma el lock de cálculo de una clave entre procesos (SET NX con expiración)."""
+    if not redis_client:
+        return True
+    try:
+        return bool(redis_client.set(f"{LOCK_PREFIX}:{cache_key}", "1", nx=True, ex=lock_timeout))
+    except Exception as e:
+        record_redis_failure(e)
+        return True
+
+
+def _release_lock(redis_client, cache_key: str):
+    if redis_client:
+        try:
+            redis_client.delete(f"{LOCK_PREFIX}:{cache_key}")
+        except Exception as e:
+            record_redis_failure(e)
+
+
+def _read_redis(redis_client, cache_key: str):
+    """Lee una entrada de Redis: (fresh_until, valor, tamaño) o None si no está."""
+    try:
+        cached = redis_client.get(cache_key)
+        record_redis_success()
+    except Exception as e:
+        record_redis_failure(e)
+        return None
+    if not cached:
+        return None
+    try:
+        payload = json.loads(cached)
     except Exception:
         return None
+    if isinstance(payload, dict) and SWR_MARKER in payload:
+        return payload[SWR_MARKER], payload["v"], len(cached)
+    # Entradas sin stale_ttl: vigentes mientras existan en Redis
+    return None, payload, len(cached)
+
+
+def _store(redis_client, local, cache_key: str, result, timeout: int, stale_ttl: int):
+    """Guarda el resultado en Redis y en L1 (con fecha de frescura si hay stale_ttl)."""
+    fresh_until = time.time() + timeout if stale_ttl else None
+    payload = json.dumps({SWR_MARKER: fresh_until, "v": result} if stale_ttl else result, default=str)
+    if redis_client:
+        try:
+            redis_client.setex(cache_key, timeout + stale_ttl, payload)
+        except Exception as e:
+            record_redis_failure(e)
+    if local:
+        value = json.loads(payload)
+        if stale_ttl:
+            value = value["v"]
+        _store_local(local, cache_key, fresh_until, value, len(payload), timeout, stale_ttl)
 
 
-def cache_result(timeout: int = 300, key_prefix: str = None):
+def _store_local(local, cache_key: str, fresh_until, value, size: int, timeout: int, stale_ttl: int):
+    """
+    Guarda una entrada en L1.
+
+    Sin stale_ttl, CACHE_L1_TTL acota la vida de la entrada. Con stale_ttl acota solo
+    la ventana fresca: la entrada vive timeout + stale_ttl y, pasado CACHE_L1_TTL, se
+    sirve vencida mientras se refresca en segundo plano (sin Redis, L1 es el único
+    tier y si no el recálculo sería sincrónico cada CACHE_L1_TTL).
+    """
+    if stale_ttl:
+        fresh_until = min(fresh_until, time.time() + local.ttl)
+        local.set(cache_key, (fresh_until, value), size=size, ttl=timeout + stale_ttl, capped=False)
+    else:
+        local.set(cache_key, (fresh_until, value), size=size, ttl=timeout)
+
+
+def _wait_for_value(redis_client, cache_key: str, lock_timeout: int):
+    """Espera (con backoff) a que el proceso que tiene el lock publique el valor."""
+    deadline = time.monotonic() + lock_timeout
+    delay = 0.025
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        entry = _read_redis(redis_client, cache_key)
+        if entry is not None:
+            return entry
+        try:
+            if not redis_client.exists(f"{LOCK_PREFIX}:{cache_key}"):
+                return None
+        except Exception as e:
+            record_redis_failure(e)
+            return None
+        delay = min(delay * 2, 0.2)
+    return None
+
+
+def _refresh_in_background(f, args, kwargs, cache_key: str, timeout: int, stale_ttl: int, lock_timeout: int):
+    """
+    Recalcula una entrada vencida en un thread, sin bloquear al request que la sirvió.
+
+    Solo un refresco por clave: dentro del proceso con _refreshing y entre procesos con
+    el lock de Redis.
+    """
+    with _refreshing_lock:
+        if cache_key in _refreshing:
+            return
+        _refreshing.add(cache_key)
+
+    app = current_app._get_current_object()
+
+    def run():
+        try:
+            with app.app_context():
+                redis_client = get_redis_client()
+                local = get_local_cache()
+                # La entrada de L1 vence antes que la de Redis: si Redis tiene una fresca, alcanza con copiarla
+                entry = _read_redis(redis_client, cache_key) if redis_client else None
+                if local and entry is not None and entry[0] is not None and entry[0] > time.time():
+                    _store_local(local, cache_key, entry[0], entry[1], entry[2], timeout, stale_ttl)
+                    return
+                if not _acquire_lock(redis_client, cache_key, lock_timeout):
+                    return
+                try:
+                    result = f(*args, **kwargs)
+                    _store(redis_client, local, cache_key, result, timeout, stale_ttl)
+                    _count("refreshes")
+                finally:
+                    _release_lock(redis_client, cache_key)
+        except Exception:
+            logger.exception(f"Error refrescando cache {cache_key}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(cache_key)
+
+    threading.Thread(target=run, name=f"cache-refresh-{f.__name__}", daemon=True).start()
+
+
+def cache_result(
+    timeout: int = 300,
+    key_prefix: str = None,
+    scope: Optional[Tuple[str, ...]] = None,
+    stale_ttl: int = 0,
+    lock_timeout: int = 30,
+):
     """
     Decorador para cachear resultados de funciones.
 
+    Busca primero en el cache en memoria del proceso (L1) y luego en Redis (L2). Ante
+    un faltante se calcula una sola vez por clave: un thread por proceso (lock local) y
+    un proceso a la vez (lock en Redis); el resto espera el valor publicado. Los valores
+    devueltos desde cache son de solo lectura.
+
     Args:
         timeout: Tiempo de expiración en segundos (default: 5 minutos)
         key_prefix: Prefijo para la clave de cache
+        scope: Nombres de argumentos (ej: ("cartera_id", "gestor_id")) que definen de qué
+            contadores de generación depende la entrada. Con scope, la clave incluye esas
+            generaciones y invalidate_scopes() la vuelve obsoleta en O(1). Sin scope, la
+            entrada solo expira por timeout.
+        stale_ttl: Segundos que una entrada vencida se sigue sirviendo mientras se
+            recalcula en segundo plano (stale-while-revalidate). 0 = deshabilitado.
+            Una invalidación por scope no deja valor viejo: se recalcula en el momento.
+        lock_timeout: Máximo de segundos que se espera el cálculo de otro proceso
     """
 
     def decorator(f):
+        def serve(entry, cache_key, args, kwargs):
+            """Devuelve el valor de una entrada, disparando el refresco si está vencida."""
+            fresh_until, value = entry
+            _record_lookup(hit=True)
+            if fresh_until is not None and fresh_until <= time.time():
+                _count("stale")
+                _refresh_in_background(f, args, kwargs, cache_key, timeout, stale_ttl, lock_timeout)
+            return value
+
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Intentar obtener de cache
+            local = get_local_cache()
             redis_client = get_redis_client()
-            if redis_client:
-                cache_key = get_cache_key(key_prefix or f.__name__, *args, **kwargs)
-                cached = redis_client.get(cache_key)
-                if cached:
-                    try:
-                        return json.loads(cached)
-                    except Exception:
-                        pass
-
-            # Ejecutar función
-            result = f(*args, **kwargs)
-
-            # Guardar en cache
-            if redis_client:
+            if not local and not redis_client:
+                return f(*args, **kwargs)
+
+            cache_key = get_cache_key(key_prefix or f.__name__, *args, **kwargs)
+            if scope is not None:
+                suffix = _generation_suffix(redis_client, local, _scope_tags(f, scope, args, kwargs))
+                cache_key = f"{cache_key}:{suffix}"
+
+            if local:
+                cached = local.get(cache_key, _MISSING)
+                if cached is not _MISSING:
+                    return serve(cached, cache_key, args, kwargs)
+
+            with local.lock(cache_key) if local else nullcontext():
+                if local:
+                    # Otro thread pudo haberla calculado mientras esperábamos el lock
+                    cached = local.get(cache_key, _MISSING)
+                    if cached is not _MISSING:
+                        return serve(cached, cache_key, args, kwargs)
+
+                # Intentar obtener de Redis
+                owns_lock = False
+                if redis_client:
+                    entry = _read_redis(redis_client, cache_key)
+                    if entry is None:
+                        owns_lock = _acquire_lock(redis_client, cache_key, lock_timeout)
+                        if not owns_lock:
+                            # Otro proceso la está calculando: esperar su resultado
+                            _count("waits")
+                            entry = _wait_for_value(redis_client, cache_key, lock_timeout)
+                    if entry is not None:
+                        _count("hits")
+                        fresh_until, value, size = entry
+                        if local:
+                            _store_local(local, cache_key, fresh_until, value, size, timeout, stale_ttl)
+                        return serve((fresh_until, value), cache_key, args, kwargs)
+                    _count("misses")
+
+                # Ejecutar función
+                _record_lookup(hit=False)
                 try:
-                    redis_client.setex(cache_key, timeout, json.dumps(result, default=str))
-                except Exception:
-                    pass
+                    result = f(*args, **kwargs)
+                    _store(redis_client, local, cache_key, result, timeout, stale_ttl)
+                finally:
+                    if owns_lock:
+                        _release_lock(redis_client, cache_key)
 
-            return result
+                return result
 
         return decorated_function
 
     return decorator
 
 
+def invalidate_scopes(cartera_ids: Iterable[int] = (), gestor_ids: Iterable[int] = ()):
+    """
+    Vuelve obsoletas las entradas cacheadas que dependen de las carteras/gestores dados.
+
+    Incrementa el contador global y el de cada cartera y gestor (un INCR por scope, en un
+    solo round trip). Las entradas de otras carteras o gestores siguen vigentes.
+
+    Los contadores locales del proceso se incrementan siempre: sin Redis, el L1 de los
+    demás workers recién se entera al vencer su TTL (CACHE_L1_TTL).
+
+    Args:
+        cartera_ids: Carteras afectadas por la escritura
+        gestor_ids: Gestores afectados por la escritura
+    """
+    tags = {GLOBAL_SCOPE}
+    tags.update(f"cartera:{c}" for c in cartera_ids if c)
+    tags.update(f"gestor:{g}" for g in gestor_ids if g)
+
+    local = get_local_cache()
+    if local:
+        local.bump_generations(tags)
+
+    redis_client = get_redis_client()
+    if not redis_client:
+        return
+    generations = _get_generations()
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for tag in sorted(tags):
+            pipe.incr(f"{GENERATION_PREFIX}:{tag}")
+        pipe.execute()
+    except Exception as e:
+        record_redis_failure(e)
+        logger.warning(f"No se pudo invalidar cache para {sorted(tags)}: {e}")
+    finally:
+        # Este proceso ve su propia invalidación en la llamada siguiente
+        if generations:
+            generations.forget(tags)
+
+
 def invalidate_cache(pattern: str):
     """
     Invalida entradas de cache que coincidan con un patrón.
 
+    Recorre el keyspace con SCAN (no bloquea Redis como KEYS), pero sigue siendo
+    proporcional a la cantidad de claves: para escrituras usar invalidate_scopes().
+
     Args:
-        pattern: Patrón de búsqueda (ej: 'cache:dashboard:*')
+        pattern: Patrón de búsqueda (ej: 'cache:kpis:*')
     """
+    local = get_local_cache()
+    if local:
+        local.delete_matching(pattern)
+
     redis_client = get_redis_client()
     if redis_client:
         try:
-            keys = redis_client.keys(pattern)
-            if keys:
-                redis_client.delete(*keys)
-        except Exception:
-            pass
+            batch = []
+            for key in redis_client.scan_iter(match=pattern, count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                redis_client.unlink(*batch)
+        except Exception as e:
+            record_redis_failure(e)
+
+
+def _after_commit(session):
+    """Invalida los scopes acumulados por los flushes de la transacción confirmada."""
+    scopes = session.info.pop("cache_scopes", None)
+    if scopes:
+        invalidate_scopes(cartera_ids={c for c, _ in scopes}, gestor_ids={g for _, g in scopes})
+
+
+def _after_rollback(session):
+    session.info.pop("cache_scopes", None)
+
+
+def mark_scopes_dirty(session, scopes: Iterable[Tuple[int, int]]):
+    """
+    Registra (cartera_id, gestor_id) modificados en la transacción actual.
+
+    Se invalidan en Redis recién al confirmar (after_commit), así una transacción
+    revertida no descarta cache válido.
+    """
+    session.info.setdefault("cache_scopes", set()).update(scopes)
+
+
+def init_cache(app):
+    """Crea el tier L1 y registra la invalidación de cache dirigida por eventos de la sesión."""
+    if app.config.get("CACHE_L1_ENABLED", True):
+        app.extensions[LOCAL_CACHE_KEY] = LocalCache(
+            max_entries=int(app.config.get("CACHE_L1_MAX_ENTRIES", 2048)),
+            max_bytes=int(app.config.get("CACHE_L1_MAX_BYTES", 16 * 1024 * 1024)),
+            ttl=float(app.config.get("CACHE_L1_TTL", 30)),
+        )
+    app.extensions[GENERATIONS_KEY] = GenerationCache(float(app.config.get("CACHE_GENERATION_CHECK_INTERVAL", 2)))
+    app.extensions[STATS_KEY] = Counter(hits=0, misses=0, waits=0, stale=0, refreshes=0)
+
+    if not event.contains(db.session, "after_commit", _after_commit):
+        event.listen(db.session, "after_commit", _after_commit)
+        event.listen(db.session, "after_rollback", _after_rollback)
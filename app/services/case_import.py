@@ -0,0 +1,485 @@
+"""
+Motor de importación masiva de casos (CSV / XLSX / JSON).
+
+Lee las filas en streaming, las procesa de a chunks y por cada chunk:
+
+1. Parsea montos y fechas de toda la columna de una vez (con memo de valores repetidos).
+2. Busca los nro_cliente existentes con una sola query.
+3. Inserta los nuevos con un INSERT multi-fila (executemany) y, con on_conflict="update",
+   actualiza los existentes con un UPDATE por clave primaria en lote.
+4. Suma los cambios al rollup diario, recalcula el resumen (debtors) de los DNIs
+   tocados y hace commit (checkpoint): si la importación se corta, lo ya confirmado
+   queda y se puede retomar con start_row.
+
+La tabla cases no tiene unique sobre nro_cliente (hay datos históricos repetidos), así
+que los conflictos se resuelven con la búsqueda por chunk en lugar de ON CONFLICT.
+"""
+
+import csv
+import json
+import logging
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+
+from ..core.database import db
+from ..features.cases.models import Case
+from ..utils.exceptions import ValidationError
+from .cache import mark_scopes_dirty
+from .daily_stats import add_case_deltas
+from .debtors import refresh_debtors
+
+try:
+    import openpyxl
+
+    openpyxl_available = True
+except ImportError:
+    openpyxl_available = False
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "xlsx", "json")
+CONFLICT_MODES = ("skip", "update")
+
+# Columnas de Case que se pueden importar
+CASE_FIELDS = (
+    "nro_cliente",
+    "dni",
+    "name",
+    "lastname",
+    "total",
+    "monto_inicial",
+    "fecha_ultimo_pago",
+    "telefono",
+    "calle_nombre",
+    "calle_nro",
+    "localidad",
+    "cp",
+    "provincia",
+    "notes",
+    "cartera_id",
+    "status_id",
+    "assigned_to_id",
+)
+# Con on_conflict="update" se refrescan datos y montos, nunca cartera/estado/asignación
+UPDATABLE_FIELDS = (
+    "dni",
+    "name",
+    "lastname",
+    "total",
+    "monto_inicial",
+    "fecha_ultimo_pago",
+    "telefono",
+    "calle_nombre",
+    "calle_nro",
+    "localidad",
+    "cp",
+    "provincia",
+)
+
+# Encabezados alternativos habituales en las planillas de las carteras
+HEADER_ALIASES = {
+    "nombre": "name",
+    "nombres": "name",
+    "apellido": "lastname",
+    "apellidos": "lastname",
+    "nro cliente": "nro_cliente",
+    "nro_cliente": "nro_cliente",
+    "numero cliente": "nro_cliente",
+    "documento": "dni",
+    "deuda": "total",
+    "monto total": "total",
+    "monto inicial": "monto_inicial",
+    "fecha ultimo pago": "fecha_ultimo_pago",
+    "ultimo pago": "fecha_ultimo_pago",
+    "telefono": "telefono",
+    "calle": "calle_nombre",
+    "numero": "calle_nro",
+    "codigo postal": "cp",
+    "notas": "notes",
+}
+
+
+class ImportStats:
+    """Contadores y throughput de una importación."""
+
+    def __init__(self, start_row: int = 0):
+        self.start_row = start_row
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.chunks = 0
+        self.errors: List[str] = []
+        self.started_at = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def next_row(self) -> int:
+        """Fila desde la que retomar (las anteriores ya están confirmadas)."""
+        return self.start_row + self.rows
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "invalid": self.invalid,
+            "chunks": self.chunks,
+            "next_row": self.next_row,
+            "elapsed": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+    def __repr__(self):
+        return (
+            f"<ImportStats {self.rows} filas: {self.inserted} nuevas, {self.updated} actualizadas, "
+            f"{self.skipped} salteadas, {self.invalid} inválidas ({self.rows_per_second:.0f} filas/s)>"
+        )
+
+
+# --- Lectura ---------------------------------------------------------------------------
+
+
+def _normalize_header(header) -> str:
+    key = str(header or "").strip().lower().replace("º", "").replace(".", "")
+    for accented, plain in (("á", "a"), ("é", "e"), ("í", "i"), ("ó", "o"), ("ú", "u")):
+        key = key.replace(accented, plain)
+    return HEADER_ALIASES.get(key, key.replace(" ", "_"))
+
+
+def _detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext in IMPORT_FORMATS:
+        return ext
+    raise ValidationError(f"Formato de archivo no soportado: {ext or path}", field="format")
+
+
+def _read_csv(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(f, dialect)
+        headers = [_normalize_header(h) for h in next(reader, [])]
+        for values in reader:
+            if any(v.strip() for v in values):
+                yield dict(zip(headers, values))
+
+
+def _read_xlsx(path: str) -> Iterator[Dict[str, Any]]:
+    if not openpyxl_available:
+        raise ValidationError("Para importar XLSX se requiere openpyxl (pip install openpyxl)", field="format")
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [_normalize_header(h) for h in next(rows, ())]
+        for values in rows:
+            if any(v not in (None, "") for v in values):
+                yield dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+
+def _read_json(path: str) -> Iterator[Dict[str, Any]]:
+    # Lista de casos o export completo ({"cases": [...]}) de export_data_for_prod.py
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    rows = data.get("cases", []) if isinstance(data, dict) else data
+    for row in rows:
+        yield {_normalize_header(k): v for k, v in row.items()}
+
+
+def read_rows(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Itera las filas de un archivo como diccionarios con nombres de campo de Case.
+
+    CSV y XLSX se leen en streaming; JSON se carga completo (no hay parser incremental
+    entre las dependencias del proyecto).
+
+    Args:
+        path: Ruta del archivo
+        fmt: "csv", "xlsx" o "json" (None = por extensión)
+    """
+    fmt = fmt or _detect_format(path)
+    readers = {"csv": _read_csv, "xlsx": _read_xlsx, "json": _read_json}
+    if fmt not in readers:
+        raise ValidationError(f"Formato de archivo no soportado: {fmt}", field="format")
+    return readers[fmt](path)
+
+
+# --- Parseo por columna ----------------------------------------------------------------
+
+
+def parse_amount(value) -> Optional[Decimal]:
+    """Parsea un monto ("$ 400,000.00", "400.000,50", 1500.5, ...) a Decimal."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    cleaned = str(value).replace("$", "").replace(" ", "").strip()
+    if "," in cleaned and "." in cleaned:
+        # El separador que aparece último es el decimal
+        if cleaned.rfind(",") > cleaned.rfind("."):
+            cleaned = cleaned.replace(".", "").replace(",", ".")
+        else:
+            cleaned = cleaned.replace(",", "")
+    elif "," in cleaned:
+        parts = cleaned.split(",")
+        cleaned = parts[0] + "." + parts[1] if len(parts) == 2 and len(parts[1]) <= 2 else cleaned.replace(",", "")
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        return None
+
+
+def parse_date(value) -> Optional[date]:
+    """Parsea una fecha DD/MM/YYYY (o MM/DD/YYYY, ISO, date/datetime de XLSX)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in ("%d/%m/%Y", "%m/%d/%Y", "%Y-%m-%d", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).date()
+    except ValueError:
+        return None
+
+
+def _parse_column(values: List[Any], parser: Callable) -> List[Any]:
+    """Aplica un parser a una columna completa; los valores repetidos se parsean una vez."""
+    memo: Dict[Any, Any] = {}
+    result = []
+    for value in values:
+        try:
+            parsed = memo[value]
+        except KeyError:
+            parsed = memo[value] = parser(value)
+        except TypeError:  # valor no hasheable
+            parsed = parser(value)
+        result.append(parsed)
+    return result
+
+
+def _clean_text(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # XLSX devuelve 20737173.0 para un DNI numérico
+    text = str(value).strip()
+    return text or None
+
+
+def _parse_id(value) -> Optional[int]:
+    """Parsea un id entero ("3", 3, 3.0 de XLSX); None si no lo es."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _reject(stats: ImportStats, row_number: int, message: str) -> None:
+    stats.invalid += 1
+    if len(stats.errors) < 100:
+        stats.errors.append(f"Fila {row_number}: {message}")
+
+
+def _prepare_chunk(
+    raw: List[Dict[str, Any]], defaults: Dict[str, Any], stats: ImportStats
+) -> List[Tuple[Dict[str, Any], Tuple[str, ...]]]:
+    """
+    Convierte un chunk de filas crudas en filas de Case (descarta las inválidas).
+
+    Returns:
+        Pares (fila de Case, campos de UPDATABLE_FIELDS que trae el archivo): una
+        actualización solo escribe estos últimos, así una columna ausente no borra datos
+    """
+    totals = _parse_column([r.get("total") for r in raw], parse_amount)
+    iniciales = _parse_column([r.get("monto_inicial") for r in raw], parse_amount)
+    fechas = _parse_column([r.get("fecha_ultimo_pago") for r in raw], parse_date)
+
+    rows = []
+    for i, (r, total, inicial, fecha) in enumerate(zip(raw, totals, iniciales, fechas)):
+        if total is None and r.get("total") not in (None, ""):
+            _reject(stats, stats.next_row + i + 1, f"total inválido ({r['total']!r})")
+            continue
+        row = {f: _clean_text(r.get(f)) for f in CASE_FIELDS if f not in ("cartera_id", "status_id", "assigned_to_id")}
+        # Un caso nuevo sin monto se da de alta con total 0; uno existente conserva el suyo
+        row.update(total=total if total is not None else Decimal("0"), monto_inicial=inicial, fecha_ultimo_pago=fecha)
+        present = tuple(f for f in UPDATABLE_FIELDS if f in r and (f != "total" or total is not None))
+        invalid_ids = []
+        for fk in ("cartera_id", "status_id", "assigned_to_id"):
+            value = r.get(fk)
+            if value in (None, ""):
+                row[fk] = defaults.get(fk)
+                continue
+            row[fk] = _parse_id(value)
+            if row[fk] is None:
+                invalid_ids.append(f"{fk} no numérico ({value!r})")
+        if invalid_ids:
+            _reject(stats, stats.next_row + i + 1, ", ".join(invalid_ids))
+            continue
+        if not row["name"] or not row["lastname"] or not row["cartera_id"] or not row["status_id"]:
+            _reject(stats, stats.next_row + i + 1, "faltan nombre, apellido, cartera o estado")
+            continue
+        rows.append((row, present))
+    return rows
+
+
+# --- Escritura -------------------------------------------------------------------------
+
+
+def _write_chunk(rows: List[Tuple[Dict[str, Any], Tuple[str, ...]]], on_conflict: str, seen: set, stats: ImportStats) -> None:
+    """Inserta/actualiza un chunk y suma sus cambios al rollup, en la transacción actual."""
+    keys = {r["nro_cliente"] for r, _ in rows if r["nro_cliente"]}
+    existing = {}
+    if keys:
+        existing = {
+            r.nro_cliente: r
+            for r in db.session.execute(
+                select(
+                    Case.id,
+                    Case.nro_cliente,
+                    Case.dni,
+                    Case.created_at,
+                    Case.total,
+                    Case.cartera_id,
+                    Case.assigned_to_id,
+                    Case.status_id,
+                ).where(Case.nro_cliente.in_(keys))
+            )
+        }
+
+    now = datetime.utcnow()
+    inserts, updates, deltas, dnis, scopes = [], [], [], set(), set()
+    for row, present in rows:
+        key = row["nro_cliente"]
+        if key and key in seen:
+            # Repetido dentro del mismo archivo: vale la primera aparición
+            stats.skipped += 1
+            continue
+        if key:
+            seen.add(key)
+        current = existing.get(key) if key else None
+        if current is None:
+            inserts.append(dict(row, created_at=now, updated_at=now))
+            dnis.add(row["dni"])
+            deltas.append((now, row["cartera_id"], row["assigned_to_id"], row["status_id"], 1, row["total"]))
+        elif on_conflict == "update":
+            updates.append(dict({f: row[f] for f in present}, id=current.id, updated_at=now))
+            dnis.update((current.dni, row["dni"]) if "dni" in present else (current.dni,))
+            scopes.add((current.cartera_id, current.assigned_to_id))
+            delta = row["total"] - (current.total or 0) if "total" in present else 0
+            if delta:
+                deltas.append((current.created_at, current.cartera_id, current.assigned_to_id, current.status_id, 0, delta))
+        else:
+            stats.skipped += 1
+
+    if inserts:
+        db.session.execute(insert(Case.__table__), inserts)
+    if updates:
+        db.session.execute(update(Case), updates)
+    if deltas:
+        add_case_deltas(db.session, deltas)
+    if dnis:
+        refresh_debtors(db.session.connection(), dnis)
+    if scopes:
+        # Actualizaciones sin cambio de total no generan deltas, pero sí cambian los reportes
+        mark_scopes_dirty(db.session, scopes)
+    stats.inserted += len(inserts)
+    stats.updated += len(updates)
+
+
+def import_cases(
+    rows: Iterable[Dict[str, Any]],
+    cartera_id: Optional[int] = None,
+    status_id: Optional[int] = None,
+    assigned_to_id: Optional[int] = None,
+    on_conflict: str = "skip",
+    chunk_size: int = 1000,
+    start_row: int = 0,
+    on_chunk: Optional[Callable[[ImportStats], None]] = None,
+) -> ImportStats:
+    """
+    Importa casos en chunks, con un commit (checkpoint) por chunk.
+
+    Args:
+        rows: Filas con nombres de campo de Case (ver read_rows)
+        cartera_id: Cartera por defecto (las filas pueden traer la suya)
+        status_id: Estado por defecto
+        assigned_to_id: Gestor por defecto (None = sin asignar)
+        on_conflict: Si ya existe el nro_cliente: "skip" (dejarlo) o "update" (refrescar
+            los datos y montos que trae el archivo, sin tocar cartera/estado/asignación)
+        chunk_size: Filas por chunk/commit
+        start_row: Filas a saltear (para retomar desde el next_row de una corrida cortada)
+        on_chunk: Callback luego de cada commit, con las estadísticas acumuladas
+
+    Returns:
+        ImportStats
+
+    Raises:
+        ValidationError: Si los parámetros son inválidos
+    """
+    if on_conflict not in CONFLICT_MODES:
+        raise ValidationError(f"on_conflict debe ser uno de: {', '.join(CONFLICT_MODES)}", field="on_conflict")
+    if chunk_size < 1:
+        raise ValidationError("chunk_size debe ser mayor a 0", field="chunk_size")
+
+    defaults = {"cartera_id": cartera_id, "status_id": status_id, "assigned_to_id": assigned_to_id}
+    stats = ImportStats(start_row=start_row)
+    seen: set = set()
+    iterator = islice(iter(rows), start_row, None)
+
+    while True:
+        raw = list(islice(iterator, chunk_size))
+        if not raw:
+            break
+        try:
+            _write_chunk(_prepare_chunk(raw, defaults, stats), on_conflict, seen, stats)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.error(f"Importación cortada en el chunk que empieza en la fila {stats.next_row + 1}")
+            raise
+        stats.rows += len(raw)
+        stats.chunks += 1
+        if on_chunk:
+            on_chunk(stats)
+
+    logger.info(f"Importación de casos terminada: {stats!r}")
+    return stats
+
+
+def import_file(path: str, fmt: Optional[str] = None, **kwargs) -> ImportStats:
+    """Atajo: read_rows(path, fmt) + import_cases(**kwargs)."""
+    return import_cases(read_rows(path, fmt), **kwargs)
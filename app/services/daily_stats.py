@@ -0,0 +1,344 @@
+"""
+Mantenimiento del rollup diario (daily_stats) que alimenta los dashboards.
+
+Las escrituras ORM sobre cases, promises y activities se traducen en deltas que se
+aplican en la misma transacción (evento after_flush). Las operaciones masivas que no
+pasan por el ORM (query.update/delete, SQL directo) no se ven: las importaciones de
+casos informan sus cambios con add_case_deltas(); para el resto usar `flask daily-stats
+rebuild`. La migración que crea la tabla la carga con los datos existentes.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+import click
+from sqlalchemy import case, event, func, inspect, select
+
+from ..core.database import db
+from ..features.activities.models import Activity
+from ..features.cases.models import Case
+from ..features.cases.promise import Promise
+from ..features.stats.models import SIN_GESTOR, DailyStat
+from ..utils.sql import as_date, date_bucket, dialect_insert
+from .cache import mark_scopes_dirty
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("casos_count", "casos_total", "promesas_count", "promesas_cumplidas", "actividades_count")
+KEY_COLUMNS = ("fecha", "cartera_id", "gestor_id", "status_id")
+
+# Atributos de Case que definen la clave del rollup de sus promesas y actividades
+CASE_DIMS = ("cartera_id", "assigned_to_id", "status_id")
+CASE_TRACKED = ("created_at", "total") + CASE_DIMS
+PROMISE_TRACKED = ("case_id", "created_at", "status")
+ACTIVITY_TRACKED = ("case_id", "created_at")
+
+
+def _day(value) -> date:
+    """Fecha del rollup para un created_at (los pendientes de default usan hoy)."""
+    if value is None:
+        return datetime.utcnow().date()
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _old_value(obj, attr):
+    """Valor del atributo antes de los cambios de este flush."""
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+def _changed(obj, attrs) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+def _key(fecha, cartera_id, gestor_id, status_id) -> Tuple:
+    return (_day(fecha), cartera_id, gestor_id or SIN_GESTOR, status_id)
+
+
+class _Deltas:
+    """Acumula deltas de métricas por clave de rollup durante un flush."""
+
+    def __init__(self, session):
+        self.session = session
+        self.values: Dict[Tuple, Dict[str, object]] = defaultdict(lambda: defaultdict(int))
+        self._case_cache: Dict[int, Optional[Tuple]] = {}
+
+    def add(self, fecha, dims: Optional[Tuple], sign: int, **metrics):
+        if dims is None:
+            return
+        bucket = self.values[_key(fecha, *dims)]
+        for metric, value in metrics.items():
+            bucket[metric] += sign * value
+
+    def case_dims(self, case_id, old: bool = False) -> Optional[Tuple]:
+        """(cartera_id, assigned_to_id, status_id) del caso, antes o después del flush."""
+        if case_id is None:
+            return None
+        obj = self.session.identity_map.get(inspect(Case).identity_key_from_primary_key((case_id,)))
+        if obj is not None:
+            getter = _old_value if old else getattr
+            return tuple(getter(obj, a) for a in CASE_DIMS)
+        if case_id not in self._case_cache:
+            row = (
+                self.session.connection()
+                .execute(select(Case.cartera_id, Case.assigned_to_id, Case.status_id).where(Case.id == case_id))
+                .first()
+            )
+            self._case_cache[case_id] = tuple(row) if row else None
+        return self._case_cache[case_id]
+
+
+def _promise_metrics(status) -> Dict:
+    return {"promesas_count": 1, "promesas_cumplidas": 1 if status == "fulfilled" else 0}
+
+
+def _track_promise(deltas: _Deltas, promise, op: str):
+    if op in ("deleted", "dirty"):
+        old_case_id = _old_value(promise, "case_id")
+        deltas.add(
+            _old_value(promise, "created_at"),
+            deltas.case_dims(old_case_id, old=True),
+            -1,
+            **_promise_metrics(_old_value(promise, "status")),
+        )
+    if op in ("new", "dirty"):
+        deltas.add(promise.created_at, deltas.case_dims(promise.case_id), 1, **_promise_metrics(promise.status))
+
+
+def _track_activity(deltas: _Deltas, activity, op: str):
+    if op in ("deleted", "dirty"):
+        old_case_id = _old_value(activity, "case_id")
+        deltas.add(_old_value(activity, "created_at"), deltas.case_dims(old_case_id, old=True), -1, actividades_count=1)
+    if op in ("new", "dirty"):
+        deltas.add(activity.created_at, deltas.case_dims(activity.case_id), 1, actividades_count=1)
+
+
+def _track_case(deltas: _Deltas, case_obj, op: str, handled: Dict[type, set]):
+    old_dims = tuple(_old_value(case_obj, a) for a in CASE_DIMS)
+    new_dims = tuple(getattr(case_obj, a) for a in CASE_DIMS)
+
+    if op in ("deleted", "dirty"):
+        old_total = _old_value(case_obj, "total") or 0
+        deltas.add(_old_value(case_obj, "created_at"), old_dims, -1, casos_count=1, casos_total=old_total)
+    if op in ("new", "dirty"):
+        deltas.add(case_obj.created_at, new_dims, 1, casos_count=1, casos_total=case_obj.total or 0)
+
+    if op != "dirty" or old_dims == new_dims:
+        return
+
+    # Cambió cartera/gestor/estado: mover las promesas y actividades del caso que no
+    # participaron de este flush (las que sí, ya se contabilizaron arriba)
+    connection = deltas.session.connection()
+    promises = connection.execute(select(Promise.id, Promise.created_at, Promise.status).where(Promise.case_id == case_obj.id))
+    for promise_id, created_at, status in promises:
+        if promise_id in handled[Promise]:
+            continue
+        deltas.add(created_at, old_dims, -1, **_promise_metrics(status))
+        deltas.add(created_at, new_dims, 1, **_promise_metrics(status))
+
+    activities = connection.execute(select(Activity.id, Activity.created_at).where(Activity.case_id == case_obj.id))
+    for activity_id, created_at in activities:
+        if activity_id in handled[Activity]:
+            continue
+        deltas.add(created_at, old_dims, -1, actividades_count=1)
+        deltas.add(created_at, new_dims, 1, actividades_count=1)
+
+
+def _apply_deltas(connection, values: Dict[Tuple, Dict[str, object]]):
+    """Suma los deltas en daily_stats con un upsert por clave."""
+    table = DailyStat.__table__
+    for key, metrics in values.items():
+        metrics = {m: v for m, v in metrics.items() if v}
+        if not metrics:
+            continue
+        row = dict(zip(KEY_COLUMNS, key))
+        row.update({m: metrics.get(m, 0) for m in METRICS})
+
+        stmt = dialect_insert(table, connection.dialect.name)
+        if stmt is not None:
+            stmt = stmt.values(**row).on_conflict_do_update(
+                index_elements=list(KEY_COLUMNS),
+                set_={m: table.c[m] + stmt.excluded[m] for m in metrics},
+            )
+            connection.execute(stmt)
+            continue
+
+        where = [table.c[c] == row[c] for c in KEY_COLUMNS]
+        result = connection.execute(table.update().where(*where).values({m: table.c[m] + v for m, v in metrics.items()}))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+def _after_flush(session, flush_context):
+    """Traduce los cambios ORM del flush en deltas de daily_stats."""
+    tracked = (Case, Promise, Activity)
+    changes = [
+        (op, obj)
+        for op, objs in (("new", session.new), ("dirty", session.dirty), ("deleted", session.deleted))
+        for obj in objs
+        if isinstance(obj, tracked)
+    ]
+    if not changes:
+        return
+
+    deltas = _Deltas(session)
+    handled = {Promise: set(), Activity: set()}
+
+    # Primero promesas/actividades, para no moverlas dos veces si su caso cambió
+    for op, obj in changes:
+        if isinstance(obj, Promise) and (op != "dirty" or _changed(obj, PROMISE_TRACKED)):
+            _track_promise(deltas, obj, op)
+            handled[Promise].add(obj.id)
+        elif isinstance(obj, Activity) and (op != "dirty" or _changed(obj, ACTIVITY_TRACKED)):
+            _track_activity(deltas, obj, op)
+            handled[Activity].add(obj.id)
+
+    scopes = set()
+    for op, obj in changes:
+        if not isinstance(obj, Case):
+            continue
+        if op != "dirty" or _changed(obj, CASE_TRACKED):
+            _track_case(deltas, obj, op, handled)
+        # Los reportes cacheados leen también columnas fuera del rollup (dni, montos,
+        # fechas, nombre): cualquier cambio del caso invalida su cartera/gestor, antes y después
+        if op != "dirty" or session.is_modified(obj, include_collections=False):
+            scopes.add((obj.cartera_id, obj.assigned_to_id))
+            scopes.add((_old_value(obj, "cartera_id"), _old_value(obj, "assigned_to_id")))
+
+    _apply_deltas(session.connection(), deltas.values)
+
+    # Las entradas de cache de dashboards de estas carteras/gestores quedan obsoletas al commit
+    scopes.update((key[1], key[2]) for key, metrics in deltas.values.items() if any(metrics.values()))
+    mark_scopes_dirty(session, scopes)
+
+
+def add_case_deltas(session, deltas: Iterable[Tuple]):
+    """
+    Suma al rollup cambios de casos escritos sin el ORM (inserts/updates masivos), en la
+    transacción de la sesión, y marca sus scopes de cache como obsoletos.
+
+    Args:
+        session: Sesión cuya transacción escribió los casos
+        deltas: Tuplas (created_at, cartera_id, assigned_to_id, status_id, casos, monto)
+            con la variación de cantidad y monto de casos en esa clave
+    """
+    values: Dict[Tuple, Dict[str, object]] = defaultdict(lambda: defaultdict(int))
+    for created_at, cartera_id, gestor_id, status_id, count, total in deltas:
+        bucket = values[_key(created_at, cartera_id, gestor_id, status_id)]
+        bucket["casos_count"] += count
+        bucket["casos_total"] += total
+    _apply_deltas(session.connection(), values)
+    mark_scopes_dirty(session, {(key[1], key[2]) for key, metrics in values.items() if any(metrics.values())})
+
+
+def rebuild_daily_stats(start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """
+    Recalcula daily_stats desde cases, promises y activities.
+
+    Args:
+        start: Primer día a recalcular (None = desde el inicio)
+        end: Último día a recalcular, inclusive (None = hasta hoy)
+
+    Returns:
+        Cantidad de filas escritas
+    """
+
+    def _range(column):
+        filters = []
+        if start:
+            filters.append(column >= datetime(start.year, start.month, start.day))
+        if end:
+            filters.append(column < datetime(end.year, end.month, end.day) + timedelta(days=1))
+        return filters
+
+    gestor = func.coalesce(Case.assigned_to_id, SIN_GESTOR)
+    rows = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+
+    case_day = date_bucket(Case.created_at, "day")
+    for r in (
+        db.session.query(case_day, Case.cartera_id, gestor, Case.status_id, func.count(Case.id), func.sum(Case.total))
+        .filter(*_range(Case.created_at))
+        .group_by(case_day, Case.cartera_id, gestor, Case.status_id)
+    ):
+        metrics = rows[(as_date(r[0]), r[1], r[2], r[3])]
+        metrics["casos_count"] = r[4]
+        metrics["casos_total"] = r[5] or 0
+
+    promise_day = date_bucket(Promise.created_at, "day")
+    for r in (
+        db.session.query(
+            promise_day,
+            Case.cartera_id,
+            gestor,
+            Case.status_id,
+            func.count(Promise.id),
+            func.sum(case((Promise.status == "fulfilled", 1), else_=0)),
+        )
+        .join(Case, Promise.case_id == Case.id)
+        .filter(*_range(Promise.created_at))
+        .group_by(promise_day, Case.cartera_id, gestor, Case.status_id)
+    ):
+        metrics = rows[(as_date(r[0]), r[1], r[2], r[3])]
+        metrics["promesas_count"] = r[4]
+        metrics["promesas_cumplidas"] = r[5] or 0
+
+    activity_day = date_bucket(Activity.created_at, "day")
+    for r in (
+        db.session.query(activity_day, Case.cartera_id, gestor, Case.status_id, func.count(Activity.id))
+        .join(Case, Activity.case_id == Case.id)
+        .filter(*_range(Activity.created_at))
+        .group_by(activity_day, Case.cartera_id, gestor, Case.status_id)
+    ):
+        rows[(as_date(r[0]), r[1], r[2], r[3])]["actividades_count"] = r[4]
+
+    delete = DailyStat.query
+    if start:
+        delete = delete.filter(DailyStat.fecha >= start)
+    if end:
+        delete = delete.filter(DailyStat.fecha <= end)
+    delete.delete(synchronize_session=False)
+
+    if rows:
+        db.session.execute(
+            DailyStat.__table__.insert(), [{**dict(zip(KEY_COLUMNS, key)), **metrics} for key, metrics in rows.items()]
+        )
+    db.session.commit()
+
+    logger.info(f"daily_stats recalculado: {len(rows)} filas ({start or 'inicio'} - {end or 'hoy'})")
+    return len(rows)
+
+
+@click.group("daily-stats")
+def daily_stats_cli():
+    """Administra el rollup diario de los dashboards."""
+
+
+@daily_stats_cli.command("rebuild")
+@click.option("--start", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="Primer día (YYYY-MM-DD)")
+@click.option("--end", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="Último día (YYYY-MM-DD)")
+def rebuild_command(start, end):
+    """Recalcula daily_stats desde los datos crudos (backfill)."""
+    written = rebuild_daily_stats(start.date() if start else None, end.date() if end else None)
+    click.echo(f"daily_stats: {written} filas escritas")
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    """Listener vacío: con active_history=True el ORM conserva el valor previo."""
+    return value
+
+
+def init_daily_stats(app):
+    """Registra el mantenimiento incremental y el comando CLI en la app."""
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+        # Sin esto, asignar un atributo expirado (p.ej. tras commit) no registra el valor
+        # anterior en el historial y no se podría descontar de su clave original
+        for model, attrs in ((Case, CASE_TRACKED), (Promise, PROMISE_TRACKED), (Activity, ACTIVITY_TRACKED)):
+            for attr in attrs:
+                event.listen(getattr(model, attr), "set", _keep_old_value, active_history=True, retval=True)
+    app.cli.add_command(daily_stats_cli)
@@ -2,21 +2,85 @@
 Servicio para agregación de datos del dashboard.
 """
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Dict, List, Optional
-from sqlalchemy import func
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import String, and_, case, cast, false, func, literal, or_, select, union_all
 
 from ..core.database import db
 from ..features.cases.models import Case, CaseStatus
 from ..features.cases.promise import Promise
-from ..features.activities.models import Activity
+from ..features.cases.search import apply_search
 from ..features.users.models import User
 from ..features.carteras.models import Cartera
+from ..features.cases.serialization import project_cases
+from ..features.stats.models import DailyStat, Debtor
+from ..utils.exceptions import ValidationError
+from ..utils.pagination import decode_cursor, encode_cursor, parse_cursor_datetime
+from ..utils.sql import as_date, date_bucket
 from .cache import cache_result
+from .reference_data import get_reference_data
 
 
-@cache_result(timeout=300, key_prefix="kpis")
+def _case_filters(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cartera_id: Optional[int] = None,
+    gestor_id: Optional[int] = None,
+) -> List:
+    """Construye los criterios de filtro sobre cases comunes a los agregados del dashboard."""
+    filters = []
+    if start_date:
+        filters.append(Case.created_at >= start_date)
+    if end_date:
+        filters.append(Case.created_at <= end_date)
+    if cartera_id:
+        filters.append(Case.cartera_id == cartera_id)
+    if gestor_id:
+        filters.append(Case.assigned_to_id == gestor_id)
+    return filters
+
+
+def _con_arreglo_condition(status_column=Case.status_id):
+    """Condición SQL para el estado "Con Arreglo" sobre status_column (ID resuelto en memoria)."""
+    status_id = get_reference_data().status_id("Con Arreglo")
+    return status_column == status_id if status_id is not None else false()
+
+
+def _con_dni():
+    """Condición SQL para casos con DNI (un DNI vacío cuenta como sin DNI)."""
+    return and_(Case.dni.isnot(None), Case.dni != "")
+
+
+def _sin_dni():
+    """Condición SQL para casos sin DNI: NULL o cadena vacía."""
+    return or_(Case.dni.is_(None), Case.dni == "")
+
+
+def _when(condition, value):
+    """SUM condicional: value si se cumple condition (None = siempre), 0 si no."""
+    if condition is None:
+        return value
+    return case((condition, value), else_=0)
+
+
+def _stat_dims(cartera_id: Optional[int] = None, gestor_id: Optional[int] = None):
+    """Condición sobre las dimensiones de daily_stats (None si no hay filtros)."""
+    filters = []
+    if cartera_id:
+        filters.append(DailyStat.cartera_id == cartera_id)
+    if gestor_id:
+        filters.append(DailyStat.gestor_id == gestor_id)
+    return and_(*filters) if filters else None
+
+
+def _stat_con_arreglo(condition=None):
+    """Condición de filas "Con Arreglo" de daily_stats, combinada con condition."""
+    con_arreglo = _con_arreglo_condition(DailyStat.status_id)
+    return con_arreglo if condition is None else and_(condition, con_arreglo)
+
+
+@cache_result(timeout=300, key_prefix="kpis", scope=("cartera_id", "gestor_id"), stale_ttl=120)
 def get_kpis(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
@@ -26,159 +90,183 @@ def get_kpis(
     """
     Calcula los KPIs principales del dashboard.
 
+    Se responde con una sola consulta sobre el rollup daily_stats, por lo que el costo
+    no depende del tamaño del histórico. El rango de fechas se resuelve por días.
+
     Args:
         start_date: Fecha de inicio del período
         end_date: Fecha de fin del período
         cartera_id: Filtro por cartera (ID)
-        gestor_id: Filtro por gestor
+        gestor_id: Filtro por gestor (gestor asignado al caso)
 
     Returns:
         Diccionario con KPIs
     """
-    # Construir query base
-    query = Case.query
+    case_dims = _stat_dims(cartera_id, gestor_id)
+    # Las promesas solo se filtran por casos cuando hay gestor; las actividades con cualquier filtro
+    promise_dims = case_dims if gestor_id else None
+    activity_dims = case_dims if (cartera_id or gestor_id) else None
 
-    # Aplicar filtros
+    query = db.session.query(
+        func.sum(_when(case_dims, DailyStat.casos_count)).label("total_casos"),
+        func.sum(_when(case_dims, DailyStat.casos_total)).label("total_deuda"),
+        func.sum(_when(_stat_con_arreglo(case_dims), DailyStat.casos_count)).label("casos_pagados"),
+        func.sum(_when(_stat_con_arreglo(case_dims), DailyStat.casos_total)).label("monto_recuperado"),
+        func.sum(_when(promise_dims, DailyStat.promesas_count)).label("total_promesas"),
+        func.sum(_when(promise_dims, DailyStat.promesas_cumplidas)).label("promesas_cumplidas"),
+        func.sum(_when(activity_dims, DailyStat.actividades_count)).label("gestiones_realizadas"),
+    )
     if start_date:
-        query = query.filter(Case.created_at >= start_date)
+        query = query.filter(DailyStat.fecha >= start_date.date())
     if end_date:
-        query = query.filter(Case.created_at <= end_date)
-    if cartera_id:
-        query = query.filter(Case.cartera_id == cartera_id)
-    if gestor_id:
-        query = query.filter(Case.assigned_to_id == gestor_id)
-
-    # Monto total recuperado (casos con arreglo - estado "Con Arreglo")
-    # Buscar estado "Con Arreglo" por nombre
-    con_arreglo_status = CaseStatus.query.filter_by(nombre="Con Arreglo", activo=True).first()
-    if con_arreglo_status:
-        paid_cases = query.filter(Case.status_id == con_arreglo_status.id).all()
-    else:
-        paid_cases = []
-    monto_recuperado = sum(float(c.total) for c in paid_cases)
+        query = query.filter(DailyStat.fecha <= end_date.date())
+    row = query.one()
 
-    # Monto total de deuda
-    total_deuda = query.with_entities(func.sum(Case.total)).scalar() or Decimal("0")
-    total_deuda_float = float(total_deuda)
+    total_casos = int(row.total_casos or 0)
+    casos_pagados = int(row.casos_pagados or 0)
+    monto_recuperado = float(row.monto_recuperado or Decimal("0"))
+    total_deuda_float = float(row.total_deuda or Decimal("0"))
 
     # Tasa de recupero
     tasa_recupero = (monto_recuperado / total_deuda_float * 100) if total_deuda_float > 0 else 0.0
 
-    # Promesas cumplidas
-    promises_query = Promise.query
-    if start_date:
-        promises_query = promises_query.filter(Promise.created_at >= start_date)
-    if end_date:
-        promises_query = promises_query.filter(Promise.created_at <= end_date)
-    if gestor_id:
-        # Filtrar promesas de casos del gestor
-        case_ids = [c.id for c in query.filter(Case.assigned_to_id == gestor_id).all()]
-        if case_ids:
-            promises_query = promises_query.filter(Promise.case_id.in_(case_ids))
-        else:
-            promises_query = promises_query.filter(False)  # No hay casos, no hay promesas
-
-    total_promises = promises_query.count()
-    fulfilled_promises = promises_query.filter(Promise.status == "fulfilled").count()
+    total_promises = int(row.total_promesas or 0)
+    fulfilled_promises = int(row.promesas_cumplidas or 0)
     promesas_cumplidas_pct = (fulfilled_promises / total_promises * 100) if total_promises > 0 else 0.0
 
-    # Gestiones realizadas (actividades)
-    activities_query = Activity.query
-    if start_date:
-        activities_query = activities_query.filter(Activity.created_at >= start_date)
-    if end_date:
-        activities_query = activities_query.filter(Activity.created_at <= end_date)
-    if gestor_id:
-        activities_query = activities_query.filter(Activity.created_by_id == gestor_id)
-    if cartera_id or gestor_id:
-        # Filtrar por casos
-        case_ids = [c.id for c in query.all()]
-        if case_ids:
-            activities_query = activities_query.filter(Activity.case_id.in_(case_ids))
-        else:
-            activities_query = activities_query.filter(False)
-
-    gestiones_realizadas = activities_query.count()
-
     return {
         "monto_recuperado": round(monto_recuperado, 2),
         "tasa_recupero": round(tasa_recupero, 2),
         "promesas_cumplidas": round(promesas_cumplidas_pct, 2),
-        "gestiones_realizadas": gestiones_realizadas,
-        "total_casos": query.count(),
-        "casos_pagados": len(paid_cases),
+        "gestiones_realizadas": int(row.gestiones_realizadas or 0),
+        "total_casos": total_casos,
+        "casos_pagados": casos_pagados,
         "total_deuda": round(total_deuda_float, 2),
     }
 
 
-@cache_result(timeout=300, key_prefix="performance_chart")
+CHART_GRANULARITIES = ("day", "week", "month")
+
+
+def _bucket_starts(start_date: datetime, end_date: datetime, granularity: str) -> List[date]:
+    """Enumera los inicios de bucket que cubren [start_date, end_date)."""
+    current = start_date.date()
+    if granularity == "week":
+        current -= timedelta(days=current.weekday())
+    elif granularity == "month":
+        current = current.replace(day=1)
+
+    end = end_date.replace(tzinfo=None)
+    buckets = []
+    while datetime(current.year, current.month, current.day) < end:
+        buckets.append(current)
+        if granularity == "day":
+            current += timedelta(days=1)
+        elif granularity == "week":
+            current += timedelta(days=7)
+        else:
+            current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+    return buckets
+
+
+def _bucket_label(index: int, bucket: date, granularity: str) -> str:
+    """Etiqueta del eje X para un bucket."""
+    if granularity == "week":
+        return f"Sem {index + 1}"
+    if granularity == "month":
+        return bucket.strftime("%m/%Y")
+    return bucket.strftime("%d/%m")
+
+
+@cache_result(timeout=300, key_prefix="performance_chart", scope=("cartera_id",))
 def get_performance_chart_data(
-    start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, cartera_id: Optional[int] = None
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cartera_id: Optional[int] = None,
+    granularity: str = "week",
 ) -> Dict:
     """
-    Obtiene datos para el gráfico de rendimiento por semana y cartera.
+    Obtiene datos para el gráfico de rendimiento por período y cartera.
+
+    Los montos se agrupan en una sola consulta por cartera y bucket de fecha; los
+    buckets sin datos se completan con 0.
+
+    Args:
+        start_date: Fecha de inicio (default: últimas 4 semanas)
+        end_date: Fecha de fin (default: ahora)
+        cartera_id: Filtro por cartera (ID)
+        granularity: Tamaño del bucket: "day", "week" o "month"
 
     Returns:
         Diccionario con datos para Chart.js
+
+    Raises:
+        ValidationError: Si la granularidad no es válida
     """
+    if granularity not in CHART_GRANULARITIES:
+        raise ValidationError(f"Granularidad inválida: {granularity}", field="granularity")
     if not start_date:
         start_date = datetime.utcnow() - timedelta(days=28)  # Últimas 4 semanas
     if not end_date:
         end_date = datetime.utcnow()
 
-    # Dividir en semanas
-    weeks = []
-    current = start_date
-    while current < end_date:
-        week_end = min(current + timedelta(days=7), end_date)
-        weeks.append((current, week_end))
-        current = week_end
+    buckets = _bucket_starts(start_date, end_date, granularity)
 
     # Obtener todas las carteras activas desde la tabla carteras
-    carteras = Cartera.query.filter_by(activo=True).order_by(Cartera.nombre).limit(5).all()
+    carteras = get_reference_data().carteras()[:5]
+    if cartera_id:
+        carteras_visibles = [c for c in carteras if c.id == cartera_id]
+    else:
+        carteras_visibles = carteras
+
+    # Montos "Con Arreglo" por cartera y bucket en una sola consulta
+    totales = {}
+    if carteras_visibles:
+        bucket = date_bucket(Case.created_at, granularity).label("bucket")
+        rows = (
+            db.session.query(Case.cartera_id, bucket, func.sum(Case.total).label("total"))
+            .filter(
+                _con_arreglo_condition(),
+                Case.cartera_id.in_([c.id for c in carteras_visibles]),
+                Case.created_at >= start_date,
+                Case.created_at < end_date,
+            )
+            .group_by(Case.cartera_id, bucket)
+            .all()
+        )
+        for r in rows:
+            totales[(r.cartera_id, as_date(r.bucket))] = float(r.total or 0)
 
-    # Datos por semana y cartera
+    # Datos por bucket y cartera
     datasets = []
     colors = ["#667eea", "#764ba2", "#f093fb", "#4facfe", "#00f2fe"]
 
     for idx, cartera in enumerate(carteras):
         if cartera_id and cartera.id != cartera_id:
             continue
-        data = []
-        for week_start, week_end in weeks:
-            # Buscar estado "Con Arreglo" para casos pagados
-            con_arreglo_status = CaseStatus.query.filter_by(nombre="Con Arreglo", activo=True).first()
-            if con_arreglo_status:
-                query = Case.query.filter(
-                    Case.cartera_id == cartera.id,
-                    Case.created_at >= week_start,
-                    Case.created_at < week_end,
-                    Case.status_id == con_arreglo_status.id,
-                )
-            else:
-                query = Case.query.filter(False)  # No hay estado, no hay datos
-            total = query.with_entities(func.sum(Case.total)).scalar() or Decimal("0")
-            data.append(float(total))
-
+        data = [totales.get((cartera.id, b), 0.0) for b in buckets]
         datasets.append({"label": cartera.nombre, "data": data, "backgroundColor": colors[idx % len(colors)]})
 
-    labels = [f"Sem {i+1}" for i in range(len(weeks))]
+    labels = [_bucket_label(i, b, granularity) for i, b in enumerate(buckets)]
 
     return {"labels": labels, "datasets": datasets}
 
 
-@cache_result(timeout=600, key_prefix="cartera_distribution")
+@cache_result(timeout=600, key_prefix="cartera_distribution", scope=())
 def get_cartera_distribution() -> Dict:
     """
-    Obtiene distribución de casos por cartera.
+    Obtiene distribución de casos por cartera (desde el rollup daily_stats).
 
     Returns:
         Diccionario con datos para gráfico de dona
     """
-    result = db.session.query(
-        Cartera.nombre,
-        func.sum(Case.total).label("total")
-    ).join(Case, Cartera.id == Case.cartera_id).group_by(Cartera.id, Cartera.nombre).all()
+    result = (
+        db.session.query(Cartera.nombre, func.sum(DailyStat.casos_total).label("total"))
+        .join(DailyStat, Cartera.id == DailyStat.cartera_id)
+        .group_by(Cartera.id, Cartera.nombre)
+        .having(func.sum(DailyStat.casos_count) > 0)
+        .all()
+    )
 
     labels = [r[0] for r in result]
     data = [float(r[1]) for r in result]
@@ -188,147 +276,194 @@ def get_cartera_distribution() -> Dict:
     return {"labels": labels, "datasets": [{"data": data, "backgroundColor": colors[: len(labels)]}]}
 
 
-@cache_result(timeout=300, key_prefix="gestores_ranking")
-def get_gestores_ranking(limit: int = 10) -> List[Dict]:
+@cache_result(timeout=300, key_prefix="carteras_con_casos", scope=("gestor_id",))
+def get_carteras_con_casos(gestor_id: Optional[int] = None) -> List[int]:
+    """
+    Obtiene los ids de las carteras que tienen casos (desde el rollup daily_stats).
+
+    Args:
+        gestor_id: Solo carteras con casos asignados a este gestor
+
+    Returns:
+        Ids de cartera ordenados
+    """
+    query = db.session.query(DailyStat.cartera_id)
+    if gestor_id:
+        query = query.filter(DailyStat.gestor_id == gestor_id)
+    rows = query.group_by(DailyStat.cartera_id).having(func.sum(DailyStat.casos_count) > 0).order_by(DailyStat.cartera_id)
+    return [r[0] for r in rows]
+
+
+@cache_result(timeout=300, key_prefix="gestores_ranking", scope=("cartera_id",), stale_ttl=120)
+def get_gestores_ranking(
+    limit: int = 10,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cartera_id: Optional[int] = None,
+) -> List[Dict]:
     """
     Obtiene ranking de gestores por monto recuperado.
 
+    Todas las métricas se calculan en una sola consulta: los agregados de casos y de
+    promesas se agrupan por gestor en subconsultas y se unen a users.
+
     Args:
         limit: Número máximo de gestores a retornar
+        start_date: Fecha de inicio del período (creación del caso)
+        end_date: Fecha de fin del período (creación del caso)
+        cartera_id: Filtro por cartera (ID)
 
     Returns:
         Lista de gestores con sus métricas
     """
-    gestores = User.query.filter(User.role == "gestor", User.active.is_(True)).all()
+    case_filters = _case_filters(start_date, end_date, cartera_id)
+    con_arreglo = _con_arreglo_condition()
+
+    cases_agg = (
+        db.session.query(
+            Case.assigned_to_id.label("gestor_id"),
+            func.count(Case.id).label("total_casos"),
+            func.sum(case((con_arreglo, 1), else_=0)).label("casos_pagados"),
+            func.sum(case((con_arreglo, Case.total), else_=0)).label("monto_recuperado"),
+        )
+        .filter(Case.assigned_to_id.isnot(None), *case_filters)
+        .group_by(Case.assigned_to_id)
+        .subquery()
+    )
 
-    ranking = []
-    # Buscar estado "Con Arreglo" para casos pagados
-    con_arreglo_status = CaseStatus.query.filter_by(nombre="Con Arreglo", activo=True).first()
-    for gestor in gestores:
-        if con_arreglo_status:
-            cases = Case.query.filter(Case.assigned_to_id == gestor.id, Case.status_id == con_arreglo_status.id).all()
-        else:
-            cases = []
-
-        monto_recuperado = sum(float(c.total) for c in cases)
-        total_casos = Case.query.filter(Case.assigned_to_id == gestor.id).count()
-        casos_pagados = len(cases)
-
-        # Promesas cumplidas
-        case_ids = [c.id for c in Case.query.filter(Case.assigned_to_id == gestor.id).all()]
-        if case_ids:
-            total_promises = Promise.query.filter(Promise.case_id.in_(case_ids)).count()
-            fulfilled_promises = Promise.query.filter(Promise.case_id.in_(case_ids), Promise.status == "fulfilled").count()
-            promesas_cumplidas_pct = (fulfilled_promises / total_promises * 100) if total_promises > 0 else 0.0
-        else:
-            promesas_cumplidas_pct = 0.0
+    promises_query = (
+        db.session.query(
+            Case.assigned_to_id.label("gestor_id"),
+            func.count(Promise.id).label("total_promesas"),
+            func.sum(case((Promise.status == "fulfilled", 1), else_=0)).label("promesas_cumplidas"),
+        )
+        .select_from(Promise)
+        .join(Case, Promise.case_id == Case.id)
+        .filter(Case.assigned_to_id.isnot(None), *case_filters)
+    )
+    if start_date:
+        promises_query = promises_query.filter(Promise.created_at >= start_date)
+    if end_date:
+        promises_query = promises_query.filter(Promise.created_at <= end_date)
+    promises_agg = promises_query.group_by(Case.assigned_to_id).subquery()
+
+    monto_recuperado = func.coalesce(cases_agg.c.monto_recuperado, 0)
+    rows = (
+        db.session.query(
+            User.id,
+            User.username,
+            monto_recuperado.label("monto_recuperado"),
+            func.coalesce(cases_agg.c.total_casos, 0).label("total_casos"),
+            func.coalesce(cases_agg.c.casos_pagados, 0).label("casos_pagados"),
+            func.coalesce(promises_agg.c.total_promesas, 0).label("total_promesas"),
+            func.coalesce(promises_agg.c.promesas_cumplidas, 0).label("promesas_cumplidas"),
+        )
+        .outerjoin(cases_agg, cases_agg.c.gestor_id == User.id)
+        .outerjoin(promises_agg, promises_agg.c.gestor_id == User.id)
+        .filter(User.role == "gestor", User.active.is_(True))
+        .order_by(monto_recuperado.desc(), User.id)
+        .limit(limit)
+        .all()
+    )
 
+    ranking = []
+    for r in rows:
+        total_promises = int(r.total_promesas)
+        promesas_cumplidas_pct = (int(r.promesas_cumplidas) / total_promises * 100) if total_promises > 0 else 0.0
         ranking.append(
             {
-                "gestor_id": gestor.id,
-                "gestor_name": gestor.username,
-                "monto_recuperado": round(monto_recuperado, 2),
-                "total_casos": total_casos,
-                "casos_pagados": casos_pagados,
+                "gestor_id": r.id,
+                "gestor_name": r.username,
+                "monto_recuperado": round(float(r.monto_recuperado or 0), 2),
+                "total_casos": int(r.total_casos),
+                "casos_pagados": int(r.casos_pagados),
                 "promesas_cumplidas": round(promesas_cumplidas_pct, 2),
             }
         )
 
-    # Ordenar por monto recuperado
-    ranking.sort(key=lambda x: x["monto_recuperado"], reverse=True)
-
-    return ranking[:limit]
+    return ranking
 
 
 def get_cases_status_distribution() -> Dict:
     """
-    Obtiene distribución de casos por estado.
+    Obtiene distribución de casos por estado (desde el rollup daily_stats).
 
     Returns:
         Diccionario con conteos por estado
     """
-    # Obtener todos los estados activos
-    statuses = CaseStatus.query.filter_by(activo=True).all()
-    distribution = {}
-
-    for status in statuses:
-        count = Case.query.filter(Case.status_id == status.id).count()
-        distribution[status.nombre] = count
+    rows = (
+        db.session.query(CaseStatus.nombre, func.coalesce(func.sum(DailyStat.casos_count), 0))
+        .outerjoin(DailyStat, DailyStat.status_id == CaseStatus.id)
+        .filter(CaseStatus.activo.is_(True))
+        .group_by(CaseStatus.id, CaseStatus.nombre)
+        .all()
+    )
 
-    return distribution
+    return {nombre: int(count) for nombre, count in rows}
 
 
 def get_comparison_data() -> Dict:
     """
     Obtiene datos comparativos entre mes actual y anterior.
 
+    Ambos meses se calculan en una sola consulta sobre el rollup daily_stats.
+
     Returns:
         Diccionario con datos comparativos
     """
     now = datetime.utcnow()
-    current_month_start = datetime(now.year, now.month, 1)
+    current_month_start = date(now.year, now.month, 1)
     if now.month == 1:
-        previous_month_start = datetime(now.year - 1, 12, 1)
-        previous_month_end = datetime(now.year, 1, 1)
+        previous_month_start = date(now.year - 1, 12, 1)
     else:
-        previous_month_start = datetime(now.year, now.month - 1, 1)
-        previous_month_end = datetime(now.year, now.month, 1)
-
-    # Mes actual
-    con_arreglo_status = CaseStatus.query.filter_by(nombre="Con Arreglo", activo=True).first()
-    if con_arreglo_status:
-        current_cases = Case.query.filter(Case.created_at >= current_month_start, Case.status_id == con_arreglo_status.id).all()
-    else:
-        current_cases = []
-    current_monto = sum(float(c.total) for c in current_cases)
-
-    current_promises = Promise.query.filter(Promise.created_at >= current_month_start).all()
-    current_fulfilled = sum(1 for p in current_promises if p.status == "fulfilled")
-    current_promises_pct = (current_fulfilled / len(current_promises) * 100) if current_promises else 0.0
-
-    current_activities = Activity.query.filter(Activity.created_at >= current_month_start).count()
-
-    # Mes anterior
-    if con_arreglo_status:
-        previous_cases = Case.query.filter(
-            Case.created_at >= previous_month_start, Case.created_at < previous_month_end, Case.status_id == con_arreglo_status.id
-        ).all()
-    else:
-        previous_cases = []
-    previous_monto = sum(float(c.total) for c in previous_cases)
-
-    previous_promises = Promise.query.filter(
-        Promise.created_at >= previous_month_start, Promise.created_at < previous_month_end
-    ).all()
-    previous_fulfilled = sum(1 for p in previous_promises if p.status == "fulfilled")
-    previous_promises_pct = (previous_fulfilled / len(previous_promises) * 100) if previous_promises else 0.0
+        previous_month_start = date(now.year, now.month - 1, 1)
+
+    current = DailyStat.fecha >= current_month_start
+    previous = DailyStat.fecha < current_month_start
+
+    row = (
+        db.session.query(
+            func.sum(_when(_stat_con_arreglo(current), DailyStat.casos_total)).label("current_monto"),
+            func.sum(_when(current, DailyStat.promesas_count)).label("current_promesas"),
+            func.sum(_when(current, DailyStat.promesas_cumplidas)).label("current_cumplidas"),
+            func.sum(_when(current, DailyStat.actividades_count)).label("current_actividades"),
+            func.sum(_when(_stat_con_arreglo(previous), DailyStat.casos_total)).label("previous_monto"),
+            func.sum(_when(previous, DailyStat.promesas_count)).label("previous_promesas"),
+            func.sum(_when(previous, DailyStat.promesas_cumplidas)).label("previous_cumplidas"),
+            func.sum(_when(previous, DailyStat.actividades_count)).label("previous_actividades"),
+        )
+        .filter(DailyStat.fecha >= previous_month_start)
+        .one()
+    )
 
-    previous_activities = Activity.query.filter(
-        Activity.created_at >= previous_month_start, Activity.created_at < previous_month_end
-    ).count()
+    def _pct(fulfilled, total):
+        total = int(total or 0)
+        return (int(fulfilled or 0) / total * 100) if total > 0 else 0.0
 
     return {
         "current": {
-            "monto_recuperado": round(current_monto, 2),
-            "promesas_cumplidas": round(current_promises_pct, 2),
-            "gestiones_realizadas": current_activities,
+            "monto_recuperado": round(float(row.current_monto or 0), 2),
+            "promesas_cumplidas": round(_pct(row.current_cumplidas, row.current_promesas), 2),
+            "gestiones_realizadas": int(row.current_actividades or 0),
         },
         "previous": {
-            "monto_recuperado": round(previous_monto, 2),
-            "promesas_cumplidas": round(previous_promises_pct, 2),
-            "gestiones_realizadas": previous_activities,
+            "monto_recuperado": round(float(row.previous_monto or 0), 2),
+            "promesas_cumplidas": round(_pct(row.previous_cumplidas, row.previous_promesas), 2),
+            "gestiones_realizadas": int(row.previous_actividades or 0),
         },
     }
 
 
-@cache_result(timeout=600, key_prefix="clientes_multiples_deudas")
+@cache_result(timeout=600, key_prefix="clientes_multiples_deudas", scope=("cartera_id", "gestor_id"))
 def get_clientes_con_multiples_deudas(
     cartera_id: Optional[int] = None,
     gestor_id: Optional[int] = None,
 ) -> List[Dict]:
     """
-    Obtiene clientes (por DNI) que tienen más de una deuda usando SQL GROUP BY.
-    Optimizado para grandes volúmenes de datos.
+    Obtiene clientes (por DNI) que tienen más de una deuda.
+
+    Sin filtros se lee del resumen debtors (una fila por cliente). Con filtros se
+    cuentan solo las deudas de esa cartera/gestor, con GROUP BY sobre cases.
 
     Args:
         cartera_id: Filtro opcional por cartera
@@ -337,6 +472,21 @@ def get_clientes_con_multiples_deudas(
     Returns:
         Lista de diccionarios con información consolidada por DNI
     """
+    if not cartera_id and not gestor_id:
+        debtors = Debtor.query.filter(Debtor.total_deudas > 1).order_by(Debtor.deuda_consolidada.desc(), Debtor.dni)
+        return [
+            {
+                'dni': d.dni,
+                'total_deudas': d.total_deudas,
+                'deuda_consolidada': float(d.deuda_consolidada) if d.deuda_consolidada else 0.0,
+                'monto_inicial_total': float(d.monto_inicial_total) if d.monto_inicial_total else 0.0,
+                'fecha_mas_reciente': d.fecha_ultimo_pago.isoformat() if d.fecha_ultimo_pago else None,
+                'primera_deuda': d.primera_deuda.isoformat() if d.primera_deuda else None,
+                'ultima_deuda': d.ultima_deuda.isoformat() if d.ultima_deuda else None,
+            }
+            for d in debtors
+        ]
+
     # Construir query base con GROUP BY
     query = db.session.query(
         Case.dni,
@@ -347,7 +497,7 @@ def get_clientes_con_multiples_deudas(
         func.max(Case.created_at).label('ultima_deuda'),
         func.sum(Case.monto_inicial).label('monto_inicial_total'),
     ).filter(
-        Case.dni.isnot(None)  # Excluir casos sin DNI
+        _con_dni()  # Excluir casos sin DNI
     )
     
     # Aplicar filtros
@@ -379,6 +529,159 @@ def get_clientes_con_multiples_deudas(
     ]
 
 
+def _agrupados_filtros(cartera_id: Optional[int], gestor_id: Optional[int]) -> Tuple[Optional[object], List]:
+    """
+    Construye los criterios que seleccionan los grupos que cumplen los filtros.
+
+    Un grupo (DNI) califica si tiene al menos una deuda en la cartera y al menos una
+    deuda asignada al gestor (no necesariamente la misma). Los casos sin DNI forman
+    un grupo propio, por lo que el mismo caso debe cumplir ambos filtros.
+
+    Returns:
+        (SELECT de los DNIs que califican o None si no hay filtros,
+         condiciones sobre cases para los casos sin DNI)
+    """
+    condiciones = []
+    if cartera_id:
+        condiciones.append(Case.cartera_id == cartera_id)
+    if gestor_id:
+        condiciones.append(Case.assigned_to_id == gestor_id)
+
+    if not condiciones:
+        return None, []
+
+    # DNIs que cumplen los filtros (GROUP BY + HAVING sobre columnas indexadas)
+    dnis_query = db.session.query(Case.dni).filter(_con_dni(), or_(*condiciones)).group_by(Case.dni)
+    if len(condiciones) > 1:
+        dnis_query = dnis_query.having(
+            and_(*[func.sum(case((condicion, 1), else_=0)) > 0 for condicion in condiciones])
+        )
+
+    return dnis_query.subquery().select(), condiciones
+
+
+def _armar_grupos(claves: List[str], include_relations: bool = False) -> List[Dict]:
+    """
+    Trae todas las deudas de los grupos indicados y arma cada grupo con los datos del
+    cliente (de su deuda más reciente), sus deudas y los totales, en el orden de `claves`.
+    """
+    if not claves:
+        return []
+
+    # Traer solo las deudas de estos grupos (todas las deudas del cliente)
+    dnis = [clave for clave in claves if not clave.startswith("SIN-DNI-")]
+    sin_dni_ids = [int(clave[len("SIN-DNI-"):]) for clave in claves if clave.startswith("SIN-DNI-")]
+    deudas_filtro = []
+    if dnis:
+        deudas_filtro.append(Case.dni.in_(dnis))
+    if sin_dni_ids:
+        deudas_filtro.append(and_(_sin_dni(), Case.id.in_(sin_dni_ids)))
+    deudas = project_cases(
+        Case.query.filter(or_(*deudas_filtro)).order_by(Case.created_at.desc(), Case.id.desc()),
+        "grouped",
+        include_relations=include_relations,
+    )
+
+    grupos = dict.fromkeys(claves)
+
+    for deuda in deudas:
+        dni = deuda["dni"] or f"SIN-DNI-{deuda['id']}"
+
+        if grupos.get(dni) is None:
+            # Crear grupo con datos del cliente (de la deuda más reciente)
+            grupos[dni] = {
+                "dni": deuda["dni"],
+                "cliente": {
+                    "name": deuda["name"],
+                    "lastname": deuda["lastname"],
+                    "dni": deuda["dni"],
+                    "telefono": deuda["telefono"],
+                    "calle_nombre": deuda["calle_nombre"],
+                    "calle_nro": deuda["calle_nro"],
+                    "localidad": deuda["localidad"],
+                    "provincia": deuda["provincia"],
+                    "cp": deuda["cp"],
+                },
+                "deudas": [],
+                "total_deudas": 0,
+                "deuda_consolidada": 0.0,
+                "monto_inicial_total": 0.0,
+            }
+
+        grupos[dni]["deudas"].append(deuda)
+        grupos[dni]["total_deudas"] += 1
+        grupos[dni]["deuda_consolidada"] += deuda["total"]
+        grupos[dni]["monto_inicial_total"] += deuda["monto_inicial"] or 0.0
+
+    return [grupo for grupo in grupos.values() if grupo is not None]
+
+
+def paginate_casos_agrupados_por_dni(
+    cartera_id: Optional[int] = None,
+    gestor_id: Optional[int] = None,
+    include_relations: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Obtiene una página de casos agrupados por DNI resolviendo filtros y orden en SQL.
+
+    Primero se eligen las claves de grupo que cumplen los filtros (los clientes con
+    DNI desde el resumen debtors, sin agrupar cases) y luego se traen solo las deudas
+    de esos clientes. Los grupos se ordenan por su deuda más reciente (desc) y la
+    paginación es por cursor sobre (ultima_deuda, clave de grupo).
+
+    Args:
+        cartera_id: Filtro opcional por cartera (solo filtra qué grupos mostrar, no las deudas dentro)
+        gestor_id: Filtro opcional por gestor
+        include_relations: Si incluir relaciones (promises, activities)
+        limit: Cantidad máxima de grupos por página (None = todos)
+        cursor: Cursor opaco devuelto por la página anterior
+
+    Returns:
+        Tupla (grupos, next_cursor). next_cursor es None si no hay más páginas.
+
+    Raises:
+        ValidationError: Si el cursor es inválido
+    """
+    # Clientes con DNI: una fila por cliente en debtors; sin DNI: cada caso es un grupo
+    dnis, condiciones = _agrupados_filtros(cartera_id, gestor_id)
+    con_dni = select(Debtor.dni.label("group_key"), Debtor.ultima_deuda.label("ultima_deuda"))
+    if dnis is not None:
+        con_dni = con_dni.where(Debtor.dni.in_(dnis))
+    sin_dni = select(
+        (literal("SIN-DNI-") + cast(Case.id, String)).label("group_key"),
+        Case.created_at.label("ultima_deuda"),
+    ).where(_sin_dni(), *condiciones)
+    grupos = union_all(con_dni, sin_dni).subquery("grupos")
+    group_key, ultima_deuda = grupos.c.group_key, grupos.c.ultima_deuda
+
+    grupos_query = db.session.query(group_key, ultima_deuda)
+
+    after = decode_cursor(cursor, 2)
+    if after:
+        after_fecha = parse_cursor_datetime(after[0])
+        after_key = str(after[1])
+        grupos_query = grupos_query.filter(
+            or_(ultima_deuda < after_fecha, and_(ultima_deuda == after_fecha, group_key < after_key))
+        )
+
+    grupos_query = grupos_query.order_by(ultima_deuda.desc(), group_key.desc())
+    if limit:
+        grupos_query = grupos_query.limit(limit + 1)
+    pagina = grupos_query.all()
+
+    next_cursor = None
+    if limit and len(pagina) > limit:
+        pagina = pagina[:limit]
+        next_cursor = encode_cursor(pagina[-1].ultima_deuda, pagina[-1].group_key)
+
+    if not pagina:
+        return [], None
+
+    return _armar_grupos([r.group_key for r in pagina], include_relations), next_cursor
+
+
 def get_casos_agrupados_por_dni(
     cartera_id: Optional[int] = None,
     gestor_id: Optional[int] = None,
@@ -387,7 +690,7 @@ def get_casos_agrupados_por_dni(
     """
     Obtiene casos agrupados por DNI para el frontend.
     Cada grupo contiene los datos del cliente y todas sus deudas.
-    
+
     IMPORTANTE: Si se filtra por cartera_id, se muestran TODAS las deudas del cliente,
     pero solo se retornan grupos que tengan al menos una deuda en esa cartera.
 
@@ -399,80 +702,187 @@ def get_casos_agrupados_por_dni(
     Returns:
         Lista de grupos, cada uno con dni, cliente y deudas
     """
-    # Obtener TODOS los casos (sin filtrar por gestor ni cartera)
-    # Esto es necesario para agrupar TODAS las deudas de cada cliente
-    # Luego filtraremos qué grupos mostrar, pero mantendremos todas las deudas dentro de cada grupo
-    query = Case.query
-    todos_los_casos = query.order_by(Case.created_at.desc()).all()
-    
-    # Agrupar por DNI (incluyendo TODAS las deudas de cada cliente)
-    grupos = {}
-    for caso in todos_los_casos:
-        dni = caso.dni or f"SIN-DNI-{caso.id}"
-        
-        if dni not in grupos:
-            # Crear grupo nuevo con datos del cliente (del primer caso encontrado)
-            grupos[dni] = {
-                "dni": caso.dni,
-                "cliente": {
-                    "name": caso.name,
-                    "lastname": caso.lastname,
-                    "dni": caso.dni,
-                    "telefono": caso.telefono,
-                    "calle_nombre": caso.calle_nombre,
-                    "calle_nro": caso.calle_nro,
-                    "localidad": caso.localidad,
-                    "provincia": caso.provincia,
-                    "cp": caso.cp,
-                },
-                "deudas": [],
-                "total_deudas": 0,
-                "deuda_consolidada": 0.0,
-                "monto_inicial_total": 0.0,
-            }
-        
-        # Agregar esta deuda al grupo (TODAS las deudas, sin filtrar por cartera)
-        deuda_dict = caso.to_dict(include_relations=include_relations)
-        grupos[dni]["deudas"].append(deuda_dict)
-        
-        # Actualizar totales
-        grupos[dni]["total_deudas"] += 1
-        grupos[dni]["deuda_consolidada"] += float(caso.total) if caso.total else 0.0
-        grupos[dni]["monto_inicial_total"] += float(caso.monto_inicial) if caso.monto_inicial else 0.0
-    
-    # Ordenar deudas dentro de cada grupo por fecha (más reciente primero)
-    for grupo in grupos.values():
-        grupo["deudas"].sort(
-            key=lambda d: d.get("created_at") or d.get("id", 0) or "", 
-            reverse=True
+    grupos, _ = paginate_casos_agrupados_por_dni(
+        cartera_id=cartera_id, gestor_id=gestor_id, include_relations=include_relations
+    )
+    return grupos
+
+
+def iter_casos_agrupados_por_dni(
+    cartera_id: Optional[int] = None,
+    gestor_id: Optional[int] = None,
+    include_relations: bool = False,
+    page_size: int = 200,
+) -> Iterator[Dict]:
+    """
+    Recorre los grupos de get_casos_agrupados_por_dni() de a páginas, para respuestas
+    en streaming: en memoria queda solo la página actual.
+
+    Args:
+        cartera_id: Filtro opcional por cartera
+        gestor_id: Filtro opcional por gestor
+        include_relations: Si incluir relaciones (promises, activities)
+        page_size: Grupos por página (una consulta de grupos + una de deudas por página)
+
+    Yields:
+        Grupos con dni, cliente y deudas
+    """
+    cursor = None
+    while True:
+        grupos, cursor = paginate_casos_agrupados_por_dni(
+            cartera_id=cartera_id,
+            gestor_id=gestor_id,
+            include_relations=include_relations,
+            limit=page_size,
+            cursor=cursor,
         )
-    
-    # Aplicar filtros para determinar qué grupos mostrar
-    # Pero mantener TODAS las deudas dentro de cada grupo
-    grupos_filtrados = []
-    for grupo in grupos.values():
-        # Verificar si el grupo cumple con los filtros
-        cumple_filtros = True
-        
-        # Filtro por cartera: el grupo debe tener al menos una deuda en esa cartera
-        if cartera_id:
-            tiene_deuda_en_cartera = any(
-                deuda.get("cartera_id") == cartera_id 
-                for deuda in grupo["deudas"]
-            )
-            if not tiene_deuda_en_cartera:
-                cumple_filtros = False
-        
-        # Filtro por gestor: el grupo debe tener al menos una deuda asignada a ese gestor
-        if gestor_id and cumple_filtros:
-            tiene_deuda_asignada = any(
-                deuda.get("assigned_to_id") == gestor_id 
-                for deuda in grupo["deudas"]
-            )
-            if not tiene_deuda_asignada:
-                cumple_filtros = False
-        
-        if cumple_filtros:
-            grupos_filtrados.append(grupo)
-    
-    return grupos_filtrados
+        yield from grupos
+        if not cursor:
+            return
+
+
+WORKLIST_SORTS = ("reciente", "deuda", "nombre", "mora")
+
+
+def _fecha_limite_mora(meses: int, hoy: date) -> date:
+    """
+    Fecha de último pago a partir de la cual un caso tiene al menos `meses` de mora
+    (misma cuenta que calcularMesesMora() en gestor.js: meses calendario completos).
+    """
+    total = hoy.year * 12 + hoy.month - 1 - meses
+    year, month = divmod(total, 12)
+    month += 1
+    # Día acotado al último del mes (31/03 - 1 mes = 28 o 29/02)
+    siguiente = date(year + (month == 12), month % 12 + 1, 1)
+    return date(year, month, min(hoy.day, (siguiente - timedelta(days=1)).day))
+
+
+def _worklist_filtros(
+    gestor_id: Optional[int],
+    cartera_id: Optional[int],
+    status_id: Optional[int],
+    min_meses_mora: Optional[int],
+    max_meses_mora: Optional[int],
+    search: Optional[str],
+):
+    """
+    Construye el criterio que selecciona los casos de los grupos de la lista de trabajo.
+
+    Un grupo califica si tiene una deuda que cumple a la vez cartera, estado, meses de
+    mora y búsqueda, y (como en _agrupados_filtros) al menos una deuda asignada al
+    gestor. Un caso sin fecha de último pago cuenta como 0 meses de mora.
+    """
+    hoy = date.today()
+    condiciones = []
+    if cartera_id:
+        condiciones.append(Case.cartera_id == cartera_id)
+    if status_id:
+        condiciones.append(Case.status_id == status_id)
+    if min_meses_mora:
+        condiciones.append(Case.fecha_ultimo_pago <= _fecha_limite_mora(min_meses_mora, hoy))
+    if max_meses_mora is not None:
+        condiciones.append(
+            or_(Case.fecha_ultimo_pago.is_(None), Case.fecha_ultimo_pago > _fecha_limite_mora(max_meses_mora + 1, hoy))
+        )
+    asignado = [Case.assigned_to_id == gestor_id] if gestor_id else []
+
+    if not condiciones and not asignado and not search:
+        return None
+
+    # DNIs con una deuda que cumple los filtros (y con una deuda del gestor)
+    dnis_query, _ = apply_search(db.session.query(Case.dni).filter(_con_dni(), *condiciones), search)
+    criterio_dni = Case.dni.in_(dnis_query.subquery().select())
+    if asignado:
+        gestor_dnis = db.session.query(Case.dni).filter(_con_dni(), *asignado)
+        criterio_dni = and_(criterio_dni, Case.dni.in_(gestor_dnis.subquery().select()))
+
+    # Casos sin DNI: cada uno es su propio grupo, el mismo caso cumple todo
+    sin_dni_query, _ = apply_search(
+        db.session.query(Case.id).filter(_sin_dni(), *condiciones, *asignado), search
+    )
+
+    return or_(criterio_dni, Case.id.in_(sin_dni_query.subquery().select()))
+
+
+def get_gestor_worklist(
+    gestor_id: Optional[int] = None,
+    cartera_id: Optional[int] = None,
+    status_id: Optional[int] = None,
+    search: Optional[str] = None,
+    min_deuda: Optional[Decimal] = None,
+    max_deuda: Optional[Decimal] = None,
+    min_meses_mora: Optional[int] = None,
+    max_meses_mora: Optional[int] = None,
+    sort: str = "reciente",
+    descending: bool = True,
+    page: int = 1,
+    per_page: int = 50,
+    include_relations: bool = False,
+) -> Tuple[List[Dict], int]:
+    """
+    Obtiene una página de la lista de trabajo del gestor (clientes agrupados por DNI)
+    con filtros, búsqueda y orden resueltos en SQL.
+
+    Los filtros de cartera, estado, mora y búsqueda eligen qué grupos mostrar; el rango
+    de deuda se aplica sobre la deuda consolidada del grupo (todas sus deudas). Como en
+    paginate_casos_agrupados_por_dni, cada grupo trae todas las deudas del cliente.
+
+    Args:
+        gestor_id: Filtro opcional por gestor
+        cartera_id: Filtro opcional por cartera
+        status_id: Filtro opcional por estado
+        search: Nombre y/o apellido, DNI o nro de cliente (índice de búsqueda)
+        min_deuda: Deuda consolidada mínima
+        max_deuda: Deuda consolidada máxima
+        min_meses_mora: Meses de mora mínimos (desde fecha_ultimo_pago)
+        max_meses_mora: Meses de mora máximos
+        sort: "reciente" (deuda más reciente), "deuda" (consolidada), "nombre" o "mora"
+        descending: Orden descendente
+        page: Página (desde 1)
+        per_page: Grupos por página
+        include_relations: Si incluir relaciones (promises, activities)
+
+    Returns:
+        Tupla (grupos de la página, total de grupos que cumplen los filtros)
+
+    Raises:
+        ValidationError: Si el orden o los rangos son inválidos
+    """
+    if sort not in WORKLIST_SORTS:
+        raise ValidationError(f"sort debe ser uno de: {', '.join(WORKLIST_SORTS)}", field="sort")
+    if min_deuda is not None and max_deuda is not None and min_deuda > max_deuda:
+        raise ValidationError("min_deuda no puede ser mayor a max_deuda", field="min_deuda")
+    if min_meses_mora is not None and max_meses_mora is not None and min_meses_mora > max_meses_mora:
+        raise ValidationError("min_meses_mora no puede ser mayor a max_meses_mora", field="min_meses_mora")
+
+    group_key = func.coalesce(func.nullif(Case.dni, ""), literal("SIN-DNI-") + cast(Case.id, String)).label("group_key")
+    deuda_consolidada = func.sum(Case.total)
+
+    grupos_query = db.session.query(group_key)
+    criterio = _worklist_filtros(gestor_id, cartera_id, status_id, min_meses_mora, max_meses_mora, search)
+    if criterio is not None:
+        grupos_query = grupos_query.filter(criterio)
+    grupos_query = grupos_query.group_by(group_key)
+    if min_deuda is not None:
+        grupos_query = grupos_query.having(deuda_consolidada >= min_deuda)
+    if max_deuda is not None:
+        grupos_query = grupos_query.having(deuda_consolidada <= max_deuda)
+
+    total = db.session.query(func.count()).select_from(grupos_query.subquery()).scalar()
+
+    if sort == "mora":
+        # Más mora = último pago más viejo; sin fecha de pago cuenta como 0 meses
+        ultimo_pago = func.min(Case.fecha_ultimo_pago)
+        con_pago = case((ultimo_pago.is_(None), 0), else_=1)
+        orden = [con_pago.desc(), ultimo_pago.asc()] if descending else [con_pago.asc(), ultimo_pago.desc()]
+    else:
+        columnas = {
+            "reciente": [func.max(Case.created_at)],
+            "deuda": [deuda_consolidada],
+            "nombre": [func.min(func.lower(Case.lastname)), func.min(func.lower(Case.name))],
+        }[sort]
+        orden = [columna.desc() if descending else columna.asc() for columna in columnas]
+    orden.append(group_key.desc() if descending else group_key.asc())
+
+    pagina = grupos_query.order_by(*orden).limit(per_page).offset((page - 1) * per_page).all()
+    return _armar_grupos([r.group_key for r in pagina], include_relations), total
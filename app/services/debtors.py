@@ -0,0 +1,206 @@
+"""
+Mantenimiento del resumen por cliente (tabla debtors, una fila por DNI).
+
+Cada flush ORM que crea, modifica o elimina casos recalcula, en la misma transacción,
+las filas de los DNIs tocados (el anterior y el nuevo si cambió el DNI). Se recalcula
+desde cases en lugar de sumar deltas porque las carteras, los gestores y las fechas
+no son aditivos; antes de leer se toma el lock de la fila del DNI, así dos
+transacciones sobre el mismo cliente se serializan y la segunda ve la primera.
+
+Las escrituras que no pasan por el ORM informan sus DNIs con refresh_debtors() (las
+importaciones de casos lo hacen); para el resto usar `flask debtors rebuild`. La
+migración que crea la tabla la carga con los datos existentes.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+import click
+from sqlalchemy import bindparam, event, func, inspect, select
+
+from ..core.database import db
+from ..features.cases.models import Case
+from ..features.stats.models import Debtor
+from ..utils.sql import dialect_insert
+from .daily_stats import _keep_old_value, _old_value
+
+logger = logging.getLogger(__name__)
+
+# Atributos de Case que cambian el resumen de su DNI
+CASE_TRACKED = ("dni", "total", "monto_inicial", "fecha_ultimo_pago", "created_at", "cartera_id", "assigned_to_id")
+SUMMARY_COLUMNS = (
+    "total_deudas",
+    "deuda_consolidada",
+    "monto_inicial_total",
+    "fecha_ultimo_pago",
+    "primera_deuda",
+    "ultima_deuda",
+    "cartera_ids",
+    "gestor_ids",
+    "updated_at",
+)
+CHUNK_SIZE = 500
+
+
+def _summaries(connection, dnis: List[str]) -> Dict[str, Dict]:
+    """Calcula el resumen de cada DNI desde cases (los DNIs sin casos no aparecen)."""
+    now = datetime.utcnow()
+    summaries = {}
+    aggregates = connection.execute(
+        select(
+            Case.dni,
+            func.count(Case.id),
+            func.sum(Case.total),
+            func.sum(Case.monto_inicial),
+            func.max(Case.fecha_ultimo_pago),
+            func.min(Case.created_at),
+            func.max(Case.created_at),
+        )
+        .where(Case.dni.in_(dnis))
+        .group_by(Case.dni)
+    )
+    for dni, count, total, inicial, ultimo_pago, primera, ultima in aggregates:
+        summaries[dni] = {
+            "total_deudas": count,
+            "deuda_consolidada": total or 0,
+            "monto_inicial_total": inicial or 0,
+            "fecha_ultimo_pago": ultimo_pago,
+            "primera_deuda": primera,
+            "ultima_deuda": ultima,
+            "cartera_ids": set(),
+            "gestor_ids": set(),
+            "updated_at": now,
+        }
+
+    dims = connection.execute(select(Case.dni, Case.cartera_id, Case.assigned_to_id).where(Case.dni.in_(dnis)).distinct())
+    for dni, cartera_id, gestor_id in dims:
+        if dni in summaries:
+            summaries[dni]["cartera_ids"].add(cartera_id)
+            if gestor_id is not None:
+                summaries[dni]["gestor_ids"].add(gestor_id)
+    for summary in summaries.values():
+        summary["cartera_ids"] = sorted(summary["cartera_ids"])
+        summary["gestor_ids"] = sorted(summary["gestor_ids"])
+    return summaries
+
+
+def _lock_rows(connection, dnis: List[str]) -> bool:
+    """
+    Crea (vacía) o bloquea la fila de cada DNI con un upsert, en orden para no
+    generar deadlocks. Devuelve False si el dialecto no soporta upsert.
+    """
+    stmt = dialect_insert(Debtor.__table__, connection.dialect.name)
+    if stmt is None:
+        return False
+    stmt = stmt.values(
+        [
+            {
+                "dni": dni,
+                "total_deudas": 0,
+                "deuda_consolidada": 0,
+                "monto_inicial_total": 0,
+                "cartera_ids": [],
+                "gestor_ids": [],
+            }
+            for dni in dnis
+        ]
+    )
+    connection.execute(stmt.on_conflict_do_update(index_elements=["dni"], set_={"dni": stmt.excluded.dni}))
+    return True
+
+
+def refresh_debtors(connection, dnis: Iterable[str]) -> int:
+    """
+    Recalcula las filas de debtors de los DNIs indicados en la transacción de la conexión.
+
+    Args:
+        connection: Conexión de la transacción que escribió los casos
+        dnis: DNIs a recalcular (los vacíos se ignoran)
+
+    Returns:
+        Cantidad de DNIs con casos (filas escritas)
+    """
+    table = Debtor.__table__
+    dnis = sorted({dni for dni in dnis if dni})
+    written = 0
+    for start in range(0, len(dnis), CHUNK_SIZE):
+        chunk = dnis[start : start + CHUNK_SIZE]
+        locked = _lock_rows(connection, chunk)
+        summaries = _summaries(connection, chunk)
+
+        missing = [dni for dni in chunk if dni not in summaries]
+        if missing:
+            connection.execute(table.delete().where(table.c.dni.in_(missing)))
+        if not summaries:
+            continue
+
+        if locked:
+            connection.execute(
+                table.update()
+                .where(table.c.dni == bindparam("b_dni"))
+                .values({column: bindparam(column) for column in SUMMARY_COLUMNS}),
+                [{"b_dni": dni, **summary} for dni, summary in summaries.items()],
+            )
+        else:
+            connection.execute(table.delete().where(table.c.dni.in_(list(summaries))))
+            connection.execute(table.insert(), [{"dni": dni, **summary} for dni, summary in summaries.items()])
+        written += len(summaries)
+    return written
+
+
+def _after_flush(session, flush_context):
+    """Recalcula los resúmenes de los DNIs de los casos escritos en el flush."""
+    dnis = set()
+    for op, objs in (("new", session.new), ("dirty", session.dirty), ("deleted", session.deleted)):
+        for obj in objs:
+            if not isinstance(obj, Case):
+                continue
+            if op == "dirty":
+                state = inspect(obj)
+                if not any(state.attrs[a].history.has_changes() for a in CASE_TRACKED):
+                    continue
+            if op != "new":
+                dnis.add(_old_value(obj, "dni"))
+            if op != "deleted":
+                dnis.add(obj.dni)
+    if dnis - {None, ""}:
+        refresh_debtors(session.connection(), dnis)
+
+
+def rebuild_debtors() -> int:
+    """
+    Recalcula la tabla debtors completa desde cases.
+
+    Returns:
+        Cantidad de filas escritas
+    """
+    connection = db.session.connection()
+    connection.execute(Debtor.__table__.delete())
+    dnis = [row[0] for row in connection.execute(select(Case.dni).where(Case.dni.isnot(None)).distinct())]
+    written = refresh_debtors(connection, dnis)
+    db.session.commit()
+
+    logger.info(f"debtors recalculado: {written} clientes")
+    return written
+
+
+@click.group("debtors")
+def debtors_cli():
+    """Administra el resumen de deudas por cliente (DNI)."""
+
+
+@debtors_cli.command("rebuild")
+def rebuild_command():
+    """Recalcula la tabla debtors desde los casos (backfill)."""
+    written = rebuild_debtors()
+    click.echo(f"debtors: {written} clientes")
+
+
+def init_debtors(app):
+    """Registra el mantenimiento del resumen por cliente y el comando CLI en la app."""
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+        # Historial del DNI anterior aunque el atributo estuviera expirado (ver daily_stats)
+        event.listen(Case.dni, "set", _keep_old_value, active_history=True, retval=True)
+    app.cli.add_command(debtors_cli)
@@ -0,0 +1,265 @@
+"""
+Cola persistente de emails salientes (outbox) con envío en segundo plano.
+
+El request solo inserta el email en `email_outbox` y responde; un thread por proceso
+(OutboxSender) toma los pendientes y los envía por SMTP, con reintentos y backoff
+exponencial. Como la cola está en la base, un email no se pierde si el proceso muere.
+
+Varios workers de gunicorn pueden procesar la misma cola: cada email se reclama con un
+UPDATE condicional (solo gana un proceso) que además le pone un "lease"; si el proceso
+muere a mitad del envío, al vencer el lease otro lo vuelve a tomar.
+"""
+
+import logging
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+import click
+from flask import current_app
+from sqlalchemy import update
+
+from ..core.database import db
+from ..features.contact.models import OutboundEmail
+from ..utils.exceptions import AppError, StorageError
+from .email_service import send_many
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "email_outbox"
+
+
+def enqueue_email(
+    recipients: Iterable[str],
+    subject: str,
+    body_text: str,
+    body_html: Optional[str] = None,
+    reply_to: Optional[str] = None,
+) -> OutboundEmail:
+    """
+    Encola un email para envío asíncrono y despierta al sender.
+
+    Args:
+        recipients: Destinatarios
+        subject: Asunto
+        body_text: Cuerpo en texto plano
+        body_html: Cuerpo en HTML (opcional)
+        reply_to: Email para Reply-To (opcional)
+
+    Returns:
+        El email encolado
+
+    Raises:
+        StorageError: Si falla la escritura en la base
+    """
+    email = OutboundEmail(
+        recipients=",".join(recipients),
+        subject=subject[:300],
+        body_text=body_text,
+        body_html=body_html,
+        reply_to=reply_to,
+        status=OutboundEmail.PENDING,
+        next_attempt_at=datetime.utcnow(),
+    )
+    try:
+        db.session.add(email)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error encolando email: {e}", exc_info=True)
+        raise StorageError("Error al encolar email", operation="enqueue", details={"error": str(e)})
+
+    sender = current_app.extensions.get(EXTENSION_KEY)
+    if sender:
+        sender.wake()
+    return email
+
+
+def retry_delay(attempts: int, cfg) -> float:
+    """Segundos hasta el próximo intento: base * 2^(intentos-1), con tope y jitter de ±10%."""
+    delay = min(cfg["MAIL_OUTBOX_BACKOFF_BASE"] * 2 ** max(attempts - 1, 0), cfg["MAIL_OUTBOX_BACKOFF_MAX"])
+    return delay * random.uniform(0.9, 1.1)
+
+
+def _claim(email_id: int, now: datetime, lease: float) -> bool:
+    """Marca el email como "sending" si nadie lo tomó antes (UPDATE condicional)."""
+    result = db.session.execute(
+        update(OutboundEmail)
+        .where(
+            OutboundEmail.id == email_id,
+            OutboundEmail.status.in_((OutboundEmail.PENDING, OutboundEmail.SENDING)),
+            OutboundEmail.next_attempt_at <= now,
+        )
+        .values(
+            status=OutboundEmail.SENDING,
+            attempts=OutboundEmail.attempts + 1,
+            next_attempt_at=now + timedelta(seconds=lease),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def process_outbox(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Envía los emails vencidos de la cola (una pasada).
+
+    Toma los pendientes cuyo próximo intento ya llegó (y los "sending" con el lease
+    vencido), los reclama de a uno y los envía en lote por una sesión SMTP reutilizada.
+    Los que fallan vuelven a "pending" con backoff; al agotar MAIL_OUTBOX_MAX_ATTEMPTS
+    quedan en "failed".
+
+    Sin credenciales SMTP no se envía nada: los emails siguen en la cola (se informan en
+    "held" y en la métrica email_outbox_queue) y cada pasada lo advierte en el log.
+
+    Returns:
+        Contadores de la pasada: sent, retried, failed, held
+    """
+    cfg = current_app.config
+    stats = {"sent": 0, "retried": 0, "failed": 0, "held": 0}
+    if not cfg.get("MAIL_USERNAME") or not cfg.get("MAIL_PASSWORD"):
+        stats["held"] = (
+            db.session.query(OutboundEmail.id)
+            .filter(OutboundEmail.status.in_((OutboundEmail.PENDING, OutboundEmail.SENDING)))
+            .count()
+        )
+        logger.warning(f"MAIL_USERNAME/MAIL_PASSWORD no configurados: {stats['held']} emails esperan en la cola sin enviarse")
+        return stats
+
+    now = datetime.utcnow()
+    due_ids = [
+        row.id
+        for row in db.session.query(OutboundEmail.id)
+        .filter(
+            OutboundEmail.status.in_((OutboundEmail.PENDING, OutboundEmail.SENDING)),
+            OutboundEmail.next_attempt_at <= now,
+        )
+        .order_by(OutboundEmail.next_attempt_at, OutboundEmail.id)
+        .limit(batch_size or cfg["MAIL_OUTBOX_BATCH_SIZE"])
+    ]
+
+    claimed = [email_id for email_id in due_ids if _claim(email_id, now, cfg["MAIL_OUTBOX_LEASE"])]
+    if not claimed:
+        return stats
+    emails = db.session.query(OutboundEmail).filter(OutboundEmail.id.in_(claimed)).order_by(OutboundEmail.id).all()
+
+    # Todo el lote sale por una misma sesión SMTP del pool
+    try:
+        results = send_many(
+            {
+                "recipients": email.recipient_list,
+                "subject": email.subject,
+                "body_text": email.body_text,
+                "body_html": email.body_html,
+                "reply_to": email.reply_to,
+            }
+            for email in emails
+        )
+    except AppError as e:
+        results = [e] * len(emails)
+
+    for email, error in zip(emails, results):
+        if error is None:
+            email.status = OutboundEmail.SENT
+            email.sent_at = datetime.utcnow()
+            email.last_error = None
+            stats["sent"] += 1
+            continue
+        email.last_error = f"{error.message}: {error.details}" if error.details else error.message
+        if email.attempts >= cfg["MAIL_OUTBOX_MAX_ATTEMPTS"]:
+            email.status = OutboundEmail.FAILED
+            stats["failed"] += 1
+            logger.error(f"Email {email.id} descartado tras {email.attempts} intentos: {email.last_error}")
+        else:
+            email.status = OutboundEmail.PENDING
+            email.next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_delay(email.attempts, cfg))
+            stats["retried"] += 1
+            logger.warning(f"Email {email.id} falló (intento {email.attempts}), se reintenta: {email.last_error}")
+    db.session.commit()
+
+    return stats
+
+
+class OutboxSender:
+    """
+    Thread del proceso que vacía la cola: se despierta al encolar un email y, además,
+    cada MAIL_OUTBOX_POLL_INTERVAL segundos para los reintentos y lo que encolaron
+    otros procesos.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+
+    def ensure_started(self):
+        """Arranca el thread si no corre en este proceso (los threads no sobreviven al fork)."""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wakeup = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self.ensure_started()
+        self._wakeup.set()
+
+    def _run(self):
+        interval = self.app.config["MAIL_OUTBOX_POLL_INTERVAL"]
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    try:
+                        process_outbox()
+                    finally:
+                        db.session.remove()
+            except Exception:
+                logger.exception("Error procesando la cola de emails")
+
+
+@click.group("email-outbox")
+def email_outbox_cli():
+    """Administra la cola de emails salientes."""
+
+
+@email_outbox_cli.command("process")
+def process_command():
+    """Envía ahora los emails pendientes vencidos (una pasada)."""
+    stats = process_outbox()
+    click.echo(f"email_outbox: {stats['sent']} enviados, {stats['retried']} a reintentar, {stats['failed']} fallidos")
+    if stats["held"]:
+        click.echo(f"email_outbox: {stats['held']} retenidos por falta de credenciales SMTP", err=True)
+
+
+@email_outbox_cli.command("status")
+def status_command():
+    """Cantidad de emails por estado."""
+    rows = db.session.query(OutboundEmail.status, db.func.count()).group_by(OutboundEmail.status).all()
+    for status, count in rows:
+        click.echo(f"{status}: {count}")
+
+
+def init_email_outbox(app):
+    """Registra el sender en segundo plano (si MAIL_OUTBOX_WORKER) y el comando CLI."""
+    app.cli.add_command(email_outbox_cli)
+    if not app.config.get("MAIL_OUTBOX_WORKER"):
+        return
+
+    sender = OutboxSender(app)
+    app.extensions[EXTENSION_KEY] = sender
+
+    @app.before_request
+    def _start_outbox_sender():
+        # Al arrancar el proceso quedan emails a reintentar aunque nadie encole nada nuevo
+        sender.ensure_started()
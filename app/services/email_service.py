@@ -1,7 +1,21 @@
+"""
+Envío de emails por SMTP.
+
+- send_email_smtp(): envío puntual (conecta, autentica, envía y cierra).
+- send_many(): envío en lote sobre una sesión SMTP autenticada del pool del proceso
+  (SMTPPool), que se reutiliza entre lotes y se reabre si el servidor la cerró. Evita
+  el handshake TLS + AUTH por email en notificaciones masivas.
+"""
+
+import os
 import smtplib
+import threading
+import time
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import formataddr
+from typing import Dict, Iterable, List, Optional
 from flask import current_app
 import logging
 
@@ -9,6 +23,193 @@ from ..utils.exceptions import EmailError, ConfigurationError
 
 logger = logging.getLogger(__name__)
 
+EXTENSION_KEY = "smtp_pool"
+SENDER_NAME = "NOVA Gestión de Cobranzas"
+
+
+def build_message(recipients, subject, body_text, body_html, from_email, reply_to=None):
+    """Arma el mensaje multipart (texto + HTML)."""
+    email_msg = MIMEMultipart("alternative")
+    email_msg["Subject"] = subject
+    email_msg["From"] = formataddr((SENDER_NAME, from_email))
+    email_msg["To"] = ", ".join(recipients)
+    if reply_to:
+        email_msg["Reply-To"] = reply_to
+
+    email_msg.attach(MIMEText(body_text, "plain", "utf-8"))
+    email_msg.attach(MIMEText(body_html or "", "html", "utf-8"))
+    return email_msg
+
+
+def _check_config(cfg) -> bool:
+    """False si no hay credenciales; ConfigurationError si falta el servidor."""
+    if not cfg.get("MAIL_USERNAME") or not cfg.get("MAIL_PASSWORD"):
+        logger.warning("Credenciales de email no configuradas")
+        return False
+    if not cfg.get("MAIL_SERVER"):
+        raise ConfigurationError("MAIL_SERVER no está configurado", config_key="MAIL_SERVER")
+    return True
+
+
+def _email_error(error: Exception, cfg) -> EmailError:
+    """Traduce un error de smtplib/socket a EmailError."""
+    server = {"server": cfg.get("MAIL_SERVER"), "port": cfg.get("MAIL_PORT")}
+    if isinstance(error, EmailError):
+        return error
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        logger.error(f"Error de autenticación SMTP: {error}")
+        return EmailError("Error de autenticación con el servidor de email", details={"smtp_error": str(error)})
+    if isinstance(error, smtplib.SMTPException):
+        logger.error(f"Error SMTP: {error}")
+        return EmailError("Error al enviar email", details={"smtp_error": str(error), **server})
+    if isinstance(error, (ConnectionError, TimeoutError, OSError)):
+        logger.error(f"Error de conexión al servidor SMTP: {error}")
+        return EmailError("No se pudo conectar al servidor de email", details={"connection_error": str(error), **server})
+    logger.error(f"Error inesperado al enviar email: {error}", exc_info=True)
+    return EmailError("Error inesperado al enviar email", details={"error": str(error)})
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """Errores que invalidan la sesión (a diferencia de un rechazo de un mensaje puntual)."""
+    return isinstance(error, smtplib.SMTPServerDisconnected) or (
+        isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+    )
+
+
+class SMTPConnection:
+    """
+    Sesión SMTP autenticada reutilizable.
+
+    Se conecta en el primer envío y se reconecta sola si el servidor la cerró (un solo
+    reintento, y solo si la sesión venía de antes: si una conexión nueva falla, el error
+    es real). También se renueva al superar MAIL_POOL_MAX_MESSAGES mensajes o
+    MAIL_POOL_MAX_IDLE segundos sin uso, antes de que el servidor la corte.
+    """
+
+    def __init__(self, cfg):
+        self.server = cfg["MAIL_SERVER"]
+        self.port = cfg["MAIL_PORT"]
+        self.use_ssl = bool(cfg.get("MAIL_USE_SSL"))
+        self.use_tls = bool(cfg.get("MAIL_USE_TLS"))
+        self.timeout = cfg.get("MAIL_TIMEOUT", 20)
+        self.username = cfg["MAIL_USERNAME"]
+        self.password = cfg["MAIL_PASSWORD"]
+        self.max_messages = int(cfg.get("MAIL_POOL_MAX_MESSAGES", 100))
+        self.max_idle = float(cfg.get("MAIL_POOL_MAX_IDLE", 60))
+        self._smtp = None
+        self._sent = 0
+        self._last_used = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self._smtp is not None
+
+    def connect(self):
+        if self.use_ssl:
+            logger.info(f"Conectando con SSL a {self.server}:{self.port}")
+            smtp = smtplib.SMTP_SSL(self.server, self.port, timeout=self.timeout)
+        else:
+            logger.info(f"Conectando con TLS a {self.server}:{self.port}")
+            smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        self._smtp = smtp
+        try:
+            if self.use_tls and not self.use_ssl:
+                smtp.starttls()
+            logger.info("Autenticando en servidor SMTP")
+            smtp.login(self.username, self.password)
+        except Exception:
+            self.close()
+            raise
+        self._sent = 0
+        self._last_used = time.monotonic()
+
+    def close(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            smtp.quit()
+        except Exception as e:
+            logger.debug(f"Error al cerrar conexión SMTP: {e}")
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _expired(self) -> bool:
+        return self._sent >= self.max_messages or time.monotonic() - self._last_used > self.max_idle
+
+    def send(self, message, from_addr: str, to_addrs: List[str]):
+        """
+        Envía un mensaje por la sesión (conectando o reconectando si hace falta).
+
+        Raises:
+            smtplib.SMTPException / OSError: Si el envío falla
+        """
+        if self._smtp is not None and self._expired():
+            self.close()
+        reused = self._smtp is not None
+        if not reused:
+            self.connect()
+        try:
+            self._smtp.send_message(message, from_addr=from_addr, to_addrs=to_addrs)
+        except Exception as e:
+            if not _is_connection_error(e):
+                raise
+            self.close()
+            if not reused:
+                raise
+            logger.info(f"Sesión SMTP cerrada por el servidor ({e}), reconectando")
+            self.connect()
+            self._smtp.send_message(message, from_addr=from_addr, to_addrs=to_addrs)
+        self._sent += 1
+        self._last_used = time.monotonic()
+
+
+class SMTPPool:
+    """
+    Sesiones SMTP autenticadas del proceso, seguras ante fork.
+
+    Guarda hasta MAIL_POOL_SIZE sesiones ociosas; si se piden más a la vez se abren
+    conexiones extra que se cierran al devolverlas.
+    """
+
+    def __init__(self, app):
+        self.size = int(app.config.get("MAIL_POOL_SIZE", 2))
+        self._idle: List[SMTPConnection] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @contextmanager
+    def connection(self, cfg):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Los sockets heredados pertenecen al proceso padre: no se cierran
+                self._idle = []
+                self._pid = os.getpid()
+            conn = self._idle.pop() if self._idle else SMTPConnection(cfg)
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                if conn.connected and len(self._idle) < self.size and self._pid == os.getpid():
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close_all(self):
+        """Cierra las sesiones ociosas (se reabren en el próximo uso)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+def init_email(app):
+    """Registra el pool de sesiones SMTP de la app (conecta recién al enviar)."""
+    app.extensions[EXTENSION_KEY] = SMTPPool(app)
+
 
 def send_email_smtp(recipients, subject, body_text, body_html, from_email=None, reply_to=None):
     """
@@ -32,76 +233,82 @@ def send_email_smtp(recipients, subject, body_text, body_html, from_email=None,
     cfg = current_app.config
 
     # Validar configuración
-    if not cfg.get("MAIL_USERNAME") or not cfg.get("MAIL_PASSWORD"):
-        logger.warning("Credenciales de email no configuradas")
+    if not _check_config(cfg):
         return False
 
-    if not cfg.get("MAIL_SERVER"):
-        raise ConfigurationError("MAIL_SERVER no está configurado", config_key="MAIL_SERVER")
-
     if not recipients:
         raise EmailError("No se especificaron destinatarios")
 
     from_email = from_email or cfg["MAIL_USERNAME"]
-    server = None
+    conn = SMTPConnection(cfg)
 
     try:
-        # Construir mensaje
-        email_msg = MIMEMultipart("alternative")
-        email_msg["Subject"] = subject
-        email_msg["From"] = formataddr(("NOVA Gestión de Cobranzas", from_email))
-        email_msg["To"] = ", ".join(recipients)
-        if reply_to:
-            email_msg["Reply-To"] = reply_to
-
-        text_part = MIMEText(body_text, "plain", "utf-8")
-        html_part = MIMEText(body_html, "html", "utf-8")
-        email_msg.attach(text_part)
-        email_msg.attach(html_part)
-
-        # Conectar al servidor SMTP
-        mail_server = cfg["MAIL_SERVER"]
-        mail_port = cfg["MAIL_PORT"]
-        mail_timeout = cfg.get("MAIL_TIMEOUT", 20)
-
-        if cfg.get("MAIL_USE_SSL"):
-            logger.info(f"Conectando con SSL a {mail_server}:{mail_port}")
-            server = smtplib.SMTP_SSL(mail_server, mail_port, timeout=mail_timeout)
-        else:
-            logger.info(f"Conectando con TLS a {mail_server}:{mail_port}")
-            server = smtplib.SMTP(mail_server, mail_port, timeout=mail_timeout)
-            if cfg.get("MAIL_USE_TLS"):
-                server.starttls()
+        email_msg = build_message(recipients, subject, body_text, body_html, from_email, reply_to)
 
-        # Autenticar
-        logger.info("Autenticando en servidor SMTP")
-        server.login(cfg["MAIL_USERNAME"], cfg["MAIL_PASSWORD"])
-
-        # Enviar
         logger.info(f"Enviando email a {len(recipients)} destinatarios")
-        server.send_message(email_msg, from_addr=from_email, to_addrs=recipients)
+        conn.send(email_msg, from_addr=from_email, to_addrs=recipients)
 
         logger.info("Email enviado exitosamente")
         return True
 
-    except smtplib.SMTPAuthenticationError as e:
-        logger.error(f"Error de autenticación SMTP: {e}")
-        raise EmailError("Error de autenticación con el servidor de email", details={"smtp_error": str(e)})
-    except smtplib.SMTPException as e:
-        logger.error(f"Error SMTP: {e}")
-        raise EmailError("Error al enviar email", details={"smtp_error": str(e), "server": mail_server, "port": mail_port})
-    except (ConnectionError, TimeoutError, OSError) as e:
-        logger.error(f"Error de conexión al servidor SMTP: {e}")
-        raise EmailError(
-            "No se pudo conectar al servidor de email",
-            details={"connection_error": str(e), "server": mail_server, "port": mail_port},
-        )
     except Exception as e:
-        logger.error(f"Error inesperado al enviar email: {e}", exc_info=True)
-        raise EmailError("Error inesperado al enviar email", details={"error": str(e)})
+        raise _email_error(e, cfg)
     finally:
-        if server:
+        conn.close()
+
+
+def send_many(messages: Iterable[Dict], from_email: Optional[str] = None) -> List[Optional[EmailError]]:
+    """
+    Envía varios emails reutilizando una sesión SMTP autenticada del pool.
+
+    Un mensaje rechazado no corta el lote; si se pierde la conexión y no se puede
+    reabrir, el resto del lote falla con el mismo error sin reintentar cada uno.
+
+    Args:
+        messages: Diccionarios con recipients, subject, body_text y, opcionales,
+            body_html y reply_to
+        from_email: Email del remitente (opcional)
+
+    Returns:
+        Un resultado por mensaje, en orden: None si se envió, o el EmailError
+
+    Raises:
+        ConfigurationError: Si no hay credenciales o servidor configurados
+    """
+    cfg = current_app.config
+    if not _check_config(cfg):
+        raise ConfigurationError("Credenciales de email no configuradas", config_key="MAIL_USERNAME")
+
+    messages = list(messages)
+    from_email = from_email or cfg["MAIL_USERNAME"]
+    results: List[Optional[EmailError]] = []
+    pool = current_app.extensions.get(EXTENSION_KEY) or SMTPPool(current_app)
+
+    with pool.connection(cfg) as conn:
+        for message in messages:
+            recipients = list(message.get("recipients") or [])
+            if not recipients:
+                results.append(EmailError("No se especificaron destinatarios"))
+                continue
             try:
-                server.quit()
+                email_msg = build_message(
+                    recipients,
+                    message["subject"],
+                    message["body_text"],
+                    message.get("body_html"),
+                    from_email,
+                    message.get("reply_to"),
+                )
+                conn.send(email_msg, from_addr=from_email, to_addrs=recipients)
+                results.append(None)
             except Exception as e:
-                logger.debug(f"Error al cerrar conexión SMTP: {e}")
+                error = _email_error(e, cfg)
+                results.append(error)
+                if _is_connection_error(e) or isinstance(e, smtplib.SMTPAuthenticationError):
+                    conn.close()
+                    results.extend([error] * (len(messages) - len(results)))
+                    break
+
+    sent = results.count(None)
+    logger.info(f"Lote de emails: {sent} enviados, {len(results) - sent} con error")
+    return results
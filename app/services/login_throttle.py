@@ -0,0 +1,122 @@
+"""
+Bloqueo temporal de login por usuario.
+
+Cuenta los intentos fallidos por nombre de usuario en una ventana de
+LOGIN_LOCKOUT_SECONDS. Al llegar a LOGIN_MAX_FAILURES, los intentos siguientes se
+rechazan antes de consultar la base y de verificar el hash (lo caro). Complementa al
+rate limit por IP: frena ataques distribuidos contra una misma cuenta.
+
+Los contadores van a Redis si está disponible (compartidos entre workers) y, si no, a
+un diccionario acotado en memoria del proceso.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from flask import current_app
+
+from ..core.redis_client import get_redis_client, record_redis_failure, record_redis_success
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "login_throttle"
+KEY_PREFIX = "login:fail:"
+
+
+class LoginThrottle:
+    """Contador de fallas de login por usuario (Redis o memoria)."""
+
+    def __init__(self, max_failures: int = 5, window: int = 900, max_entries: int = 10000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_entries = max_entries
+        self._local: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return username.strip().lower()
+
+    def _local_entry(self, key: str) -> Optional[list]:
+        entry = self._local.get(key)
+        if entry and entry[1] <= time.monotonic():
+            del self._local[key]
+            return None
+        return entry
+
+    def retry_after(self, username: str) -> int:
+        """Segundos que falta esperar si el usuario está bloqueado (0 si no lo está)."""
+        if self.max_failures <= 0:
+            return 0
+        key = self._key(username)
+        redis_client = get_redis_client()
+        if redis_client:
+            try:
+                count, ttl = redis_client.pipeline().get(KEY_PREFIX + key).ttl(KEY_PREFIX + key).execute()
+                record_redis_success()
+                return max(int(ttl), 1) if count and int(count) >= self.max_failures else 0
+            except Exception as e:
+                record_redis_failure(e)
+        with self._lock:
+            entry = self._local_entry(key)
+            if entry and entry[0] >= self.max_failures:
+                return max(int(entry[1] - time.monotonic()), 1)
+        return 0
+
+    def record_failure(self, username: str) -> int:
+        """Suma un intento fallido y devuelve el total en la ventana."""
+        key = self._key(username)
+        redis_client = get_redis_client()
+        if redis_client:
+            try:
+                # La ventana arranca con la primera falla (EXPIRE NX no pisa el TTL)
+                count, _ = (
+                    redis_client.pipeline().incr(KEY_PREFIX + key).expire(KEY_PREFIX + key, self.window, nx=True).execute()
+                )
+                record_redis_success()
+                self._log_lockout(username, int(count))
+                return int(count)
+            except Exception as e:
+                record_redis_failure(e)
+        with self._lock:
+            entry = self._local_entry(key)
+            if entry is None:
+                entry = self._local[key] = [0, time.monotonic() + self.window]
+                while len(self._local) > self.max_entries:
+                    self._local.popitem(last=False)
+            entry[0] += 1
+            count = entry[0]
+        self._log_lockout(username, count)
+        return count
+
+    def reset(self, username: str):
+        """Borra las fallas del usuario (login exitoso)."""
+        key = self._key(username)
+        redis_client = get_redis_client()
+        if redis_client:
+            try:
+                redis_client.delete(KEY_PREFIX + key)
+                record_redis_success()
+            except Exception as e:
+                record_redis_failure(e)
+        with self._lock:
+            self._local.pop(key, None)
+
+    def _log_lockout(self, username: str, count: int):
+        if count == self.max_failures:
+            logger.warning(f"Usuario {username} bloqueado por {self.window}s tras {count} intentos fallidos")
+
+
+def init_login_throttle(app):
+    """Registra el contador de fallas de login de la app."""
+    app.extensions[EXTENSION_KEY] = LoginThrottle(
+        max_failures=int(app.config.get("LOGIN_MAX_FAILURES", 5)),
+        window=int(app.config.get("LOGIN_LOCKOUT_SECONDS", 900)),
+    )
+
+
+def get_login_throttle() -> LoginThrottle:
+    return current_app.extensions[EXTENSION_KEY]
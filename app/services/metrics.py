@@ -0,0 +1,174 @@
+"""
+Métricas en formato Prometheus (endpoint /metrics).
+
+- http_request_duration_seconds: histograma de latencia por endpoint y método
+- http_requests_total: requests por endpoint, método y status
+- http_rate_limited_total: respuestas 429 (rate limit por IP o bloqueo de login)
+- db_pool_connections: conexiones del pool abiertas y en uso (eventos del pool)
+- cache_requests_total: hits y misses de cache_result (hit ratio = hit / total)
+- email_outbox_queue: emails pendientes o en envío (se consulta al scrapear)
+
+Con varios workers de gunicorn cada proceso tiene sus propios contadores. Si está
+definida PROMETHEUS_MULTIPROC_DIR (antes de arrancar los workers), prometheus_client
+escribe los valores en archivos de ese directorio y /metrics los suma entre procesos;
+config/docker/gunicorn.conf.py limpia el directorio al iniciar y da de baja los
+workers que terminan. Sin la variable, /metrics expone solo el proceso que responde.
+
+prometheus_client es opcional: si no está instalado, /metrics no se registra.
+"""
+
+import hmac
+import logging
+import os
+import time
+
+from flask import Response, abort, current_app, g, request
+from sqlalchemy import event, func
+from sqlalchemy.pool import Pool
+
+from ..core.database import db
+from ..features.contact.models import OutboundEmail
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        REGISTRY,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+    )
+    from prometheus_client import multiprocess
+    from prometheus_client.core import GaugeMetricFamily
+
+    prometheus_available = True
+except ImportError:
+    prometheus_available = False
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+OUTBOX_QUEUED = (OutboundEmail.PENDING, OutboundEmail.SENDING)
+
+if prometheus_available:
+    REQUEST_LATENCY = Histogram(
+        "http_request_duration_seconds",
+        "Latencia de los requests por endpoint",
+        ["endpoint", "method"],
+        buckets=LATENCY_BUCKETS,
+    )
+    REQUESTS = Counter("http_requests_total", "Requests atendidos", ["endpoint", "method", "status"])
+    RATE_LIMITED = Counter("http_rate_limited_total", "Requests rechazados con 429", ["endpoint"])
+    DB_POOL = Gauge(
+        "db_pool_connections",
+        "Conexiones del pool de SQLAlchemy (open: abiertas, in_use: prestadas)",
+        ["state"],
+        multiprocess_mode="livesum",
+    )
+    CACHE_REQUESTS = Counter("cache_requests_total", "Lecturas de cache_result", ["result"])
+
+
+def multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+
+def count_cache(hit: bool):
+    """Cuenta un hit o miss de cache_result."""
+    if prometheus_available:
+        CACHE_REQUESTS.labels("hit" if hit else "miss").inc()
+
+
+class _OutboxCollector:
+    """Profundidad de la cola de emails, leída de la base en cada scrape (compartida por todos los workers)."""
+
+    def collect(self):
+        gauge = GaugeMetricFamily("email_outbox_queue", "Emails en email_outbox por enviar", labels=["status"])
+        counts = dict.fromkeys(OUTBOX_QUEUED, 0)
+        try:
+            rows = (
+                db.session.query(OutboundEmail.status, func.count())
+                .filter(OutboundEmail.status.in_(OUTBOX_QUEUED))
+                .group_by(OutboundEmail.status)
+                .all()
+            )
+            counts.update(rows)
+        except Exception as e:
+            logger.warning(f"No se pudo leer la cola de emails para métricas: {e}")
+            return
+        for status, count in counts.items():
+            gauge.add_metric([status], count)
+        yield gauge
+
+
+def _on_connect(dbapi_connection, connection_record):
+    DB_POOL.labels("open").inc()
+
+
+def _on_close(dbapi_connection, connection_record):
+    DB_POOL.labels("open").dec()
+
+
+def _on_detach(dbapi_connection, connection_record):
+    # Una conexión invalidada sale del pool (se cierra con close_detached)
+    DB_POOL.labels("open").dec()
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL.labels("in_use").inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL.labels("in_use").dec()
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+
+
+def _observe_request(response):
+    started = g.pop("metrics_started", None)
+    if started is None or request.endpoint == "static":
+        return response
+    endpoint = request.endpoint or "<unmatched>"
+    REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+    REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+    if response.status_code == 429:
+        RATE_LIMITED.labels(endpoint).inc()
+    return response
+
+
+def metrics_view():
+    """Exposición en formato texto de Prometheus."""
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        abort(401)
+
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    # Las métricas leídas de la base van en un registry propio del scrape
+    database = CollectorRegistry()
+    database.register(_OutboxCollector())
+    return Response(generate_latest(registry) + generate_latest(database), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Registra la medición de requests, los eventos del pool y el endpoint /metrics."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    if not prometheus_available:
+        logger.warning("METRICS_ENABLED activo pero prometheus_client no está instalado: /metrics deshabilitado")
+        return
+
+    if not event.contains(Pool, "connect", _on_connect):
+        event.listen(Pool, "connect", _on_connect)
+        event.listen(Pool, "close", _on_close)
+        event.listen(Pool, "detach", _on_detach)
+        event.listen(Pool, "checkout", _on_checkout)
+        event.listen(Pool, "checkin", _on_checkin)
+    app.before_request(_start_request)
+    app.after_request(_observe_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
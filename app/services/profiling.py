@@ -0,0 +1,210 @@
+"""
+Instrumentación por request: consultas SQL, tiempo de base y uso del cache.
+
+Los eventos before/after_cursor_execute del engine suman, en el request en curso,
+la cantidad de sentencias y el tiempo que pasó en la base; el cache (cache_result)
+informa sus hits y misses. Al terminar el request:
+
+- se agrega el header Server-Timing (visible en las DevTools del navegador);
+- se escribe una línea JSON en el logger `request_profile` con endpoint, status,
+  duración, tiempo de base, consultas y cache;
+- se acumulan totales por endpoint (request_profile_stats()).
+
+El log de consultas lentas es opcional: con SLOW_QUERY_MS > 0, cada sentencia que
+supera ese umbral se escribe en el logger `slow_query` con el SQL normalizado (sin
+literales ni listas de parámetros), dentro o fuera de un request.
+
+Las respuestas en streaming se miden hasta que se arma la respuesta: las consultas
+que se hacen mientras se envía el cuerpo no entran en el header ni en el log.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("request_profile")
+slow_query_logger = logging.getLogger("slow_query")
+
+EXTENSION_KEY = "request_profile"
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\(\w+\)s|%s|(?<![:\w]):\w+")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\?(?:, \?)+\)")
+
+
+def normalize_sql(statement: str) -> str:
+    """SQL sin literales ni parámetros (todos `?`), listas IN colapsadas y en una línea."""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _PARAM_LIST.sub("(?, ...)", sql)
+
+
+class RequestProfile:
+    """Contadores del request en curso (viven en flask.g)."""
+
+    __slots__ = ("started", "queries", "db_time", "cache_hits", "cache_misses")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def server_timing(self, total: float) -> str:
+        return ", ".join(
+            [
+                f"app;dur={total * 1000:.1f}",
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+                f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            ]
+        )
+
+
+class EndpointStats:
+    """Totales por endpoint desde que arrancó el proceso."""
+
+    FIELDS = ("requests", "errors", "duration", "db_time", "queries", "cache_hits", "cache_misses")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+
+    def record(self, endpoint: str, status: int, duration: float, profile: RequestProfile):
+        with self._lock:
+            stats = self._stats[endpoint]
+            stats["requests"] += 1
+            stats["errors"] += 1 if status >= 500 else 0
+            stats["duration"] += duration
+            stats["db_time"] += profile.db_time
+            stats["queries"] += profile.queries
+            stats["cache_hits"] += profile.cache_hits
+            stats["cache_misses"] += profile.cache_misses
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {endpoint: dict(stats) for endpoint, stats in self._stats.items()}
+
+
+def _current_profile() -> Optional[RequestProfile]:
+    if not has_request_context():
+        return None
+    return g.get("request_profile")
+
+
+def record_cache(hit: bool):
+    """Registra un hit o miss de cache_result en el request en curso (si lo hay)."""
+    profile = _current_profile()
+    if profile is None:
+        return
+    if hit:
+        profile.cache_hits += 1
+    else:
+        profile.cache_misses += 1
+
+
+def request_profile_stats() -> Dict[str, Dict[str, float]]:
+    """Totales por endpoint del proceso (requests, errores, segundos, consultas, cache)."""
+    try:
+        stats = current_app.extensions.get(EXTENSION_KEY)
+    except RuntimeError:
+        return {}
+    return stats.snapshot() if stats else {}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+
+    profile = _current_profile()
+    if profile is not None:
+        profile.queries += 1
+        profile.db_time += elapsed
+
+    if not has_app_context():
+        return
+    threshold = current_app.config.get("SLOW_QUERY_MS", 0)
+    if threshold and elapsed * 1000 >= threshold:
+        slow_query_logger.warning(
+            json.dumps(
+                {
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "endpoint": request.endpoint if has_request_context() else None,
+                    "executemany": executemany,
+                    "sql": normalize_sql(statement),
+                },
+                ensure_ascii=False,
+            )
+        )
+
+
+def _handle_error(exception_context):
+    # La sentencia falló: after_cursor_execute no corre, se descarta su inicio
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def _start_request():
+    if current_app.config.get("PROFILING_ENABLED", True):
+        g.request_profile = RequestProfile()
+
+
+def _finish_request(response):
+    profile = g.pop("request_profile", None)
+    if profile is None or request.endpoint == "static":
+        return response
+
+    duration = time.perf_counter() - profile.started
+    endpoint = request.endpoint or "<unmatched>"
+    if current_app.config.get("SERVER_TIMING", True):
+        response.headers["Server-Timing"] = profile.server_timing(duration)
+    current_app.extensions[EXTENSION_KEY].record(endpoint, response.status_code, duration, profile)
+    if current_app.config.get("REQUEST_LOG", True):
+        request_logger.info(
+            json.dumps(
+                {
+                    "endpoint": endpoint,
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round(duration * 1000, 1),
+                    "db_ms": round(profile.db_time * 1000, 1),
+                    "queries": profile.queries,
+                    "cache_hits": profile.cache_hits,
+                    "cache_misses": profile.cache_misses,
+                },
+                ensure_ascii=False,
+            )
+        )
+    return response
+
+
+def init_profiling(app):
+    """Registra los eventos SQL (una vez por proceso) y los hooks de request de la app."""
+    app.extensions[EXTENSION_KEY] = EndpointStats()
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,172 @@
+"""
+Readiness probe (/readyz): verifica las dependencias del worker, a diferencia de
+/healthz (liveness) que no hace I/O.
+
+Chequeos:
+- database: SELECT 1 por el pool de la app (si el pool está agotado por conexiones
+  colgadas, el chequeo vence igual que vencerían los requests);
+- migrations: la revisión de alembic_version coincide con el head de migrations/;
+- redis: PING, solo si REDIS_URL está configurada.
+
+Cada chequeo corre en un thread con READYZ_TIMEOUT segundos de límite; si el anterior
+del mismo tipo sigue colgado no se lanza otro (se informa timeout), así una base
+caída no acumula threads. El resultado se reutiliza durante READYZ_CACHE_SECONDS
+para que los probes frecuentes de varios balanceadores no multipliquen la carga.
+
+Base de datos y migraciones son críticas: si fallan, /readyz responde 503. Redis no
+lo es salvo READYZ_REQUIRE_REDIS (la app funciona sin cache): si falla, el estado es
+"degraded" con 200. Una base sin alembic_version (tablas creadas con create_all) se
+informa como "unversioned" y no se considera falla.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from flask import current_app, jsonify
+from sqlalchemy import inspect, text
+
+from ..core import redis_client
+from ..core.database import db
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "readiness"
+# Estados que no cuentan como falla
+HEALTHY = ("ok", "disabled", "skipped", "unversioned")
+
+
+@lru_cache(maxsize=4)
+def _migration_heads(migrations_dir: str) -> Tuple[str, ...]:
+    """Heads de los scripts de migración (se leen una vez por proceso)."""
+    from alembic.script import ScriptDirectory
+
+    return tuple(sorted(ScriptDirectory(migrations_dir).get_heads()))
+
+
+def check_database(timeout: float) -> Dict:
+    with db.engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(int(timeout * 1000), 1)}")
+        connection.execute(text("SELECT 1"))
+    return {"status": "ok"}
+
+
+def check_migrations(timeout: float) -> Dict:
+    migrations_dir = Path(current_app.config.get("ROOT_DIR", ".")) / "migrations"
+    if not (migrations_dir / "versions").is_dir():
+        return {"status": "skipped"}
+    try:
+        heads = list(_migration_heads(str(migrations_dir)))
+    except ImportError:
+        return {"status": "skipped"}
+
+    with db.engine.connect() as connection:
+        if not inspect(connection).has_table("alembic_version"):
+            return {"status": "unversioned", "head": heads}
+        current = sorted(row[0] for row in connection.execute(text("SELECT version_num FROM alembic_version")))
+    return {"status": "ok" if current == heads else "mismatch", "current": current, "head": heads}
+
+
+def check_redis(timeout: float) -> Dict:
+    pool = current_app.extensions.get(redis_client.EXTENSION_KEY)
+    if not pool or not pool.enabled:
+        return {"status": "disabled"}
+    client = pool.client()
+    if client is None:
+        return {"status": "down", "error": "circuit breaker abierto"}
+    try:
+        client.ping()
+    except Exception as e:
+        redis_client.record_redis_failure(e)
+        raise
+    redis_client.record_redis_success()
+    return {"status": "ok"}
+
+
+CHECKS = {"database": check_database, "migrations": check_migrations, "redis": check_redis}
+
+
+class Readiness:
+    """Ejecuta los chequeos con timeout y cachea el último resultado."""
+
+    def __init__(self, app):
+        self.app = app
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._report: Optional[Dict] = None
+        self._checked_at = 0.0
+
+    def _run(self, check, timeout: float) -> Dict:
+        started = time.perf_counter()
+        with self.app.app_context():
+            try:
+                result = check(timeout)
+            except Exception as e:
+                result = {"status": "down", "error": str(e)[:200]}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def _submit(self, name: str, timeout: float) -> Optional[Future]:
+        pending = self._pending.get(name)
+        if pending is not None and not pending.done():
+            return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(CHECKS), thread_name_prefix="readyz")
+        future = self._executor.submit(self._run, CHECKS[name], timeout)
+        self._pending[name] = future
+        return future
+
+    def _check_all(self, timeout: float) -> Dict[str, Dict]:
+        futures = {name: self._submit(name, timeout) for name in CHECKS}
+        deadline = time.monotonic() + timeout
+        results = {}
+        for name, future in futures.items():
+            if future is None:
+                results[name] = {"status": "timeout", "error": "el chequeo anterior sigue en curso"}
+                continue
+            try:
+                results[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FutureTimeoutError:
+                results[name] = {"status": "timeout", "latency_ms": round(timeout * 1000, 1)}
+        return results
+
+    def report(self) -> Dict:
+        """Resultado de los chequeos (del cache si es reciente)."""
+        config = self.app.config
+        with self._lock:
+            now = time.monotonic()
+            if self._report is not None and now - self._checked_at < float(config.get("READYZ_CACHE_SECONDS", 5)):
+                return dict(self._report, cached=True)
+
+            checks = self._check_all(float(config.get("READYZ_TIMEOUT", 1.0)))
+            critical = ["database", "migrations"] + (["redis"] if config.get("READYZ_REQUIRE_REDIS") else [])
+            failing = [name for name, result in checks.items() if result["status"] not in HEALTHY]
+            if any(name in critical for name in failing):
+                status = "not_ready"
+            else:
+                status = "degraded" if failing else "ready"
+            if failing:
+                logger.warning(f"readyz {status}: {', '.join(failing)}")
+
+            self._report = {"status": status, "checks": checks}
+            self._checked_at = now
+            return dict(self._report, cached=False)
+
+
+def readyz():
+    """Readiness probe: 200 si el worker puede atender (ready/degraded), 503 si no."""
+    report = current_app.extensions[EXTENSION_KEY].report()
+    return jsonify(report), 503 if report["status"] == "not_ready" else 200
+
+
+def init_readiness(app):
+    """Registra /readyz."""
+    app.extensions[EXTENSION_KEY] = Readiness(app)
+    app.add_url_rule("/readyz", "readyz", readyz)
@@ -0,0 +1,200 @@
+"""
+Registro en memoria de datos de referencia (estados de caso y carteras).
+
+Son tablas chicas que cambian muy poco y se consultan en casi todos los requests
+(resolver un estado por nombre, validar una cartera). Cada proceso las carga una vez
+y las resuelve en memoria.
+
+Invalidación entre workers: al confirmar una transacción que escribió CaseStatus o
+Cartera se descarta el registro del proceso y se incrementa el contador de
+generación `refdata:gen` en Redis. Los demás procesos comparan ese contador como
+mucho cada REFDATA_CHECK_INTERVAL segundos y recargan si cambió. Sin Redis, el
+registro de los demás workers se recarga al vencer REFDATA_TTL.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import event
+
+from ..core.database import db
+from ..core.redis_client import get_redis_client, record_redis_failure, record_redis_success
+from ..features.carteras.models import Cartera
+from ..features.cases.models import CaseStatus
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "reference_data"
+GENERATION_KEY = "refdata:gen"
+
+
+@dataclass(frozen=True)
+class RefItem:
+    """Fila de una tabla de referencia (mismos campos que CaseStatus y Cartera)."""
+
+    id: int
+    nombre: str
+    activo: bool
+    created_at: Optional[datetime] = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "nombre": self.nombre,
+            "activo": self.activo,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+def _as_id(value) -> Optional[int]:
+    """IDs como llegan en los requests ("3" o 3); None si no es un entero."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReferenceSnapshot:
+    """Copia inmutable de case_statuses y carteras, con índices por id y por nombre."""
+
+    def __init__(self, statuses: List[RefItem], carteras: List[RefItem]):
+        self._statuses = sorted(statuses, key=lambda s: s.nombre)
+        self._carteras = sorted(carteras, key=lambda c: c.nombre)
+        self._status_by_id: Dict[int, RefItem] = {s.id: s for s in statuses}
+        self._status_by_name: Dict[str, RefItem] = {s.nombre: s for s in statuses if s.activo}
+        self._cartera_by_id: Dict[int, RefItem] = {c.id: c for c in carteras}
+
+    def statuses(self, active_only: bool = True) -> List[RefItem]:
+        """Estados ordenados por nombre."""
+        return [s for s in self._statuses if s.activo or not active_only]
+
+    def carteras(self, active_only: bool = True) -> List[RefItem]:
+        """Carteras ordenadas por nombre."""
+        return [c for c in self._carteras if c.activo or not active_only]
+
+    def status(self, status_id: Optional[int], active_only: bool = True) -> Optional[RefItem]:
+        item = self._status_by_id.get(_as_id(status_id))
+        return item if item and (item.activo or not active_only) else None
+
+    def status_by_name(self, nombre: Optional[str]) -> Optional[RefItem]:
+        """Estado activo con ese nombre (exacto, como filter_by(nombre=..., activo=True))."""
+        return self._status_by_name.get(nombre)
+
+    def status_id(self, nombre: Optional[str]) -> Optional[int]:
+        item = self.status_by_name(nombre)
+        return item.id if item else None
+
+    def cartera(self, cartera_id: Optional[int], active_only: bool = True) -> Optional[RefItem]:
+        item = self._cartera_by_id.get(_as_id(cartera_id))
+        return item if item and (item.activo or not active_only) else None
+
+
+def _items(model) -> List[RefItem]:
+    return [RefItem(*row) for row in db.session.query(model.id, model.nombre, model.activo, model.created_at)]
+
+
+class ReferenceData:
+    """Registro por proceso de los datos de referencia, con recarga por generación o TTL."""
+
+    def __init__(self, app):
+        self.ttl = float(app.config.get("REFDATA_TTL", 60))
+        self.check_interval = float(app.config.get("REFDATA_CHECK_INTERVAL", 5))
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._generation: Optional[str] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _read_generation(self) -> Optional[str]:
+        redis_client = get_redis_client()
+        if not redis_client:
+            return None
+        try:
+            generation = redis_client.get(GENERATION_KEY)
+            record_redis_success()
+            return str(int(generation or 0))
+        except Exception as e:
+            record_redis_failure(e)
+            return None
+
+    def _load(self) -> ReferenceSnapshot:
+        self.loads += 1
+        return ReferenceSnapshot(_items(CaseStatus), _items(Cartera))
+
+    def get(self) -> ReferenceSnapshot:
+        """Snapshot vigente: recarga si cambió la generación en Redis o (sin Redis) venció el TTL."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            now = time.monotonic()
+            generation = self._read_generation()
+            self._checked_at = now
+            if (
+                self._snapshot is None
+                or (generation is not None and generation != self._generation)
+                or (generation is None and now - self._loaded_at >= self.ttl)
+            ):
+                self._snapshot = self._load()
+                self._generation = generation
+                self._loaded_at = now
+            return self._snapshot
+
+    def invalidate(self, broadcast: bool = True):
+        """Descarta el snapshot del proceso y, con broadcast, avisa a los demás por Redis."""
+        with self._lock:
+            self._snapshot = None
+        if not broadcast:
+            return
+        redis_client = get_redis_client()
+        if not redis_client:
+            return
+        try:
+            redis_client.incr(GENERATION_KEY)
+            record_redis_success()
+        except Exception as e:
+            record_redis_failure(e)
+            logger.warning(f"No se pudo publicar la invalidación de datos de referencia: {e}")
+
+
+def get_reference_data() -> ReferenceSnapshot:
+    """Snapshot de estados y carteras del proceso (lo carga si hace falta)."""
+    return current_app.extensions[EXTENSION_KEY].get()
+
+
+def _after_flush(session, flush_context):
+    """Marca la transacción si escribió estados o carteras."""
+    for objs in (session.new, session.dirty, session.deleted):
+        if any(isinstance(obj, (CaseStatus, Cartera)) for obj in objs):
+            session.info["refdata_dirty"] = True
+            return
+
+
+def _after_commit(session):
+    if session.info.pop("refdata_dirty", None):
+        try:
+            registry = current_app.extensions.get(EXTENSION_KEY)
+        except RuntimeError:
+            return
+        if registry:
+            registry.invalidate()
+
+
+def _after_rollback(session):
+    session.info.pop("refdata_dirty", None)
+
+
+def init_reference_data(app):
+    """Registra el registro de datos de referencia y su invalidación al confirmar escrituras."""
+    app.extensions[EXTENSION_KEY] = ReferenceData(app)
+    if not event.contains(db.session, "after_flush", _after_flush):
+        event.listen(db.session, "after_flush", _after_flush)
+        event.listen(db.session, "after_commit", _after_commit)
+        event.listen(db.session, "after_rollback", _after_rollback)
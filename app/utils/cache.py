@@ -5,14 +5,8 @@ Utilidades de cache para optimización de performance.
 import json
 import hashlib
 from functools import wraps
-from flask import current_app
 
-try:
-    import redis
-
-    redis_available = True
-except ImportError:
-    redis_available = False
+from ..core.redis_client import get_redis_client
 
 
 def get_cache_key(prefix: str, *args, **kwargs) -> str:
@@ -32,20 +26,6 @@ def get_cache_key(prefix: str, *args, **kwargs) -> str:
     return f"cache:{prefix}:{key_hash}"
 
 
-def get_redis_client():
-    """Obtiene cliente Redis si está disponible."""
-    if not redis_available:
-        return None
-
-    try:
-        redis_url = current_app.config.get("REDIS_URL")
-        if redis_url and redis_url.startswith("redis://"):
-            return redis.from_url(redis_url, decode_responses=True)
-        return None
-    except Exception:
-        return None
-
-
 def cache_result(timeout: int = 300, key_prefix: str = None):
     """
     Decorador para cachear resultados de funciones.
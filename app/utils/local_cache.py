@@ -0,0 +1,151 @@
+"""
+Cache LRU en memoria del proceso (tier L1 delante de Redis).
+"""
+
+import fnmatch
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    LRU acotado por cantidad de entradas y por bytes, con TTL por entrada.
+
+    Los valores se guardan ya deserializados y se devuelven sin copiar: quien los lee
+    debe tratarlos como de solo lectura. El tamaño de cada entrada es el de su JSON
+    (lo que ocuparía en Redis), así el límite en bytes es una aproximación estable.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 16 * 1024 * 1024, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, list] = {}
+        self._generations: Dict[str, int] = {}
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _check_fork(self):
+        """Un proceso hijo no hereda el estado (ni locks tomados) del padre."""
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._key_locks = {}
+            self._entries.clear()
+            self._bytes = 0
+            self._pid = os.getpid()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Devuelve el valor vigente de la clave (y la marca como usada) o default."""
+        self._check_fork()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, size: int, ttl: Optional[float] = None, capped: bool = True):
+        """
+        Guarda un valor.
+
+        Args:
+            key: Clave
+            value: Valor deserializado
+            size: Tamaño aproximado en bytes (largo del JSON)
+            ttl: Segundos de vigencia (acotado por el TTL del cache)
+            capped: False para no acotar ttl (quien llama controla la vigencia del valor)
+        """
+        self._check_fork()
+        if ttl is None:
+            ttl = self.ttl
+        elif capped:
+            ttl = min(ttl, self.ttl)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def delete_matching(self, pattern: str) -> int:
+        """Elimina las claves que coinciden con un patrón glob (como KEYS/SCAN de Redis)."""
+        self._check_fork()
+        with self._lock:
+            keys = [k for k in self._entries if fnmatch.fnmatchcase(k, pattern)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @contextmanager
+    def lock(self, key: str):
+        """
+        Lock por clave: un solo thread del proceso recalcula una entrada faltante y el
+        resto espera y la lee del cache (evita estampidas sobre la base).
+        """
+        self._check_fork()
+        with self._lock:
+            holder = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            holder[1] += 1
+        try:
+            with holder[0]:
+                yield
+        finally:
+            with self._lock:
+                holder[1] -= 1
+                if holder[1] == 0 and self._key_locks.get(key) is holder:
+                    del self._key_locks[key]
+
+    def generation(self, tag: str) -> int:
+        """Contador de generación local de un scope (se usa cuando no hay Redis)."""
+        return self._generations.get(tag, 0)
+
+    def bump_generations(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de uso del cache."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
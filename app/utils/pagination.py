@@ -0,0 +1,67 @@
+"""
+Utilidades para paginación por cursor (keyset).
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+from .exceptions import ValidationError
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Codifica los valores de la clave de orden en un cursor opaco.
+
+    Args:
+        *values: Valores de la última fila de la página (datetimes se serializan en ISO)
+
+    Returns:
+        Cursor opaco (base64 url-safe)
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """
+    Decodifica un cursor generado por encode_cursor.
+
+    Args:
+        cursor: Cursor recibido del cliente (None o vacío = primera página)
+        size: Cantidad de valores esperados en la clave
+
+    Returns:
+        Lista de valores o None si no hay cursor
+
+    Raises:
+        ValidationError: Si el cursor es inválido
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError("Cursor inválido", field="cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValidationError("Cursor inválido", field="cursor")
+    return values
+
+
+def parse_cursor_datetime(value: Any) -> datetime:
+    """Convierte el valor ISO de un cursor en datetime."""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValidationError("Cursor inválido", field="cursor")
+
+
+def parse_cursor_int(value: Any) -> int:
+    """Convierte el valor entero de un cursor (id) en int."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError("Cursor inválido", field="cursor")
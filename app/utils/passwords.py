@@ -0,0 +1,53 @@
+"""
+Política de hash de contraseñas.
+
+El método se configura con PASSWORD_HASH_METHOD (formato de werkzeug, ej: "scrypt" o
+"pbkdf2:sha256:600000"). Por método se calcula una sola vez, y queda cacheado, el
+prefijo normalizado del hash (para detectar hashes con parámetros viejos) y un hash
+dummy con el mismo costo, que se verifica cuando el usuario no existe para que la
+respuesta tarde lo mismo.
+"""
+
+import secrets
+from functools import lru_cache
+from typing import Tuple
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = "scrypt"
+
+
+def hash_method() -> str:
+    """Método de hash configurado."""
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_METHOD") or DEFAULT_METHOD
+    return DEFAULT_METHOD
+
+
+@lru_cache(maxsize=8)
+def _policy(method: str) -> Tuple[str, str]:
+    """(prefijo normalizado, hash dummy) del método: werkzeug completa los parámetros por defecto."""
+    dummy = generate_password_hash(secrets.token_urlsafe(16), method=method)
+    return dummy.split("$", 1)[0], dummy
+
+
+def hash_password(password: str) -> str:
+    """Hashea una contraseña con la política actual."""
+    return generate_password_hash(password, method=hash_method())
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Verifica una contraseña contra su hash (el método sale del propio hash)."""
+    return check_password_hash(password_hash, password)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True si el hash se generó con otro método o parámetros que los de la política actual."""
+    return password_hash.split("$", 1)[0] != _policy(hash_method())[0]
+
+
+def verify_dummy(password: str) -> bool:
+    """Verificación con el mismo costo que una real, para usuarios inexistentes. Siempre False."""
+    check_password_hash(_policy(hash_method())[1], password)
+    return False
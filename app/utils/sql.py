@@ -0,0 +1,66 @@
+"""
+Utilidades SQL dependientes del dialecto (SQLite / PostgreSQL).
+"""
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, Integer, String, cast, func, literal
+
+from ..core.database import db
+
+
+def dialect_name() -> str:
+    """Nombre del dialecto de la conexión activa (ej: 'sqlite', 'postgresql')."""
+    return db.session.get_bind().dialect.name
+
+
+def date_bucket(column, granularity: str = "day", dialect: str = None):
+    """
+    Expresión SQL que trunca una fecha al inicio de su bucket (día, semana ISO o mes).
+
+    SQLite no tiene date_trunc, así que se arma con date()/strftime() y el resultado es
+    un string 'YYYY-MM-DD'; en PostgreSQL se usa date_trunc y el resultado es una fecha.
+    Usar as_date() para normalizar el valor leído.
+    """
+    dialect = dialect or dialect_name()
+    if dialect == "sqlite":
+        if granularity == "day":
+            return func.date(column)
+        if granularity == "week":
+            # Retroceder al lunes: strftime('%w') es 0=domingo..6=sábado
+            dias = (cast(func.strftime("%w", column), Integer) + 6) % 7
+            return func.date(column, literal("-") + cast(dias, String) + literal(" days"))
+        return func.strftime("%Y-%m-01", column)
+    if granularity == "day":
+        return cast(column, Date)
+    return cast(func.date_trunc(granularity, column), Date)
+
+
+def as_date(value):
+    """Normaliza el valor de date_bucket() leído de la base a datetime.date."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def dialect_insert(table, dialect: str = None):
+    """
+    Retorna un INSERT con soporte de ON CONFLICT para el dialecto activo.
+
+    Returns:
+        Insert de sqlalchemy.dialects.<dialecto> o None si el dialecto no soporta upsert
+    """
+    dialect = dialect or dialect_name()
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+
+        return insert(table)
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+
+        return insert(table)
+    return None
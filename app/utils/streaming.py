@@ -0,0 +1,146 @@
+"""
+Respuestas JSON / NDJSON en streaming para listados grandes.
+
+Los items se serializan y envían a medida que se leen de la base, así la memoria del
+worker no crece con el tamaño del resultado y el primer byte sale enseguida.
+
+Compatibilidad con Flask-Compress: con COMPRESS_STREAMS (default) Flask-Compress
+bufferiza la respuesta completa para comprimirla. Para evitarlo las respuestas de
+stream_response quedan exentas (ver StreamingCompress) y se comprimen acá, en gzip
+incremental, solo si el cliente lo acepta; si no, salen sin Content-Encoding.
+"""
+
+import logging
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from flask import Response, current_app, request, stream_with_context
+from flask_compress import Compress
+
+from .exceptions import ValidationError
+
+logger = logging.getLogger(__name__)
+
+STREAM_FORMATS = ("json", "ndjson")
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Bytes mínimos acumulados antes de enviar un chunk
+FLUSH_BYTES = 16 * 1024
+
+
+class StreamingCompress(Compress):
+    """Flask-Compress que no toca las respuestas de stream_response (ya comprimidas o no)."""
+
+    def after_request(self, response):
+        if getattr(response, "compress_exempt", False):
+            return response
+        return super().after_request(response)
+
+
+def stream_format() -> Optional[str]:
+    """
+    Formato de streaming pedido con `?stream=json|ndjson` (None = respuesta normal).
+
+    Raises:
+        ValidationError: Si el formato no es válido
+    """
+    fmt = request.args.get("stream")
+    if not fmt:
+        return None
+    if fmt not in STREAM_FORMATS:
+        raise ValidationError(f"stream debe ser uno de: {', '.join(STREAM_FORMATS)}", field="stream")
+    return fmt
+
+
+def _json_chunks(items: Iterable[Any], envelope: Dict[str, Any], summary) -> Iterator[str]:
+    """Documento {..envelope, "data": [items...], ..summary()} escrito de a un item."""
+    dumps = current_app.json.dumps
+    head = dumps(envelope)
+    yield (head[:-1] + "," if len(head) > 2 else "{") + '"data":['
+    first = True
+    for item in items:
+        yield dumps(item) if first else "," + dumps(item)
+        first = False
+    tail = summary() if summary else {}
+    yield "]" + ("," + dumps(tail)[1:] if tail else "}")
+
+
+def _ndjson_chunks(items: Iterable[Any]) -> Iterator[str]:
+    dumps = current_app.json.dumps
+    for item in items:
+        yield dumps(item) + "\n"
+
+
+def _buffered(chunks: Iterator[str]) -> Iterator[bytes]:
+    """Agrupa chunks chicos para no enviar (ni comprimir) un fragmento por item."""
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= FLUSH_BYTES:
+            yield "".join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def _gzipped(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Comprime en gzip de forma incremental (un bloque comprimido por chunk)."""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _logged(chunks: Iterator[str]) -> Iterator[str]:
+    """Ya se envió el status 200: un error a mitad de camino solo puede loguearse y cortar."""
+    try:
+        yield from chunks
+    except Exception:
+        logger.exception("Error generando respuesta en streaming")
+
+
+def stream_response(
+    items: Iterable[Any],
+    fmt: str = "json",
+    envelope: Optional[Dict[str, Any]] = None,
+    summary=None,
+) -> Response:
+    """
+    Respuesta HTTP que serializa `items` a medida que se iteran.
+
+    Args:
+        items: Iterable (idealmente un generador sobre un cursor con yield_per)
+        fmt: "json" (un documento {"data": [...]}) o "ndjson" (un item por línea)
+        envelope: Campos del documento JSON antes de "data" (ej: {"success": True})
+        summary: Función sin argumentos que devuelve campos a agregar al final del
+            documento JSON, una vez iterados todos los items (ej: totales)
+
+    Returns:
+        Response en streaming
+    """
+    if fmt == "ndjson":
+        chunks = _ndjson_chunks(items)
+        mimetype = NDJSON_MIMETYPE
+    else:
+        chunks = _json_chunks(items, envelope or {}, summary)
+        mimetype = "application/json"
+
+    body = _buffered(_logged(chunks))
+    if "gzip" in request.headers.get("Accept-Encoding", "").lower():
+        body = _gzipped(body)
+        encoding = "gzip"
+    else:
+        encoding = None
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.compress_exempt = True
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -4,8 +4,11 @@ from flask import current_app as app
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
+from ..core.database import db
 from ..features.users.models import User
 from ..services.audit import audit_log
+from ..services.login_throttle import get_login_throttle
+from ..utils.passwords import hash_password, verify_dummy
 
 logger = logging.getLogger(__name__)
 bp = Blueprint("auth", __name__)
@@ -32,22 +35,39 @@ def login():
 
         logger.info(f"Intento de login para usuario: {username}")
 
+        # Usuario bloqueado por intentos fallidos: se corta antes de la base y del hash
+        throttle = get_login_throttle()
+        retry_after = throttle.retry_after(username)
+        if retry_after:
+            logger.warning(f"Login rechazado para {username}: bloqueado por intentos fallidos")
+            audit_log("login_attempt", {"username": username, "success": False, "reason": "locked"})
+            response = _login_error_response(
+                "Demasiados intentos fallidos. Por favor, intenta de nuevo más tarde.", status_code=429
+            )
+            return response[0], response[1], {"Retry-After": str(retry_after)}
+
         # Buscar usuario en base de datos
         user = User.query.filter_by(username=username, active=True).first()
 
         if not user:
+            # Mismo costo que una verificación real: el tiempo de respuesta no revela si existe
+            verify_dummy(password)
+            throttle.record_failure(username)
             logger.warning(f"Usuario {username} no encontrado o inactivo")
             audit_log("login_attempt", {"username": username, "success": False, "reason": "user_not_found"})
             return _login_error_response("Credenciales inválidas. Por favor, intenta de nuevo.")
 
         # Verificar contraseña
         if not user.check_password(password):
+            throttle.record_failure(username)
             logger.warning(f"Contraseña incorrecta para usuario {username}")
             audit_log("login_attempt", {"username": username, "success": False, "reason": "invalid_password"})
             return _login_error_response("Credenciales inválidas. Por favor, intenta de nuevo.")
 
         # Login exitoso
         logger.info(f"Login exitoso para usuario: {username} (rol: {user.role})")
+        throttle.reset(username)
+        _upgrade_password_hash(user, password)
 
         try:
             session.clear()
@@ -97,9 +117,22 @@ def _login_success_response(role, redirect_url):
     return response
 
 
-def _login_error_response(message):
+def _upgrade_password_hash(user, password):
+    """Rehashea con la política actual si el hash guardado usa otro método o parámetros."""
+    if not user.password_needs_rehash():
+        return
+    try:
+        user.password_hash = hash_password(password)
+        db.session.commit()
+        logger.info(f"Hash de contraseña actualizado para usuario: {user.username}")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error al actualizar hash de contraseña: {e}", exc_info=True)
+
+
+def _login_error_response(message, status_code=400):
     """Formatea respuesta de error para HTMX."""
     return (
         f'<div style="color: #dc2626; background: #fee2e2; padding: 12px; border-radius: 8px; margin-top: 20px;">'
         f"✗ {message}</div>"
-    ), 400
+    ), status_code
@@ -2,8 +2,8 @@ from flask import Blueprint, request, jsonify, current_app
 import logging
 
 from ..utils.validators import validate_email, sanitize_input
-from ..utils.exceptions import ValidationError, EmailError, StorageError
-from ..services.email_service import send_email_smtp
+from ..utils.exceptions import ValidationError, StorageError
+from ..services.email_outbox import enqueue_email
 from ..services.storage import save_submission_to_file
 
 logger = logging.getLogger(__name__)
@@ -45,27 +45,24 @@ def contact():
 
         logger.info(f"Nueva solicitud de contacto: {entity} - {name} ({email})")
 
-        # Intentar enviar email
-        email_sent = False
+        # Encolar el email: lo envía el sender en segundo plano (app.services.email_outbox),
+        # así el request no espera al servidor SMTP
+        email_queued = False
         subject = f"Nueva Solicitud de Propuesta - {entity}"
         body_text = _create_email_body_text(entity, name, email, phone, message)
         body_html = _create_email_body_html(entity, name, email, phone, message)
 
-        if current_app.config.get("MAIL_USERNAME") and current_app.config.get("MAIL_PASSWORD"):
+        recipients = current_app.config.get("CONTACT_RECIPIENTS", [])
+        if not recipients:
+            logger.warning("CONTACT_RECIPIENTS no configurado, no se enviará email")
+        else:
             try:
-                recipients = current_app.config.get("CONTACT_RECIPIENTS", [])
-                if not recipients:
-                    logger.warning("CONTACT_RECIPIENTS no configurado, no se enviará email")
-                else:
-                    send_email_smtp(
-                        recipients=recipients, subject=subject, body_text=body_text, body_html=body_html, reply_to=email
-                    )
-                    email_sent = True
-                    logger.info(f"Email enviado exitosamente para solicitud de {entity}")
-            except EmailError as e:
+                enqueue_email(recipients=recipients, subject=subject, body_text=body_text, body_html=body_html, reply_to=email)
+                email_queued = True
+                logger.info(f"Email encolado para solicitud de {entity}")
+            except StorageError as e:
                 # Log el error pero continuar (guardar la solicitud de todas formas)
-                logger.error(f"Error al enviar email para solicitud de {entity}: {e}")
-                # No re-lanzar, permitir que se guarde la solicitud
+                logger.error(f"Error al encolar email para solicitud de {entity}: {e}")
 
         # Guardar solicitud en archivo
         try:
@@ -77,7 +74,7 @@ def contact():
             raise
 
         # Respuesta exitosa
-        if email_sent:
+        if email_queued:
             return jsonify(
                 {
                     "success": True,
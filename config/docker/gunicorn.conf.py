@@ -0,0 +1,27 @@
+"""
+Hooks de gunicorn para las métricas multiproceso de prometheus_client.
+
+Con PROMETHEUS_MULTIPROC_DIR definida, cada worker escribe sus métricas en archivos
+de ese directorio y /metrics las suma (ver app/services/metrics.py). El directorio se
+vacía al arrancar el master (los archivos de una ejecución anterior sumarían valores
+viejos) y los gauges de un worker que termina se dan de baja.
+"""
+
+import glob
+import os
+
+_multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def on_starting(server):
+    if _multiproc_dir:
+        os.makedirs(_multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(_multiproc_dir, "*.db")):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if _multiproc_dir:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
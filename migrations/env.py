@@ -20,8 +20,10 @@ from app.features.users.models import User
 from app.features.cases.models import Case, CaseStatus
 from app.features.cases.promise import Promise
 from app.features.activities.models import Activity
-from app.features.contact.models import ContactSubmission
+from app.features.contact.models import ContactSubmission, OutboundEmail
 from app.features.carteras.models import Cartera
+from app.features.stats.models import DailyStat, Debtor
+from app.features.audit.models import AuditEvent
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,24 @@
+"""Add composite (created_at, id) index to cases
+
+Revision ID: 20261017100000
+Revises: a390bb4da27e
+Create Date: 2026-10-17 10:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017100000'
+down_revision = 'a390bb4da27e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Respalda el orden (created_at DESC, id DESC) de la paginación por cursor
+    op.create_index('ix_cases_created_at_id', 'cases', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cases_created_at_id', table_name='cases')
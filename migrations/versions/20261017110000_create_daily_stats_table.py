@@ -0,0 +1,73 @@
+"""Create daily_stats rollup table
+
+Revision ID: 20261017110000
+Revises: 20261017100000
+Create Date: 2026-10-17 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017110000'
+down_revision = '20261017100000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fecha', sa.Date(), nullable=False),
+        sa.Column('cartera_id', sa.Integer(), nullable=False),
+        sa.Column('gestor_id', sa.Integer(), nullable=False),
+        sa.Column('status_id', sa.Integer(), nullable=False),
+        sa.Column('casos_count', sa.Integer(), nullable=False),
+        sa.Column('casos_total', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('promesas_count', sa.Integer(), nullable=False),
+        sa.Column('promesas_cumplidas', sa.Integer(), nullable=False),
+        sa.Column('actividades_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('fecha', 'cartera_id', 'gestor_id', 'status_id', name='uq_daily_stats_key'),
+    )
+    op.create_index(op.f('ix_daily_stats_fecha'), 'daily_stats', ['fecha'], unique=False)
+    op.create_index(op.f('ix_daily_stats_cartera_id'), 'daily_stats', ['cartera_id'], unique=False)
+    op.create_index(op.f('ix_daily_stats_gestor_id'), 'daily_stats', ['gestor_id'], unique=False)
+    backfill()
+
+
+def backfill() -> None:
+    """Carga el rollup desde los datos existentes (igual que flask daily-stats rebuild)."""
+    day = 'date({})' if op.get_bind().dialect.name == 'sqlite' else 'CAST({} AS DATE)'
+    # gestor_id 0 = sin gestor (SIN_GESTOR)
+    op.execute(
+        f"""
+        INSERT INTO daily_stats (fecha, cartera_id, gestor_id, status_id, casos_count, casos_total,
+                                 promesas_count, promesas_cumplidas, actividades_count)
+        SELECT fecha, cartera_id, gestor_id, status_id, SUM(casos_count), SUM(casos_total),
+               SUM(promesas_count), SUM(promesas_cumplidas), SUM(actividades_count)
+        FROM (
+            SELECT {day.format('c.created_at')} AS fecha, c.cartera_id, COALESCE(c.assigned_to_id, 0) AS gestor_id,
+                   c.status_id, 1 AS casos_count, c.total AS casos_total, 0 AS promesas_count,
+                   0 AS promesas_cumplidas, 0 AS actividades_count
+            FROM cases c
+            UNION ALL
+            SELECT {day.format('p.created_at')}, c.cartera_id, COALESCE(c.assigned_to_id, 0), c.status_id, 0, 0, 1,
+                   CASE WHEN p.status = 'fulfilled' THEN 1 ELSE 0 END, 0
+            FROM promises p JOIN cases c ON c.id = p.case_id
+            UNION ALL
+            SELECT {day.format('a.created_at')}, c.cartera_id, COALESCE(c.assigned_to_id, 0), c.status_id, 0, 0, 0, 0, 1
+            FROM activities a JOIN cases c ON c.id = a.case_id
+        ) rollup
+        GROUP BY fecha, cartera_id, gestor_id, status_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_daily_stats_gestor_id'), table_name='daily_stats')
+    op.drop_index(op.f('ix_daily_stats_cartera_id'), table_name='daily_stats')
+    op.drop_index(op.f('ix_daily_stats_fecha'), table_name='daily_stats')
+    op.drop_table('daily_stats')
@@ -0,0 +1,41 @@
+"""Create email_outbox table
+
+Revision ID: 20261017120000
+Revises: 20261017110000
+Create Date: 2026-10-17 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017120000'
+down_revision = '20261017110000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipients', sa.Text(), nullable=False),
+        sa.Column('subject', sa.String(length=300), nullable=False),
+        sa.Column('body_text', sa.Text(), nullable=False),
+        sa.Column('body_html', sa.Text(), nullable=True),
+        sa.Column('reply_to', sa.String(length=254), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_status_next_attempt', table_name='email_outbox')
+    op.drop_table('email_outbox')
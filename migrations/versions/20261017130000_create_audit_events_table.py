@@ -0,0 +1,42 @@
+"""Create audit_events table
+
+Revision ID: 20261017130000
+Revises: 20261017120000
+Create Date: 2026-10-17 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017130000'
+down_revision = '20261017120000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('action', sa.String(length=100), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('username', sa.String(length=80), nullable=True),
+        sa.Column('role', sa.String(length=20), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('user_agent', sa.String(length=500), nullable=True),
+        sa.Column('details', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_audit_events_created_at'), 'audit_events', ['created_at'], unique=False)
+    op.create_index(op.f('ix_audit_events_action'), 'audit_events', ['action'], unique=False)
+    op.create_index(op.f('ix_audit_events_user_id'), 'audit_events', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_audit_events_user_id'), table_name='audit_events')
+    op.drop_index(op.f('ix_audit_events_action'), table_name='audit_events')
+    op.drop_index(op.f('ix_audit_events_created_at'), table_name='audit_events')
+    op.drop_table('audit_events')
@@ -0,0 +1,58 @@
+"""Add case search index (pg_trgm on PostgreSQL, FTS5 on SQLite)
+
+Revision ID: 20261017140000
+Revises: 20261017130000
+Create Date: 2026-10-17 14:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017140000'
+down_revision = '20261017130000'
+branch_labels = None
+depends_on = None
+
+SEARCH_COLUMNS = ('name', 'lastname', 'dni', 'nro_cliente')
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5("
+    "name, lastname, dni, nro_cliente, content='cases', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_ai AFTER INSERT ON cases BEGIN "
+    "INSERT INTO cases_fts(rowid, name, lastname, dni, nro_cliente) "
+    "VALUES (new.id, new.name, new.lastname, new.dni, new.nro_cliente); END",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_ad AFTER DELETE ON cases BEGIN "
+    "INSERT INTO cases_fts(cases_fts, rowid, name, lastname, dni, nro_cliente) "
+    "VALUES ('delete', old.id, old.name, old.lastname, old.dni, old.nro_cliente); END",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_au AFTER UPDATE OF name, lastname, dni, nro_cliente ON cases BEGIN "
+    "INSERT INTO cases_fts(cases_fts, rowid, name, lastname, dni, nro_cliente) "
+    "VALUES ('delete', old.id, old.name, old.lastname, old.dni, old.nro_cliente); "
+    "INSERT INTO cases_fts(rowid, name, lastname, dni, nro_cliente) "
+    "VALUES (new.id, new.name, new.lastname, new.dni, new.nro_cliente); END",
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in SEARCH_COLUMNS:
+            op.execute(f'CREATE INDEX IF NOT EXISTS ix_cases_{column}_trgm ON cases USING gin ({column} gin_trgm_ops)')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+        # Carga los casos existentes en el índice
+        op.execute("INSERT INTO cases_fts(cases_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for column in SEARCH_COLUMNS:
+            op.execute(f'DROP INDEX IF EXISTS ix_cases_{column}_trgm')
+    elif dialect == 'sqlite':
+        for trigger in ('cases_fts_ai', 'cases_fts_ad', 'cases_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS cases_fts')
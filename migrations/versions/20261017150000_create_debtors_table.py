@@ -0,0 +1,71 @@
+"""Create debtors table (per-DNI summary of cases)
+
+Revision ID: 20261017150000
+Revises: 20261017140000
+Create Date: 2026-10-17 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261017150000'
+down_revision = '20261017140000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'debtors',
+        sa.Column('dni', sa.String(length=50), nullable=False),
+        sa.Column('total_deudas', sa.Integer(), nullable=False),
+        sa.Column('deuda_consolidada', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('monto_inicial_total', sa.Numeric(precision=15, scale=2), nullable=False),
+        sa.Column('fecha_ultimo_pago', sa.Date(), nullable=True),
+        sa.Column('primera_deuda', sa.DateTime(), nullable=True),
+        sa.Column('ultima_deuda', sa.DateTime(), nullable=True),
+        sa.Column('cartera_ids', sa.JSON(), nullable=False),
+        sa.Column('gestor_ids', sa.JSON(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('dni'),
+    )
+    op.create_index('ix_debtors_ultima_deuda_dni', 'debtors', ['ultima_deuda', 'dni'], unique=False)
+    op.create_index('ix_debtors_deuda_consolidada', 'debtors', ['deuda_consolidada'], unique=False)
+    backfill()
+
+
+def _ids_json(column: str) -> str:
+    """Lista JSON ordenada de los valores distintos (no nulos) de la columna para el DNI."""
+    if op.get_bind().dialect.name == 'postgresql':
+        return (
+            f"COALESCE(json_agg(DISTINCT c.{column} ORDER BY c.{column}) "
+            f"FILTER (WHERE c.{column} IS NOT NULL), '[]'::json)"
+        )
+    return (
+        f"(SELECT json_group_array(v) FROM (SELECT DISTINCT c2.{column} AS v FROM cases c2 "
+        f"WHERE c2.dni = c.dni AND c2.{column} IS NOT NULL ORDER BY v))"
+    )
+
+
+def backfill() -> None:
+    """Carga un resumen por DNI desde los casos existentes (igual que flask debtors rebuild)."""
+    op.execute(
+        f"""
+        INSERT INTO debtors (dni, total_deudas, deuda_consolidada, monto_inicial_total, fecha_ultimo_pago,
+                             primera_deuda, ultima_deuda, cartera_ids, gestor_ids, updated_at)
+        SELECT c.dni, COUNT(c.id), COALESCE(SUM(c.total), 0), COALESCE(SUM(c.monto_inicial), 0),
+               MAX(c.fecha_ultimo_pago), MIN(c.created_at), MAX(c.created_at),
+               {_ids_json('cartera_id')}, {_ids_json('assigned_to_id')}, CURRENT_TIMESTAMP
+        FROM cases c
+        WHERE c.dni IS NOT NULL AND c.dni <> ''
+        GROUP BY c.dni
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_debtors_deuda_consolidada', table_name='debtors')
+    op.drop_index('ix_debtors_ultima_deuda_dni', table_name='debtors')
+    op.drop_table('debtors')
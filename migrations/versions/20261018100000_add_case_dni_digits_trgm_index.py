@@ -0,0 +1,29 @@
+"""Add trigram index on the DNI without dots (numeric case search)
+
+Revision ID: 20261018100000
+Revises: 20261017150000
+Create Date: 2026-10-18 10:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018100000'
+down_revision = '20261017150000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # La búsqueda numérica compara por subcadena contra replace(dni, '.', '')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_cases_dni_digits_trgm ON cases USING gin ((replace(dni, '.', '')) gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_cases_dni_digits_trgm')
@@ -1,19 +1,25 @@
 #!/usr/bin/env python3
 """
 Script para importar casos desde datos tabulares.
+
+Sin argumentos importa CASES_DATA (casos de ejemplo). Con un archivo CSV/XLSX/JSON usa
+el motor de importación masiva (app/services/case_import.py):
+
+    python scripts/dev/import_cases.py cartera.csv --cartera-id 2 --checkpoint data/import.ckpt
 """
+import argparse
+import json
 import sys
 import os
-from decimal import Decimal
-from datetime import datetime
 
 # Agregar el directorio raíz al path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from app import create_app
 from app.core.database import db
-from app.features.cases.models import Case, CaseStatus
+from app.features.cases.models import CaseStatus
 from app.features.carteras.models import Cartera
+from app.services.case_import import CONFLICT_MODES, import_cases as import_cases_bulk, read_rows
 
 # Datos de casos a importar
 CASES_DATA = [
@@ -141,63 +147,42 @@ CASES_DATA = [
 ]
 
 
-def parse_date(date_str):
-    """Parsea fecha en formato DD/MM/YYYY o MM/DD/YYYY."""
-    if not date_str:
-        return None
-    try:
-        # Intentar formato DD/MM/YYYY primero (más común en Argentina)
-        return datetime.strptime(date_str, '%d/%m/%Y').date()
-    except ValueError:
-        try:
-            # Intentar formato MM/DD/YYYY
-            return datetime.strptime(date_str, '%m/%d/%Y').date()
-        except ValueError:
-            return None
+def load_checkpoint(path):
+    """Fila desde la que retomar según el checkpoint (0 si no existe)."""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('next_row', 0)
 
 
-def parse_amount(amount_str):
-    """Parsea monto removiendo símbolos de moneda y espacios."""
-    if not amount_str:
-        return None
-    # Remover $, espacios, comas y puntos de miles
-    # Formato puede ser: "$  400,000.00" o "400000.00"
-    cleaned = amount_str.replace('$', '').replace(' ', '').strip()
-    # Si tiene comas, asumir formato con punto decimal: "400,000.00" -> "400000.00"
-    if ',' in cleaned and '.' in cleaned:
-        # Formato: "400,000.00" -> quitar comas
-        cleaned = cleaned.replace(',', '')
-    elif ',' in cleaned:
-        # Formato: "400,000" -> podría ser miles o decimales
-        # Si hay más de 3 dígitos después de la coma, es decimal (formato europeo)
-        parts = cleaned.split(',')
-        if len(parts) == 2 and len(parts[1]) <= 2:
-            # Es decimal con coma: "400,50" -> "400.50"
-            cleaned = parts[0] + '.' + parts[1]
-        else:
-            # Es miles: "400,000" -> "400000"
-            cleaned = cleaned.replace(',', '')
-    try:
-        return Decimal(cleaned)
-    except:
-        return None
+def save_checkpoint(path, stats):
+    """Guarda el progreso confirmado (se llama después de cada commit de chunk)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(stats.to_dict(), f)
+    os.replace(tmp, path)
 
 
-def import_cases():
+def import_cases(args=None):
     """Importa los casos a la base de datos."""
+    args = args or parse_args([])
     app = create_app()
     
     with app.app_context():
         # Obtener estado por defecto (Sin Arreglo)
-        default_status = CaseStatus.query.filter_by(nombre='Sin Arreglo', activo=True).first()
+        default_status = CaseStatus.query.get(args.status_id) if args.status_id else None
+        if not default_status:
+            default_status = CaseStatus.query.filter_by(nombre='Sin Arreglo', activo=True).first()
         if not default_status:
             print("ERROR: No se encontró el estado 'Sin Arreglo'. Creando...")
             default_status = CaseStatus(id=1, nombre='Sin Arreglo', activo=True)
             db.session.add(default_status)
             db.session.commit()
         
-        # Obtener primera cartera activa
-        cartera = Cartera.query.filter_by(activo=True).first()
+        # Obtener cartera (la indicada o la primera activa)
+        cartera = Cartera.query.get(args.cartera_id) if args.cartera_id else None
+        if not cartera:
+            cartera = Cartera.query.filter_by(activo=True).first()
         if not cartera:
             print("ERROR: No se encontró ninguna cartera activa. Creando 'Cristal Cash'...")
             cartera = Cartera(nombre='Cristal Cash', activo=True)
@@ -206,51 +191,54 @@ def import_cases():
         
         print(f"Usando cartera: {cartera.nombre} (ID: {cartera.id})")
         print(f"Usando estado: {default_status.nombre} (ID: {default_status.id})")
-        print(f"\nImportando {len(CASES_DATA)} casos...\n")
-        
-        imported = 0
-        skipped = 0
-        
-        for case_data in CASES_DATA:
-            # Verificar si el caso ya existe por nro_cliente
-            existing = Case.query.filter_by(nro_cliente=case_data['nro_cliente']).first()
-            if existing:
-                print(f"[SKIP] Caso {case_data['nro_cliente']} ya existe, saltando...")
-                skipped += 1
-                continue
-            
-            # Parsear datos
-            monto_inicial = parse_amount(case_data['monto_inicial'])
-            total = parse_amount(case_data['total'])
-            fecha_ultimo_pago = parse_date(case_data['fecha_ultimo_pago'])
-            
-            # Crear caso
-            case = Case(
-                nro_cliente=case_data['nro_cliente'],
-                dni=case_data['dni'],
-                name=case_data['name'],
-                lastname=case_data['lastname'],
-                calle_nombre=case_data['calle_nombre'],
-                calle_nro=case_data['calle_nro'],
-                localidad=case_data['localidad'],
-                provincia=case_data['provincia'],
-                cp=case_data['cp'],
-                telefono=case_data['telefono'],
-                monto_inicial=monto_inicial,
-                total=total if total else Decimal('0'),
-                fecha_ultimo_pago=fecha_ultimo_pago,
-                status_id=default_status.id,
-                cartera_id=cartera.id,
+
+        rows = read_rows(args.file, args.format) if args.file else CASES_DATA
+        start_row = load_checkpoint(args.checkpoint)
+        if start_row:
+            print(f"Retomando desde la fila {start_row + 1} (checkpoint {args.checkpoint})")
+        print(f"\nImportando {args.file or f'{len(CASES_DATA)} casos de ejemplo'}...\n")
+
+        def on_chunk(stats):
+            if args.checkpoint:
+                save_checkpoint(args.checkpoint, stats)
+            print(
+                f"[CHUNK {stats.chunks}] {stats.rows} filas | {stats.inserted} nuevas, "
+                f"{stats.updated} actualizadas, {stats.skipped} saltadas | {stats.rows_per_second:.0f} filas/s"
             )
-            
-            db.session.add(case)
-            imported += 1
-            print(f"[OK] Caso {case_data['nro_cliente']} - {case_data['name']} {case_data['lastname']} agregado")
-        
-        db.session.commit()
-        print(f"\n[OK] Importacion completada: {imported} casos importados, {skipped} saltados")
 
+        stats = import_cases_bulk(
+            rows,
+            cartera_id=cartera.id,
+            status_id=default_status.id,
+            assigned_to_id=args.gestor_id,
+            on_conflict=args.on_conflict,
+            chunk_size=args.chunk_size,
+            start_row=start_row,
+            on_chunk=on_chunk,
+        )
+
+        for error in stats.errors:
+            print(f"[WARN] {error}")
+        print(
+            f"\n[OK] Importacion completada: {stats.inserted} casos importados, {stats.updated} actualizados, "
+            f"{stats.skipped} saltados, {stats.invalid} invalidos en {stats.elapsed:.1f}s "
+            f"({stats.rows_per_second:.0f} filas/s)"
+        )
 
-if __name__ == '__main__':
-    import_cases()
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Importa casos desde CSV/XLSX/JSON")
+    parser.add_argument('file', nargs='?', help="Archivo a importar (sin archivo: casos de ejemplo)")
+    parser.add_argument('--format', choices=['csv', 'xlsx', 'json'], help="Formato (default: por extensión)")
+    parser.add_argument('--cartera-id', type=int, help="Cartera destino (default: primera activa)")
+    parser.add_argument('--status-id', type=int, help="Estado inicial (default: 'Sin Arreglo')")
+    parser.add_argument('--gestor-id', type=int, help="Gestor a asignar (default: sin asignar)")
+    parser.add_argument('--on-conflict', choices=CONFLICT_MODES, default='skip',
+                        help="Si el nro_cliente ya existe: saltear o actualizar datos y montos")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Filas por commit")
+    parser.add_argument('--checkpoint', help="Archivo de progreso para retomar una importación cortada")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    import_cases(parse_args())
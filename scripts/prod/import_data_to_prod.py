@@ -18,6 +18,9 @@ from app.features.carteras.models import Cartera
 from app.features.cases.models import Case, CaseStatus
 from app.features.activities.models import Activity
 from app.features.cases.promise import Promise
+from app.services.case_import import import_cases
+from app.services.daily_stats import rebuild_daily_stats
+from sqlalchemy import insert, select
 
 def parse_fecha(fecha_str):
     """Convierte fecha de formato ISO a objeto date."""
@@ -28,7 +31,7 @@ def parse_fecha(fecha_str):
     except:
         return None
 
-def import_data(json_file='data/export_for_prod.json'):
+def import_data(json_file='data/export_for_prod.json', chunk_size=1000):
     """Importa datos desde archivo JSON a producción."""
     app = create_app()
     
@@ -48,9 +51,10 @@ def import_data(json_file='data/export_for_prod.json'):
         print("[IMPORT] Importando carteras...")
         carteras_importadas = 0
         carteras_map = {}  # Mapeo de ID antiguo -> ID nuevo
+        carteras_existentes = {c.nombre: c for c in Cartera.query.all()}
         for cartera_data in data.get('carteras', []):
             # Verificar si ya existe por nombre
-            existing = Cartera.query.filter_by(nombre=cartera_data['nombre']).first()
+            existing = carteras_existentes.get(cartera_data['nombre'])
             if existing:
                 carteras_map[cartera_data['id']] = existing.id
                 print(f"   [SKIP] Cartera '{cartera_data['nombre']}' ya existe (ID: {existing.id})")
@@ -71,9 +75,10 @@ def import_data(json_file='data/export_for_prod.json'):
         print("[IMPORT] Importando estados de caso...")
         statuses_importados = 0
         statuses_map = {}  # Mapeo de ID antiguo -> ID nuevo
+        statuses_existentes = {st.nombre: st for st in CaseStatus.query.all()}
         for status_data in data.get('case_statuses', []):
             # Verificar si ya existe por nombre
-            existing = CaseStatus.query.filter_by(nombre=status_data['nombre']).first()
+            existing = statuses_existentes.get(status_data['nombre'])
             if existing:
                 statuses_map[status_data['id']] = existing.id
                 print(f"   [SKIP] Estado '{status_data['nombre']}' ya existe (ID: {existing.id})")
@@ -91,11 +96,9 @@ def import_data(json_file='data/export_for_prod.json'):
         db.session.commit()
         print(f"   [SUCCESS] {statuses_importados} estados nuevos importados\n")
         
-        # 3. Importar casos
+        # 3. Importar casos (motor de importación masiva: un SELECT y un INSERT por chunk)
         print("[IMPORT] Importando casos...")
-        casos_importados = 0
-        casos_skipped = 0
-        casos_map = {}  # Mapeo de nro_cliente -> ID nuevo (para actividades/promesas)
+        cases_data = data.get('cases', [])
         
         # Verificar que el usuario ID 2 existe (gestor por defecto)
         from app.features.users.models import User
@@ -107,160 +110,109 @@ def import_data(json_file='data/export_for_prod.json'):
             gestor_default_id = 2
             print(f"   [INFO] Casos se asignarán automáticamente a: {gestor_default.username} (ID: {gestor_default.id})")
         
-        for case_data in data.get('cases', []):
-            # Verificar si ya existe por nro_cliente
-            nro_cliente = case_data.get('nro_cliente')
-            if nro_cliente:
-                existing = Case.query.filter_by(nro_cliente=nro_cliente).first()
-                if existing:
-                    casos_map[nro_cliente] = existing.id
-                    casos_skipped += 1
-                    print(f"   [SKIP] Caso nro_cliente '{nro_cliente}' ya existe (ID: {existing.id}), saltando...")
-                    continue
-            
-            # Mapear IDs de relaciones
-            cartera_id = carteras_map.get(case_data.get('cartera_id'))
-            status_id = statuses_map.get(case_data.get('status_id'), case_data.get('status_id', 1))
-            
-            if not cartera_id:
-                print(f"   [WARN] Caso {nro_cliente}: cartera_id no encontrado, usando primera cartera disponible")
-                primera_cartera = Cartera.query.first()
-                if primera_cartera:
-                    cartera_id = primera_cartera.id
-                else:
-                    print(f"   [ERROR] No hay carteras disponibles, saltando caso")
-                    continue
-            
-            # Asignar assigned_to_id: usar el del export si existe, sino usar gestor_default_id (2)
-            assigned_to_id = case_data.get('assigned_to_id')
-            if not assigned_to_id and gestor_default_id:
-                assigned_to_id = gestor_default_id
-            
-            new_case = Case(
-                nro_cliente=nro_cliente,
-                name=case_data['name'],
-                lastname=case_data['lastname'],
-                dni=case_data.get('dni'),
-                total=Decimal(str(case_data['total'])),
-                monto_inicial=Decimal(str(case_data['monto_inicial'])) if case_data.get('monto_inicial') else None,
-                fecha_ultimo_pago=parse_fecha(case_data.get('fecha_ultimo_pago')),
-                telefono=case_data.get('telefono'),
-                calle_nombre=case_data.get('calle_nombre'),
-                calle_nro=case_data.get('calle_nro'),
-                localidad=case_data.get('localidad'),
-                cp=case_data.get('cp'),
-                provincia=case_data.get('provincia'),
-                status_id=status_id,
-                cartera_id=cartera_id,
-                assigned_to_id=assigned_to_id,  # Usa el valor calculado (2 por defecto si no viene en export)
-                notes=case_data.get('notes')
-            )
-            db.session.add(new_case)
-            db.session.flush()
-            if nro_cliente:
-                casos_map[nro_cliente] = new_case.id
-            casos_importados += 1
-            print(f"   [OK] Caso '{nro_cliente}' importado (ID: {new_case.id}, assigned_to_id: {assigned_to_id})")
+        primera_cartera = Cartera.query.order_by(Cartera.id).first()
+        if not primera_cartera:
+            print("   [ERROR] No hay carteras disponibles, no se importan casos")
+            return
         
-        db.session.commit()
-        print(f"   [SUCCESS] {casos_importados} casos nuevos importados, {casos_skipped} saltados (ya existían)\n")
+        def mapped_cases():
+            """Filas del export con los IDs de cartera/estado/gestor de producción."""
+            for case_data in cases_data:
+                row = dict(case_data)
+                row.pop('id', None)
+                # Si la cartera no se mapeó se usa la primera cartera disponible
+                row['cartera_id'] = carteras_map.get(case_data.get('cartera_id')) or primera_cartera.id
+                row['status_id'] = statuses_map.get(case_data.get('status_id'), case_data.get('status_id') or 1)
+                # Asignar assigned_to_id: usar el del export si existe, sino usar gestor_default_id (2)
+                row['assigned_to_id'] = case_data.get('assigned_to_id') or gestor_default_id
+                yield row
+        
+        def on_chunk(stats):
+            print(f"   [CHUNK {stats.chunks}] {stats.rows}/{len(cases_data)} casos ({stats.rows_per_second:.0f} casos/s)")
         
-        # 4. Crear mapeo de case_id antiguo -> nuevo usando nro_cliente
-        # Necesitamos el case_id original del export para mapear actividades/promesas
+        stats = import_cases(mapped_cases(), on_conflict='skip', chunk_size=chunk_size, on_chunk=on_chunk)
+        for error in stats.errors:
+            print(f"   [WARN] {error}")
+        if stats.invalid > len(stats.errors):
+            print(f"   [WARN] ... y {stats.invalid - len(stats.errors)} filas inválidas más")
+        print(
+            f"   [SUCCESS] {stats.inserted} casos nuevos importados, {stats.skipped} saltados (ya existían o repetidos), "
+            f"{stats.invalid} inválidos\n"
+        )
+        
+        # 4. Mapeo case_id del export -> case_id nuevo (por nro_cliente, una query por chunk)
         print("[MAP] Creando mapeo de case_id...")
-        case_id_map = {}  # case_id_antiguo -> case_id_nuevo
-        for case_data in data.get('cases', []):
-            old_case_id = case_data.get('id')  # Si el export incluye el ID original
-            nro_cliente = case_data.get('nro_cliente')
-            if nro_cliente and nro_cliente in casos_map:
-                # Si tenemos el ID antiguo en el export, lo mapeamos
-                # Nota: El script de exportación no exporta el ID, así que usaremos nro_cliente
-                pass
+        nro_por_case_id = {c['id']: c['nro_cliente'] for c in cases_data if c.get('id') and c.get('nro_cliente')}
+        id_por_nro = {}
+        nros = list(set(nro_por_case_id.values()))
+        for k in range(0, len(nros), chunk_size):
+            chunk = nros[k:k + chunk_size]
+            for case_id, nro_cliente in db.session.execute(
+                select(Case.id, Case.nro_cliente).where(Case.nro_cliente.in_(chunk)).order_by(Case.id)
+            ):
+                id_por_nro.setdefault(nro_cliente, case_id)
+        case_id_map = {old: id_por_nro[nro] for old, nro in nro_por_case_id.items() if nro in id_por_nro}
+        print(f"   [OK] {len(case_id_map)} casos mapeados\n")
+        
+        def bulk_insert(model, rows):
+            """Inserta filas en chunks (INSERT multi-fila) con un commit por chunk."""
+            for k in range(0, len(rows), chunk_size):
+                db.session.execute(insert(model.__table__), rows[k:k + chunk_size])
+                db.session.commit()
         
-        # 4. Importar actividades
+        # 5. Importar actividades
         print("[IMPORT] Importando actividades...")
-        actividades_importadas = 0
+        actividades = []
         actividades_skipped = 0
-        # Necesitamos mapear case_id usando nro_cliente
-        # Como el export no incluye el case_id original, necesitamos buscar por nro_cliente
-        # Para esto, necesitaríamos modificar el export para incluir el case_id original
-        # Por ahora, intentamos buscar el caso por los datos disponibles
         for activity_data in data.get('activities', []):
-            old_case_id = activity_data.get('case_id')
-            # Buscar el caso en los datos exportados para obtener nro_cliente
-            case_data = next((c for c in data.get('cases', []) if c.get('id') == old_case_id), None)
-            if not case_data:
-                actividades_skipped += 1
-                continue
-            
-            nro_cliente = case_data.get('nro_cliente')
-            if not nro_cliente:
-                actividades_skipped += 1
-                continue
-            
-            # Buscar el caso nuevo por nro_cliente
-            new_case = Case.query.filter_by(nro_cliente=nro_cliente).first()
-            if not new_case:
+            new_case_id = case_id_map.get(activity_data.get('case_id'))
+            if not new_case_id:
                 actividades_skipped += 1
                 continue
-            
-            new_activity = Activity(
-                case_id=new_case.id,
-                type=activity_data.get('type', 'note'),
-                notes=activity_data.get('notes'),
-                created_by_id=activity_data.get('created_by_id', 1)  # Default a admin
-            )
-            db.session.add(new_activity)
-            actividades_importadas += 1
-        
-        db.session.commit()
+            actividades.append({
+                'case_id': new_case_id,
+                'type': activity_data.get('type', 'note'),
+                'notes': activity_data.get('notes'),
+                'created_by_id': activity_data.get('created_by_id', 1),  # Default a admin
+            })
+        bulk_insert(Activity, actividades)
+        actividades_importadas = len(actividades)
         print(f"   [SUCCESS] {actividades_importadas} actividades importadas, {actividades_skipped} saltadas\n")
         
-        # 5. Importar promesas
+        # 6. Importar promesas
         print("[IMPORT] Importando promesas...")
-        promesas_importadas = 0
+        promesas = []
         promesas_skipped = 0
         for promise_data in data.get('promises', []):
-            old_case_id = promise_data.get('case_id')
-            # Buscar el caso en los datos exportados
-            case_data = next((c for c in data.get('cases', []) if c.get('id') == old_case_id), None)
-            if not case_data:
+            new_case_id = case_id_map.get(promise_data.get('case_id'))
+            promise_date = parse_fecha(promise_data.get('promise_date'))
+            if not new_case_id or not promise_date:
                 promesas_skipped += 1
                 continue
-            
-            nro_cliente = case_data.get('nro_cliente')
-            if not nro_cliente:
-                promesas_skipped += 1
-                continue
-            
-            # Buscar el caso nuevo por nro_cliente
-            new_case = Case.query.filter_by(nro_cliente=nro_cliente).first()
-            if not new_case:
-                promesas_skipped += 1
-                continue
-            
-            new_promise = Promise(
-                case_id=new_case.id,
-                amount=Decimal(str(promise_data.get('amount', 0))),
-                promise_date=parse_fecha(promise_data.get('promise_date')),
-                status=promise_data.get('status', 'pending'),
-                fulfilled_date=parse_fecha(promise_data.get('fulfilled_date')),
-                notes=promise_data.get('notes')
-            )
-            db.session.add(new_promise)
-            promesas_importadas += 1
-        
-        db.session.commit()
+            promesas.append({
+                'case_id': new_case_id,
+                'amount': Decimal(str(promise_data.get('amount', 0))),
+                'promise_date': promise_date,
+                'status': promise_data.get('status', 'pending'),
+                'fulfilled_date': parse_fecha(promise_data.get('fulfilled_date')),
+                'notes': promise_data.get('notes'),
+            })
+        bulk_insert(Promise, promesas)
+        promesas_importadas = len(promesas)
         print(f"   [SUCCESS] {promesas_importadas} promesas importadas, {promesas_skipped} saltadas\n")
         
+        # Actividades y promesas se insertaron sin el ORM: recalcular el rollup de dashboards
+        print("[STATS] Recalculando daily_stats...")
+        rebuild_daily_stats()
+        
         print("[SUCCESS] Importación completada!")
         print(f"\n[SUMMARY] Resumen:")
         print(f"   - Carteras: {carteras_importadas} nuevas")
         print(f"   - Estados: {statuses_importados} nuevos")
-        print(f"   - Casos: {casos_importados} nuevos, {casos_skipped} saltados")
+        print(f"   - Casos: {stats.inserted} nuevos, {stats.skipped} saltados, {stats.invalid} inválidos")
         print(f"   - Actividades: {actividades_importadas} importadas, {actividades_skipped} saltadas")
         print(f"   - Promesas: {promesas_importadas} importadas, {promesas_skipped} saltadas")
 
 if __name__ == '__main__':
-    import_data()
+    import_data(*sys.argv[1:2])
 
@@ -227,7 +227,12 @@ async function loadComparisonChart() {
 // Cargar ranking de gestores
 async function loadGestoresRanking() {
     try {
-        const response = await fetch('/api/dashboard/gestores/ranking?limit=10');
+        const params = new URLSearchParams({ limit: 10 });
+        if (currentFilters.start_date) params.append('start_date', currentFilters.start_date);
+        if (currentFilters.end_date) params.append('end_date', currentFilters.end_date);
+        if (currentFilters.cartera_id) params.append('cartera_id', currentFilters.cartera_id);
+        
+        const response = await fetch(`/api/dashboard/gestores/ranking?${params}`);
         const result = await response.json();
         
         if (result.success) {
@@ -8,8 +8,14 @@ let carteraActual = null;  // Ahora será un objeto con id y nombre
 let carteraActualId = null;  // ID de la cartera actual
 let indiceGrupoActual = 0;  // Índice del grupo actual (cliente)
 let indiceDeudaActual = 0;  // Índice de la deuda actual dentro del grupo
-let gruposCarteraActual = [];  // Grupos de clientes (agrupados por DNI) de la cartera actual
-let todosLosGrupos = [];  // Todos los grupos cargados desde la API
+let gruposCarteraActual = [];  // Grupos de clientes (agrupados por DNI) de la lista actual, por posición
+let todosLosGrupos = [];  // Alias de gruposCarteraActual (páginas cargadas desde la API)
+let totalGruposWorklist = 0;  // Total de clientes de la lista actual (informado por la API)
+let paginasCargadas = new Set();  // Páginas de la lista ya cargadas
+let paginasEnCurso = new Map();  // Páginas pedidas y todavía sin respuesta
+let worklistVersion = 0;  // Se incrementa al cambiar cartera o búsqueda (descarta respuestas viejas)
+let busquedaActual = '';  // Término de búsqueda enviado al servidor
+let busquedaTimer = null;
 let isLoading = false;
 let carterasDisponibles = [];  // Lista de carteras cargadas desde la API
 
@@ -192,159 +198,138 @@ function mapCaseToCliente(caseData) {
     };
 }
 
-// Función para cargar casos agrupados desde la API
-async function loadCasosFromAPI() {
-    if (isLoading) return;
-    
-    isLoading = true;
-    try {
-        // Usar el nuevo endpoint que retorna datos agrupados por DNI
-        const url = carteraActualId 
-            ? `/api/cases/gestor/agrupados?cartera_id=${carteraActualId}`
-            : '/api/cases/gestor/agrupados';
-        const response = await fetch(url);
-        
-        // Verificar si la respuesta es OK
+// Tamaño de página de la lista de trabajo (/api/cases/gestor/worklist)
+const WORKLIST_PAGE_SIZE = 50;
+// Cuántos clientes antes del final de lo cargado se pide la página siguiente
+const WORKLIST_PREFETCH = 5;
+
+// Construye la URL de una página de la lista de trabajo con los filtros actuales
+function buildWorklistUrl(page) {
+    const params = new URLSearchParams({ page: page, per_page: WORKLIST_PAGE_SIZE });
+    if (carteraActualId) params.set('cartera_id', carteraActualId);
+    if (busquedaActual) params.set('search', busquedaActual);
+    return `/api/cases/gestor/worklist?${params.toString()}`;
+}
+
+// Función para traer una página de la lista de trabajo y ubicar sus grupos por posición
+// (gruposCarteraActual es un array disperso con length = total de clientes)
+function fetchWorklistPage(page) {
+    if (paginasCargadas.has(page)) return Promise.resolve(true);
+    if (paginasEnCurso.has(page)) return paginasEnCurso.get(page);
+
+    const version = worklistVersion;
+    const request = (async () => {
+        const response = await fetch(buildWorklistUrl(page));
         if (!response.ok) {
             const errorText = await response.text();
             console.error('[ERROR] Respuesta del servidor no OK:', response.status, errorText);
             throw new Error(`Error del servidor: ${response.status} - ${errorText}`);
         }
-        
+
         const result = await response.json();
-        console.log('[DEBUG] Respuesta de la API:', result);
-        
-        if (result.success) {
-            // Limpiar datos antiguos primero
-            todosLosGrupos = [];
-            gruposCarteraActual = [];
-            grupoClienteActual = null;
-            clienteActual = null;
-            deudaActual = null;
-            indiceGrupoActual = 0;
-            indiceDeudaActual = 0;
-            
-            // Cargar nuevos datos (ya vienen agrupados por DNI)
-            todosLosGrupos = result.data || [];
-            console.log(`[OK] Cargados ${todosLosGrupos.length} grupos (clientes) desde la API, ${result.total_deudas} deudas totales`);
-            
-            // DEBUG: Verificar grupos con múltiples deudas
-            todosLosGrupos.forEach(grupo => {
-                console.log(`[DEBUG] Grupo DNI ${grupo.dni}: total_deudas=${grupo.total_deudas}, deudas.length=${grupo.deudas?.length || 0}`);
-                if (grupo.total_deudas > 1 || (grupo.deudas && grupo.deudas.length > 1)) {
-                    console.log(`[DEBUG] Grupo DNI ${grupo.dni}: ${grupo.total_deudas} deudas (array length: ${grupo.deudas?.length})`, grupo.deudas.map(d => ({id: d.id, nro_cliente: d.nro_cliente, cartera_id: d.cartera_id, total: d.total})));
-                }
-                // Verificar si hay discrepancia
-                if (grupo.total_deudas !== (grupo.deudas?.length || 0)) {
-                    console.error(`[ERROR] Discrepancia en grupo DNI ${grupo.dni}: total_deudas=${grupo.total_deudas} pero deudas.length=${grupo.deudas?.length || 0}`);
-                }
-                // Log especial para DNI 20737173
-                if (grupo.dni === '20737173') {
-                    console.log(`[DEBUG ESPECIAL] DNI 20737173 encontrado:`, {
-                        total_deudas: grupo.total_deudas,
-                        deudas_length: grupo.deudas?.length || 0,
-                        deudas: grupo.deudas,
-                        grupo_completo: grupo
-                    });
-                }
-            });
-            
-            // Si no hay grupos, mostrar mensaje y salir
-            if (todosLosGrupos.length === 0) {
-                showNoCasesMessage();
-                updateTotalCounter();
-                return;
-            }
-            
-            // Filtrar grupos por cartera actual si hay cartera seleccionada
-            // IMPORTANTE: Mantener todas las deudas del grupo, solo filtrar grupos que tengan al menos una deuda en la cartera
-            if (carteraActualId) {
-                gruposCarteraActual = todosLosGrupos.filter(grupo => {
-                    // Verificar si alguna deuda del grupo pertenece a la cartera actual
-                    const tieneDeudaEnCartera = grupo.deudas.some(deuda => deuda.cartera_id === carteraActualId);
-                    if (tieneDeudaEnCartera && grupo.total_deudas > 1) {
-                        console.log(`[DEBUG] Grupo DNI ${grupo.dni} tiene ${grupo.total_deudas} deudas, al menos una en cartera ${carteraActualId}`);
-                    }
-                    return tieneDeudaEnCartera;
-                });
-            } else {
-                gruposCarteraActual = todosLosGrupos;
-            }
-            
-            // Si no hay cartera seleccionada y hay grupos, seleccionar la primera cartera con casos
-            if (!carteraActualId && todosLosGrupos.length > 0) {
-                // Obtener la primera cartera que tenga casos
-                const primeraCarteraConCasos = carterasDisponibles.find(c => 
-                    todosLosGrupos.some(grupo => 
-                        grupo.deudas.some(deuda => deuda.cartera_id === c.id)
-                    )
-                );
-                if (primeraCarteraConCasos) {
-                    selectCartera(primeraCarteraConCasos.id, primeraCarteraConCasos.nombre);
-                    return; // selectCartera ya actualiza todo
-                }
-            }
-            
-            // Cargar primer grupo si hay
-            if (gruposCarteraActual.length > 0) {
-                indiceGrupoActual = 0;
-                indiceDeudaActual = 0;
-                cargarGrupoCliente(gruposCarteraActual[0], 0, 0);
-            } else {
-                // Mostrar mensaje de que no hay casos
-                showNoCasesMessage();
-            }
-            
-            // Actualizar contador total
-            updateTotalCounter();
+        // Los filtros cambiaron mientras tanto: la respuesta es de otra lista
+        if (version !== worklistVersion) return false;
+        if (!result.success) {
+            throw new Error(result.error || 'Error al cargar casos');
+        }
+
+        totalGruposWorklist = result.pagination.total;
+        gruposCarteraActual.length = totalGruposWorklist;
+        const inicio = (page - 1) * WORKLIST_PAGE_SIZE;
+        (result.data || []).forEach((grupo, i) => {
+            gruposCarteraActual[inicio + i] = grupo;
+        });
+        paginasCargadas.add(page);
+        console.log(`[OK] Página ${page}: ${result.data.length} grupos (clientes), ${result.total_deudas} deudas; total ${totalGruposWorklist} clientes`);
+        return true;
+    })();
+
+    paginasEnCurso.set(page, request);
+    request.finally(() => {
+        if (paginasEnCurso.get(page) === request) paginasEnCurso.delete(page);
+    }).catch(() => {});
+    return request;
+}
+
+// Función para asegurar que el grupo en `indice` esté cargado (y adelantar la página siguiente)
+async function asegurarGrupo(indice) {
+    const page = Math.floor(indice / WORKLIST_PAGE_SIZE) + 1;
+    if (!gruposCarteraActual[indice]) {
+        await fetchWorklistPage(page);
+    }
+
+    const siguiente = page + 1;
+    const restantesEnPagina = page * WORKLIST_PAGE_SIZE - 1 - indice;
+    if (restantesEnPagina < WORKLIST_PREFETCH && (siguiente - 1) * WORKLIST_PAGE_SIZE < totalGruposWorklist) {
+        fetchWorklistPage(siguiente).catch(error => console.warn('[WARN] Error adelantando página:', error));
+    }
+    return gruposCarteraActual[indice];
+}
+
+// Función para vaciar la lista de trabajo cargada (al cambiar cartera o búsqueda)
+function resetWorklist() {
+    worklistVersion += 1;
+    gruposCarteraActual = [];
+    todosLosGrupos = gruposCarteraActual;
+    totalGruposWorklist = 0;
+    paginasCargadas = new Set();
+    paginasEnCurso = new Map();
+    grupoClienteActual = null;
+    clienteActual = null;
+    deudaActual = null;
+    indiceGrupoActual = 0;
+    indiceDeudaActual = 0;
+}
+
+// Función para cargar la lista de trabajo desde la API (primera página)
+// La cartera y la búsqueda se filtran en el servidor; el resto se pide al navegar
+async function loadCasosFromAPI() {
+    resetWorklist();
+    const version = worklistVersion;
+    isLoading = true;
+    try {
+        const vigente = await fetchWorklistPage(1);
+        if (!vigente || version !== worklistVersion) return;
+
+        // Cargar primer grupo si hay
+        if (totalGruposWorklist > 0) {
+            const grupo = await asegurarGrupo(0);
+            cargarGrupoCliente(grupo, 0, 0);
+        } else if (busquedaActual) {
+            console.log('No se encontró cliente con:', busquedaActual);
+            showNoCasesMessage();
         } else {
-            console.error('[ERROR] Error cargando casos:', result.error);
-            showErrorMessage('Error al cargar casos: ' + result.error);
-            // Limpiar datos en caso de error
-            todosLosGrupos = [];
-            gruposCarteraActual = [];
-            grupoClienteActual = null;
-            clienteActual = null;
-            deudaActual = null;
             showNoCasesMessage();
         }
+
+        // Actualizar contador total
+        updateTotalCounter();
     } catch (error) {
+        if (version !== worklistVersion) return;
         console.error('[ERROR] Error en fetch:', error);
         console.error('[ERROR] Detalles del error:', error.message, error.stack);
-        
+
         // Intentar obtener más información del error
         let errorMessage = 'Error de conexión al cargar casos';
         if (error.message) {
             errorMessage += ': ' + error.message;
         }
-        
+
         showErrorMessage(errorMessage);
         // Limpiar datos en caso de error
-        todosLosGrupos = [];
-        gruposCarteraActual = [];
-        grupoClienteActual = null;
-        clienteActual = null;
-        deudaActual = null;
+        resetWorklist();
         showNoCasesMessage();
     } finally {
-        isLoading = false;
+        if (version === worklistVersion) {
+            isLoading = false;
+        }
     }
 }
 
 // Función para obtener grupos de clientes de la cartera actual
+// (ya vienen filtrados por cartera y búsqueda desde el servidor; puede tener huecos sin cargar)
 function getGruposCartera() {
-    if (!todosLosGrupos || todosLosGrupos.length === 0) {
-        return [];
-    }
-    
-    // Filtrar grupos que tengan al menos una deuda en la cartera actual
-    if (carteraActualId) {
-        return todosLosGrupos.filter(grupo => {
-            return grupo.deudas.some(deuda => deuda.cartera_id === carteraActualId);
-        });
-    }
-    
-    return todosLosGrupos;
+    return gruposCarteraActual;
 }
 
 // Función para cargar estados de casos desde la API
@@ -395,7 +380,8 @@ async function loadCaseStatuses() {
 // Función para cargar carteras desde la API
 async function loadCarteras() {
     try {
-        const response = await fetch('/api/carteras');
+        // con_casos: el servidor indica qué carteras tienen casos del gestor
+        const response = await fetch('/api/carteras?con_casos=true');
         if (!response.ok) {
             throw new Error('Error al cargar carteras');
         }
@@ -404,9 +390,9 @@ async function loadCarteras() {
         // Renderizar dropdown
         renderCarteraDropdown(carterasDisponibles);
         
-        // Si no hay cartera seleccionada, seleccionar la primera
+        // Si no hay cartera seleccionada, seleccionar la primera con casos (o la primera)
         if (!carteraActualId && carterasDisponibles.length > 0) {
-            const primeraCartera = carterasDisponibles[0];
+            const primeraCartera = carterasDisponibles.find(c => c.con_casos) || carterasDisponibles[0];
             selectCartera(primeraCartera.id, primeraCartera.nombre);
         }
     } catch (error) {
@@ -444,34 +430,39 @@ function changeCartera(carteraId) {
     carteraActualId = carteraId;
     const cartera = carterasDisponibles.find(c => c.id === carteraId);
     carteraActual = cartera ? cartera.nombre : null;
-    
-    gruposCarteraActual = getGruposCartera();
-    
-    if (gruposCarteraActual.length > 0) {
-        indiceGrupoActual = 0;
-        indiceDeudaActual = 0;
-        cargarGrupoCliente(gruposCarteraActual[0], 0, 0);
-        updateCarteraSelector(carteraId, cartera ? cartera.nombre : null);
-        limpiarBusqueda();
-    } else {
-        showNoCasesMessage();
-    }
+    updateCarteraSelector(carteraId, cartera ? cartera.nombre : null);
+
+    // La búsqueda es por cartera: se limpia y se recarga la lista desde el servidor
+    busquedaActual = '';
+    limpiarInputsBusqueda();
+    loadCasosFromAPI();
 }
 
 // Función para navegar entre clientes (GLOBAL - usada por onclick en HTML)
-window.navegarCliente = function(direccion) {
-    gruposCarteraActual = getGruposCartera();
-    if (gruposCarteraActual.length === 0) return;
+window.navegarCliente = async function(direccion) {
+    if (totalGruposWorklist === 0) return;
 
+    let indice;
     if (direccion === 'prev') {
-        indiceGrupoActual = indiceGrupoActual > 0 ? indiceGrupoActual - 1 : gruposCarteraActual.length - 1;
+        indice = indiceGrupoActual > 0 ? indiceGrupoActual - 1 : totalGruposWorklist - 1;
     } else {
-        indiceGrupoActual = indiceGrupoActual < gruposCarteraActual.length - 1 ? indiceGrupoActual + 1 : 0;
+        indice = indiceGrupoActual < totalGruposWorklist - 1 ? indiceGrupoActual + 1 : 0;
     }
-    
+
+    const version = worklistVersion;
+    let grupo;
+    try {
+        grupo = await asegurarGrupo(indice);
+    } catch (error) {
+        console.error('[ERROR] Error cargando página de clientes:', error);
+        showErrorMessage('Error al cargar clientes: ' + error.message);
+        return;
+    }
+    if (!grupo || version !== worklistVersion) return;
+
     // Al cambiar de cliente, volver a la primera deuda
     indiceDeudaActual = 0;
-    cargarGrupoCliente(gruposCarteraActual[indiceGrupoActual], indiceGrupoActual, 0);
+    cargarGrupoCliente(grupo, indice, 0);
     actualizarContadores();
 }
 
@@ -495,7 +486,8 @@ window.navegarDeuda = function(direccion) {
 }
 
 // Función para ir a un número de cliente específico (GLOBAL - usada por onclick en HTML)
-window.irACliente = function() {
+// El número es la posición en la lista actual (cartera y búsqueda); se trae solo su página
+window.irACliente = async function() {
     const input = document.getElementById('go-to-number');
     const numeroCliente = parseInt(input.value);
     
@@ -505,8 +497,7 @@ window.irACliente = function() {
         return;
     }
 
-    gruposCarteraActual = getGruposCartera();
-    const totalClientes = gruposCarteraActual.length;
+    const totalClientes = totalGruposWorklist;
 
     if (numeroCliente > totalClientes) {
         alert(`No existe el cliente #${numeroCliente}. Total de clientes en esta cartera: ${totalClientes}`);
@@ -515,14 +506,20 @@ window.irACliente = function() {
         return;
     }
 
-    // Limpiar búsqueda si existe
-    document.getElementById('search-input').value = '';
-    document.getElementById('btn-clear-search').style.display = 'none';
-
     // Los números de cliente van de 1 a N, pero el índice es 0 a N-1
-    indiceGrupoActual = numeroCliente - 1;
+    const indice = numeroCliente - 1;
+    let grupo;
+    try {
+        grupo = await asegurarGrupo(indice);
+    } catch (error) {
+        console.error('[ERROR] Error cargando página de clientes:', error);
+        showErrorMessage('Error al cargar clientes: ' + error.message);
+        return;
+    }
+    if (!grupo) return;
+
     indiceDeudaActual = 0;
-    cargarGrupoCliente(gruposCarteraActual[indiceGrupoActual], indiceGrupoActual, 0);
+    cargarGrupoCliente(grupo, indice, 0);
     actualizarContadores();
     
     // Limpiar el input
@@ -531,49 +528,41 @@ window.irACliente = function() {
 }
 
 // Función para buscar cliente (GLOBAL - usada por onkeyup en HTML)
+// La búsqueda va al servidor (nombre, DNI o Nº ID) con una espera mientras se escribe
 window.buscarCliente = function(busqueda) {
+    clearTimeout(busquedaTimer);
+
     if (!busqueda || busqueda.trim() === '') {
         limpiarBusqueda();
         return;
     }
 
-    const termino = busqueda.trim().toLowerCase();
-    gruposCarteraActual = getGruposCartera();
-    
-    // Buscar en toda la cartera (buscar en grupos por DNI, nombre, o nro_cliente de deudas)
-    const grupoEncontrado = gruposCarteraActual.find(grupo => {
-        const cliente = grupo.cliente;
-        const nombreMatch = `${cliente.name} ${cliente.lastname}`.toLowerCase().includes(termino);
-        const dniMatch = (cliente.dni || '').replace(/\./g, '').toLowerCase().includes(termino.replace(/\./g, ''));
-        
-        // También buscar en nro_cliente de las deudas
-        const nroClienteMatch = grupo.deudas.some(deuda => 
-            (deuda.nro_cliente || '').toLowerCase().includes(termino)
-        );
-        
-        return nombreMatch || dniMatch || nroClienteMatch;
-    });
-
-    if (grupoEncontrado) {
-        indiceGrupoActual = gruposCarteraActual.indexOf(grupoEncontrado);
-        indiceDeudaActual = 0;
-        cargarGrupoCliente(grupoEncontrado, indiceGrupoActual, 0);
-        actualizarContadores();
+    const termino = busqueda.trim();
+    busquedaTimer = setTimeout(() => {
+        if (termino === busquedaActual) return;
+        busquedaActual = termino;
         // Mostrar botón de limpiar
         document.getElementById('btn-clear-search').style.display = 'block';
-    } else {
-        // No se encontró, pero mantener el input activo para seguir buscando
-        console.log('No se encontró cliente con:', termino);
-    }
+        loadCasosFromAPI();
+    }, 300);
 }
 
-// Función para limpiar búsqueda (GLOBAL - usada por onclick en HTML)
-window.limpiarBusqueda = function() {
+// Función para vaciar los inputs de búsqueda y de número de cliente
+function limpiarInputsBusqueda() {
+    clearTimeout(busquedaTimer);
     document.getElementById('search-input').value = '';
     document.getElementById('btn-clear-search').style.display = 'none';
     document.getElementById('go-to-number').value = '';
-    gruposCarteraActual = getGruposCartera();
-    if (gruposCarteraActual.length > 0) {
+}
+
+// Función para limpiar búsqueda (GLOBAL - usada por onclick en HTML)
+window.limpiarBusqueda = function() {
+    limpiarInputsBusqueda();
+    if (busquedaActual) {
+        // Volver a la lista completa de la cartera
+        busquedaActual = '';
+        loadCasosFromAPI();
+    } else if (gruposCarteraActual[0]) {
         indiceGrupoActual = 0;
         indiceDeudaActual = 0;
         cargarGrupoCliente(gruposCarteraActual[0], 0, 0);
@@ -1287,7 +1276,7 @@ function actualizarContadores() {
     console.log(`[DEBUG] actualizarContadores: grupoClienteActual tiene ${grupoClienteActual.deudas?.length || 0} deudas`);
     
     // Contador de clientes
-    const totalClientes = gruposCarteraActual.length;
+    const totalClientes = totalGruposWorklist;
     const clienteNum = indiceGrupoActual + 1;
     const clienteCounterEl = document.getElementById('cliente-counter');
     if (clienteCounterEl) {
@@ -1480,10 +1469,11 @@ function actualizarSelectorDeudas(grupo) {
 }
 
 function updateTotalCounter() {
-    const totalGrupos = todosLosGrupos.length;
-    const totalDeudas = todosLosGrupos.reduce((sum, grupo) => sum + grupo.total_deudas, 0);
+    const totalGrupos = totalGruposWorklist;
+    // Solo se conocen las deudas de las páginas cargadas
+    const totalDeudas = gruposCarteraActual.reduce((sum, grupo) => sum + (grupo ? grupo.total_deudas : 0), 0);
     // Actualizar algún elemento del DOM si existe
-    console.log(`Total de grupos (clientes): ${totalGrupos}, Total de deudas: ${totalDeudas}`);
+    console.log(`Total de grupos (clientes): ${totalGrupos}, Total de deudas (cargadas): ${totalDeudas}`);
 }
 
 // Ya no necesitamos este listener porque lo manejamos en el DOMContentLoaded
@@ -1521,8 +1511,8 @@ document.addEventListener('DOMContentLoaded', function() {
     loadCaseStatuses().then(() => {
         return loadCarteras();
     }).then(() => {
-        // Cargar casos desde la API después de que las carteras estén disponibles
-        loadCasosFromAPI();
+        // Al elegir una cartera, selectCartera ya cargó la lista; si no hay, se carga sin filtro
+        if (!carteraActualId) loadCasosFromAPI();
     });
     
     // Inicializar iconos
@@ -3,9 +3,14 @@ Configuración compartida para todos los tests (fixtures).
 """
 
 import os
+import socketserver
 import tempfile
+import threading
+from contextlib import contextmanager
+
 import pytest
 from pathlib import Path
+from sqlalchemy import event
 from werkzeug.security import generate_password_hash
 
 from app import create_app
@@ -101,3 +106,164 @@ def sample_submission():
         "phone": "1234567890",
         "message": "Mensaje de prueba para testing",
     }
+
+
+@pytest.fixture
+def portfolio(app):
+    """
+    Cartera de casos de ejemplo con el esquema actual (carteras, estados y casos por DNI).
+
+    - DNI 111: dos deudas (una en cada cartera), solo la de Cartera A asignada al gestor
+    - DNI 222: una deuda en Cartera B asignada al gestor, con arreglo
+    - DNI 333: una deuda en Cartera A sin asignar
+    - Sin DNI: una deuda en Cartera B asignada al gestor
+    """
+    from datetime import datetime, timedelta
+    from decimal import Decimal
+    from app.features.cases.models import Case, CaseStatus
+    from app.features.carteras.models import Cartera
+
+    gestor = User.query.filter_by(username="gestor").first()
+    cartera_a = Cartera(nombre="Cartera A", activo=True)
+    cartera_b = Cartera(nombre="Cartera B", activo=True)
+    sin_arreglo = CaseStatus(nombre="Sin Arreglo", activo=True)
+    con_arreglo = CaseStatus(nombre="Con Arreglo", activo=True)
+    db.session.add_all([cartera_a, cartera_b, sin_arreglo, con_arreglo])
+    db.session.flush()
+
+    base = datetime(2026, 1, 1, 12, 0, 0)
+
+    def _case(dni, total, cartera, status, assigned, days):
+        return Case(
+            name=f"Nombre {dni}",
+            lastname=f"Apellido {dni}",
+            dni=dni,
+            total=Decimal(total),
+            monto_inicial=Decimal(total),
+            cartera_id=cartera.id,
+            status_id=status.id,
+            assigned_to_id=assigned.id if assigned else None,
+            created_at=base + timedelta(days=days),
+        )
+
+    cases = {
+        "111_a": _case("111", "1000.00", cartera_a, sin_arreglo, gestor, 1),
+        "111_b": _case("111", "500.00", cartera_b, sin_arreglo, None, 5),
+        "222_b": _case("222", "2000.00", cartera_b, con_arreglo, gestor, 3),
+        "333_a": _case("333", "300.00", cartera_a, sin_arreglo, None, 4),
+        "sin_dni_b": _case(None, "50.00", cartera_b, sin_arreglo, gestor, 2),
+    }
+    db.session.add_all(cases.values())
+    db.session.commit()
+
+    return {
+        "gestor": gestor,
+        "cartera_a": cartera_a,
+        "cartera_b": cartera_b,
+        "sin_arreglo": sin_arreglo,
+        "con_arreglo": con_arreglo,
+        "cases": cases,
+    }
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager que cuenta las sentencias SQL ejecutadas dentro del bloque."""
+
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _before_cursor_execute)
+
+    return _count_queries
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Diálogo SMTP mínimo (EHLO, AUTH PLAIN, MAIL/RCPT/DATA, RSET, NOOP, QUIT)."""
+
+    def _reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self._reply("220 localhost SMTP de prueba")
+        envelope = {}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self._reply("250-localhost")
+                self._reply("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                server.logins += 1
+                self._reply("235 Autenticado")
+            elif verb == "MAIL":
+                if server.fail_next > 0:
+                    server.fail_next -= 1
+                    self._reply("451 Error temporal")
+                    continue
+                envelope = {"from": command[10:].strip("<>"), "to": []}
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                envelope["to"].append(command[8:].strip("<>"))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 Fin con <CRLF>.<CRLF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b""):
+                        break
+                    data.append(chunk)
+                envelope["data"] = b"".join(data).decode()
+                server.messages.append(envelope)
+                self._reply("250 Encolado")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Adios")
+                return
+            else:
+                self._reply("502 Comando no implementado")
+
+
+@pytest.fixture
+def smtp_server(app):
+    """
+    Servidor SMTP local de prueba, con la app configurada para usarlo.
+
+    Guarda los mensajes recibidos en `messages`; con `fail_next = n` rechaza (451) los
+    próximos n envíos.
+    """
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.messages = []
+    server.connections = 0
+    server.logins = 0
+    server.fail_next = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    app.config.update(
+        MAIL_SERVER="127.0.0.1",
+        MAIL_PORT=server.server_address[1],
+        MAIL_USE_SSL=False,
+        MAIL_USE_TLS=False,
+        MAIL_TIMEOUT=5,
+    )
+    yield server
+
+    server.shutdown()
+    server.server_close()
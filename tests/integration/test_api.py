@@ -8,6 +8,7 @@ from datetime import date
 
 from app.core.database import db
 from app.models import User, Case, Promise, Activity
+from app.utils.pagination import encode_cursor
 
 
 @pytest.fixture
@@ -170,3 +171,34 @@ def test_api_requires_auth(client):
         response = client.get(endpoint)
         # Debe redirigir a login
         assert response.status_code in [302, 401, 403]
+
+
+def test_list_cases_cursor_pagination(authenticated_client, portfolio):
+    """Test de paginación por cursor del listado de casos."""
+    ids = []
+    cursor = ""
+    while cursor is not None:
+        response = authenticated_client.get(f"/api/cases?per_page=2&with_total=false&cursor={cursor}")
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["pagination"]["total"] is None
+        ids.extend(c["id"] for c in data["data"])
+        cursor = data["pagination"]["next_cursor"]
+
+    expected = sorted(portfolio["cases"].values(), key=lambda c: (c.created_at, c.id), reverse=True)
+    assert ids == [c.id for c in expected]
+
+
+def test_list_cases_cursor_with_total(authenticated_client, portfolio):
+    """Test que el total se calcula por defecto y el cursor inválido es 400."""
+    response = authenticated_client.get("/api/cases?cursor=")
+    data = response.get_json()
+    assert data["pagination"]["total"] == len(portfolio["cases"])
+    assert data["pagination"]["next_cursor"] is None
+
+    response = authenticated_client.get("/api/cases?cursor=invalido")
+    assert response.status_code == 400
+
+    # Cursor bien formado pero con un id adulterado
+    response = authenticated_client.get(f"/api/cases?cursor={encode_cursor('2026-01-01T00:00:00', 'x')}")
+    assert response.status_code == 400
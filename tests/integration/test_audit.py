@@ -0,0 +1,102 @@
+"""
+Tests de la cola de auditoría y su persistencia en lotes.
+"""
+
+import json
+import time
+
+from app.features.audit.models import AuditEvent
+from app.services import audit
+from app.services.audit import AuditSink, audit_log, get_audit_sink, init_audit
+
+
+def test_login_is_persisted_after_flush(client, app):
+    client.post("/api/login", data={"username": "admin", "password": "admin123"})
+
+    assert AuditEvent.query.count() == 0
+    get_audit_sink().flush()
+
+    event = AuditEvent.query.filter_by(action="login").one()
+    assert event.username == "admin"
+    assert event.details["success"] is True
+
+
+def test_audit_log_does_not_touch_database(app, count_queries):
+    with app.test_request_context("/api/cases/1/status", headers={"User-Agent": "pytest"}):
+        with count_queries() as statements:
+            audit_log("update_case_status", {"case_id": 1, "new_status_id": 2})
+
+    assert statements == []
+    get_audit_sink().flush()
+    event = AuditEvent.query.one()
+    assert event.user_agent == "pytest"
+    assert event.details == {"case_id": 1, "new_status_id": 2}
+
+
+def test_details_are_copied_when_enqueued(app):
+    details = {"changes": {"total": 10}}
+    audit_log("update_case", details)
+    details["changes"]["total"] = 99
+
+    get_audit_sink().flush()
+    assert AuditEvent.query.one().details == {"changes": {"total": 10}}
+
+
+def test_full_queue_drops_new_events(app):
+    app.config.update(AUDIT_QUEUE_SIZE=2, AUDIT_WORKER=False)
+    sink = AuditSink(app)
+
+    accepted = [sink.put({"action": f"a{i}"}) for i in range(3)]
+
+    assert accepted == [True, True, False]
+    assert sink.stats()["dropped"] == 1
+    assert sink.stats()["queued"] == 2
+
+
+def test_background_thread_writes_in_batches(app):
+    app.config.update(AUDIT_WORKER=True, AUDIT_FLUSH_INTERVAL=0.05)
+    app.extensions["audit_sink"] = sink = AuditSink(app)
+
+    for i in range(5):
+        audit_log("bulk", {"i": i})
+
+    deadline = time.monotonic() + 5
+    while sink.stats()["written"] < 5 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert sink.stats()["written"] == 5
+    assert AuditEvent.query.filter_by(action="bulk").count() == 5
+
+
+def test_exit_flush_is_registered_once_per_process(app, monkeypatch):
+    registered = []
+    monkeypatch.setattr(audit.atexit, "register", registered.append)
+    monkeypatch.setattr(audit, "_exit_handler_registered", False)
+    monkeypatch.setattr(audit, "_exit_sinks", type(audit._exit_sinks)())
+    app.config.update(AUDIT_WORKER=True)
+
+    init_audit(app)
+    first = get_audit_sink()
+    init_audit(app)
+
+    assert registered == [audit._flush_at_exit]
+    assert set(audit._exit_sinks) == {first, get_audit_sink()}
+
+    audit_log("shutdown", {})
+    audit._flush_at_exit()
+    assert AuditEvent.query.filter_by(action="shutdown").count() == 1
+
+
+def test_file_sink_writes_jsonl(app, tmp_path):
+    path = tmp_path / "audit.jsonl"
+    app.config.update(AUDIT_SINK="file", AUDIT_FILE=str(path))
+    app.extensions["audit_sink"] = sink = AuditSink(app)
+
+    audit_log("logout", {"username": "gestor"})
+    audit_log("login", {"username": "gestor"})
+    sink.flush()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["action"] for line in lines] == ["logout", "login"]
+    assert lines[0]["details"] == {"username": "gestor"}
+    assert AuditEvent.query.count() == 0
@@ -74,3 +74,68 @@ def test_login_different_roles(client):
     for username, password in roles.items():
         response = client.post("/api/login", data={"username": username, "password": password})
         assert response.status_code == 200, f"Login falló para {username}"
+
+
+def test_login_locks_user_after_repeated_failures(client, app, count_queries):
+    """Tras LOGIN_MAX_FAILURES fallas se rechaza sin consultar la base ni verificar el hash."""
+    app.config["LOGIN_MAX_FAILURES"] = 3
+    from app.services.login_throttle import init_login_throttle
+
+    init_login_throttle(app)
+
+    for _ in range(3):
+        response = client.post("/api/login", data={"username": "admin", "password": "incorrecta"})
+        assert response.status_code == 400
+
+    with count_queries() as statements:
+        response = client.post("/api/login", data={"username": "admin", "password": "admin123"})
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert not [s for s in statements if "users" in s]
+
+    # Otro usuario no queda bloqueado
+    response = client.post("/api/login", data={"username": "gestor", "password": "gestor123"})
+    assert response.status_code == 200
+
+
+def test_login_success_resets_failures(client, app):
+    app.config["LOGIN_MAX_FAILURES"] = 2
+    from app.services.login_throttle import init_login_throttle
+
+    init_login_throttle(app)
+
+    client.post("/api/login", data={"username": "admin", "password": "incorrecta"})
+    assert client.post("/api/login", data={"username": "admin", "password": "admin123"}).status_code == 200
+    client.post("/api/login", data={"username": "admin", "password": "incorrecta"})
+    assert client.post("/api/login", data={"username": "admin", "password": "admin123"}).status_code == 200
+
+
+def test_login_unknown_user_verifies_dummy_hash(client, monkeypatch):
+    """Un usuario inexistente paga el mismo costo de hash que uno real."""
+    calls = []
+    monkeypatch.setattr("app.web.auth.verify_dummy", lambda password: calls.append(password) or False)
+
+    response = client.post("/api/login", data={"username": "nadie", "password": "secreto"})
+
+    assert response.status_code == 400
+    assert calls == ["secreto"]
+
+
+def test_login_upgrades_outdated_password_hash(client, app):
+    from werkzeug.security import generate_password_hash
+    from app.core.database import db
+    from app.models import User
+
+    user = User.query.filter_by(username="gestor").first()
+    user.password_hash = generate_password_hash("gestor123", method="pbkdf2:sha256:1000")
+    db.session.commit()
+    assert user.password_needs_rehash()
+
+    response = client.post("/api/login", data={"username": "gestor", "password": "gestor123"})
+
+    assert response.status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash.startswith("scrypt:")
+    assert not user.password_needs_rehash()
+    assert user.check_password("gestor123")
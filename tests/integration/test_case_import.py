@@ -0,0 +1,154 @@
+"""
+Tests del motor de importación masiva de casos.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.core.database import db
+from app.features.cases.models import Case
+from app.features.stats.models import DailyStat
+from app.services.case_import import import_cases, parse_amount, parse_date, read_rows
+from app.services.daily_stats import METRICS, rebuild_daily_stats
+from app.utils.exceptions import ValidationError
+
+CSV_CONTENT = """Nro. Cliente;Nombre;Apellido;DNI;Deuda;Monto Inicial;Fecha Ultimo Pago;Teléfono
+900001;ANA;PEREZ;30111222;$ 1.500,50;1000;10/05/2024;2914000000
+900002;JUAN;GOMEZ;30111333;2000.00;;11/05/2024;
+900001;ANA;PEREZ;30111222;9999;;;
+900003;;SIN NOMBRE;;100;;;
+"""
+
+
+def _snapshot():
+    rows = {}
+    for s in DailyStat.query.all():
+        metrics = tuple(float(getattr(s, m)) for m in METRICS)
+        if any(metrics):
+            rows[(s.fecha, s.cartera_id, s.gestor_id, s.status_id)] = metrics
+    return rows
+
+
+def _assert_matches_rebuild():
+    incremental = _snapshot()
+    rebuild_daily_stats()
+    assert _snapshot() == incremental
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "cartera.csv"
+    path.write_text(CSV_CONTENT, encoding="utf-8")
+    return str(path)
+
+
+def test_parse_amount_y_fecha():
+    assert parse_amount("$  400,000.00") == Decimal("400000.00")
+    assert parse_amount("1.500,50") == Decimal("1500.50")
+    assert parse_amount("400,50") == Decimal("400.50")
+    assert parse_amount(1500.5) == Decimal("1500.5")
+    assert parse_amount("abc") is None
+    assert parse_date("10/5/2024") == date(2024, 5, 10)
+    assert parse_date("2024-05-10") == date(2024, 5, 10)
+    assert parse_date("") is None
+
+
+def test_importa_csv_en_chunks(app, portfolio, csv_file):
+    """Importa el CSV con encabezados en castellano, salteando repetidos e inválidos."""
+    cartera = portfolio["cartera_a"]
+    chunks = []
+    stats = import_cases(
+        read_rows(csv_file),
+        cartera_id=cartera.id,
+        status_id=portfolio["sin_arreglo"].id,
+        chunk_size=2,
+        on_chunk=lambda s: chunks.append(s.next_row),
+    )
+
+    assert (stats.rows, stats.inserted, stats.skipped, stats.invalid) == (4, 2, 1, 1)
+    assert chunks == [2, 4]
+    ana = Case.query.filter_by(nro_cliente="900001").one()
+    assert ana.total == Decimal("1500.50")
+    assert ana.monto_inicial == Decimal("1000")
+    assert ana.fecha_ultimo_pago == date(2024, 5, 10)
+    assert ana.cartera_id == cartera.id
+    assert Case.query.filter_by(nro_cliente="900002").one().telefono is None
+    _assert_matches_rebuild()
+
+
+def test_reimportar_saltea_o_actualiza(app, portfolio, csv_file):
+    """Una segunda corrida no duplica; con on_conflict=update refresca montos y rollup."""
+    kwargs = {"cartera_id": portfolio["cartera_a"].id, "status_id": portfolio["sin_arreglo"].id}
+    import_cases(read_rows(csv_file), **kwargs)
+
+    stats = import_cases(read_rows(csv_file), **kwargs)
+    assert (stats.inserted, stats.updated, stats.skipped) == (0, 0, 3)
+
+    rows = [{"nro_cliente": "900002", "name": "JUAN", "lastname": "GOMEZ", "total": "2500"}]
+    stats = import_cases(rows, on_conflict="update", **kwargs)
+    assert stats.updated == 1
+    assert Case.query.filter_by(nro_cliente="900002").one().total == Decimal("2500")
+    assert Case.query.filter_by(nro_cliente="900002").count() == 1
+    _assert_matches_rebuild()
+
+
+def test_ids_no_numericos_se_informan_por_fila(app, portfolio):
+    """Un cartera_id/status_id no numérico invalida solo su fila, sin cortar la importación."""
+    kwargs = {"cartera_id": portfolio["cartera_a"].id, "status_id": portfolio["sin_arreglo"].id}
+    rows = [
+        {"nro_cliente": "900001", "name": "ANA", "lastname": "PEREZ", "total": "10", "cartera_id": "Cartera B"},
+        {"nro_cliente": "900002", "name": "JUAN", "lastname": "GOMEZ", "total": "20", "status_id": "x"},
+        {
+            "nro_cliente": "900003",
+            "name": "LUIS",
+            "lastname": "DIAZ",
+            "total": "30",
+            "cartera_id": float(kwargs["cartera_id"]),
+        },
+    ]
+    stats = import_cases(rows, **kwargs)
+
+    assert (stats.inserted, stats.invalid) == (1, 2)
+    assert stats.errors == ["Fila 1: cartera_id no numérico ('Cartera B')", "Fila 2: status_id no numérico ('x')"]
+    assert Case.query.filter_by(nro_cliente="900003").one().cartera_id == kwargs["cartera_id"]
+
+
+def test_actualizar_solo_columnas_presentes(app, portfolio, csv_file):
+    """Una actualización parcial no borra las columnas que el archivo no trae."""
+    kwargs = {"cartera_id": portfolio["cartera_a"].id, "status_id": portfolio["sin_arreglo"].id}
+    import_cases(read_rows(csv_file), **kwargs)
+
+    rows = [
+        {"nro_cliente": "900001", "name": "ANA", "lastname": "PEREZ", "total": "1600"},
+        {"nro_cliente": "900002", "name": "JUAN", "lastname": "GOMEZ", "dni": "30111444"},
+        {"nro_cliente": "900003", "name": "LUIS", "lastname": "DIAZ", "total": "mil pesos"},
+    ]
+    stats = import_cases(rows, on_conflict="update", **kwargs)
+
+    assert (stats.updated, stats.invalid) == (2, 1)
+    assert stats.errors == ["Fila 3: total inválido ('mil pesos')"]
+    ana = Case.query.filter_by(nro_cliente="900001").one()
+    assert (ana.total, ana.dni, ana.monto_inicial) == (Decimal("1600"), "30111222", Decimal("1000"))
+    assert (ana.fecha_ultimo_pago, ana.telefono) == (date(2024, 5, 10), "2914000000")
+    juan = Case.query.filter_by(nro_cliente="900002").one()
+    assert (juan.dni, juan.total) == ("30111444", Decimal("2000.00"))
+    _assert_matches_rebuild()
+
+
+def test_retomar_desde_checkpoint(app, portfolio, csv_file):
+    """start_row saltea las filas ya confirmadas."""
+    stats = import_cases(
+        read_rows(csv_file), cartera_id=portfolio["cartera_a"].id, status_id=portfolio["sin_arreglo"].id, start_row=1
+    )
+    assert stats.rows == 3
+    assert stats.next_row == 4
+    assert Case.query.filter_by(nro_cliente="900001").one().total == Decimal("9999")
+
+
+def test_parametros_invalidos(app):
+    with pytest.raises(ValidationError):
+        import_cases([], on_conflict="replace")
+    with pytest.raises(ValidationError):
+        read_rows("casos.txt")
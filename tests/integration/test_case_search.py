@@ -0,0 +1,138 @@
+"""
+Tests de la búsqueda de casos (índice FTS5 en SQLite, términos numéricos, ranking).
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from app.core.database import db
+from app.features.cases.models import Case
+from app.features.cases import search
+from app.features.cases.search import _index_available, apply_search
+
+
+@pytest.fixture
+def people(portfolio):
+    def _case(name, lastname, dni=None, nro_cliente=None):
+        return Case(
+            name=name,
+            lastname=lastname,
+            dni=dni,
+            nro_cliente=nro_cliente,
+            total=Decimal("100.00"),
+            cartera_id=portfolio["cartera_a"].id,
+            status_id=portfolio["sin_arreglo"].id,
+        )
+
+    cases = {
+        "juan": _case("Juan", "Pérez", dni="30111222"),
+        "juana": _case("Juana", "Gómez", dni="30111333"),
+        "pedro": _case("Pedro", "Juárez", nro_cliente="C-900"),
+        "ana": _case("Ana", "Ruiz", dni="20.301.112"),
+    }
+    db.session.add_all(cases.values())
+    db.session.commit()
+    return cases
+
+
+def _search(term):
+    query, order = apply_search(Case.query, term)
+    return [c.name for c in query.order_by(*order, Case.id)]
+
+
+def test_search_by_word_prefix(people):
+    assert _search("juan") == ["Juan", "Juana"]
+    assert _search("JUA") == ["Juan", "Juana", "Pedro"]
+
+
+def test_search_ignores_accents_and_requires_all_words(people):
+    assert _search("perez") == ["Juan"]
+    assert _search("juan perez") == ["Juan"]
+    assert _search("pedro gomez") == []
+
+
+def test_numeric_search_matches_substrings_and_ranks_exact_first(people):
+    assert _search("30111") == ["Juan", "Juana", "Ana"]
+    assert _search("30111333") == ["Juana"]
+    assert _search("30.111.222") == ["Juan"]
+    assert _search("1112") == ["Juan", "Ana"]
+    assert _search("900") == ["Pedro"]
+
+
+def test_numeric_search_ignores_dots_in_stored_dni(people):
+    assert _search("20301112") == ["Ana"]
+    assert _search("20301") == ["Ana"]
+
+
+def test_index_follows_updates_and_deletes(people):
+    pedro = people["pedro"]
+    pedro.name = "Carlos"
+    db.session.commit()
+    assert _search("carlos") == ["Carlos"]
+    assert _search("pedro") == []
+
+    db.session.delete(pedro)
+    db.session.commit()
+    assert _search("carlos") == []
+
+
+def test_core_bulk_insert_is_indexed(people, portfolio):
+    db.session.execute(
+        Case.__table__.insert(),
+        [
+            {
+                "name": "Lucía",
+                "lastname": "Fernández",
+                "total": 10,
+                "cartera_id": portfolio["cartera_a"].id,
+                "status_id": portfolio["sin_arreglo"].id,
+            }
+        ],
+    )
+    db.session.commit()
+    assert _search("lucia fernandez") == ["Lucía"]
+
+
+def test_search_falls_back_to_like_without_index(people):
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE cases_fts")
+    _index_available.clear()
+    try:
+        assert _search("uan") == ["Juan", "Juana"]
+    finally:
+        _index_available.clear()
+
+
+def test_missing_index_is_rechecked(people, monkeypatch):
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE cases_fts")
+    _index_available.clear()
+    now = [1000.0]
+    monkeypatch.setattr(search.time, "monotonic", lambda: now[0])
+    try:
+        assert _search("uan") == ["Juan", "Juana"]
+
+        with db.engine.begin() as connection:
+            for statement in search.SQLITE_DDL:
+                connection.exec_driver_sql(statement)
+            connection.exec_driver_sql("INSERT INTO cases_fts(cases_fts) VALUES ('rebuild')")
+        # Hasta que vence el intervalo se sigue usando el fallback; después, el índice
+        assert _search("uan") == ["Juan", "Juana"]
+        now[0] += search.INDEX_RECHECK_SECONDS
+        assert _search("uan") == []
+        assert _search("jua") == ["Juan", "Juana", "Pedro"]
+    finally:
+        _index_available.clear()
+
+
+def test_list_cases_orders_search_by_relevance(authenticated_client, people):
+    response = authenticated_client.get("/api/cases?search=30111222")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [c["name"] for c in data["data"]] == ["Juan"]
+    assert data["pagination"]["total"] == 1
+
+    response = authenticated_client.get("/api/cases?search=juan&cursor=")
+    assert sorted(c["name"] for c in response.get_json()["data"]) == ["Juan", "Juana"]
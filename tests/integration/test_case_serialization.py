@@ -0,0 +1,99 @@
+"""
+Tests de la serialización de casos en bloque (sin N+1).
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from app.core.database import db
+from app.features.activities.models import Activity
+from app.features.cases.models import Case
+from app.features.cases.promise import Promise
+from app.features.cases.serialization import FIELD_SETS, project_cases
+
+
+def _add_relations(case, gestor, n_activities=3):
+    base = datetime(2026, 3, 1)
+    db.session.add(Promise(case_id=case.id, amount=Decimal("10.00"), promise_date=base.date(), status="pending"))
+    for i in range(n_activities):
+        db.session.add(
+            Activity(
+                case_id=case.id, type="call", notes=f"a{i}", created_by_id=gestor.id, created_at=base + timedelta(hours=i)
+            )
+        )
+
+
+def test_gestor_cases_cantidad_constante_de_queries(app, client, portfolio, count_queries):
+    """/cases/gestor no hace queries por caso."""
+    gestor = portfolio["gestor"]
+    client.post("/api/login", data={"username": "gestor", "password": "gestor123"})
+
+    def request_count():
+        db.session.expire_all()
+        with count_queries() as statements:
+            response = client.get("/api/cases/gestor")
+        assert response.status_code == 200
+        return len(statements), len(response.get_json()["data"])
+
+    few_queries, few_cases = request_count()
+
+    for i in range(10):
+        c = Case(
+            name=f"Extra {i}",
+            lastname="Extra",
+            dni=f"8{i:05d}",
+            total=Decimal("100.00"),
+            cartera_id=portfolio["cartera_a"].id,
+            status_id=portfolio["sin_arreglo"].id,
+            assigned_to_id=gestor.id,
+        )
+        db.session.add(c)
+        db.session.flush()
+        _add_relations(c, gestor)
+    db.session.commit()
+
+    many_queries, many_cases = request_count()
+    assert many_cases == few_cases + 10
+    assert many_queries == few_queries
+
+
+def test_project_cases_detail_equivale_a_to_dict(app, portfolio):
+    """La proyección "detail" devuelve los mismos campos y valores que to_dict."""
+    portfolio["cases"]["111_a"].notes = "nota"
+    portfolio["cases"]["111_a"].localidad = "Rosario"
+    _add_relations(portfolio["cases"]["111_a"], portfolio["gestor"], n_activities=12)
+    _add_relations(portfolio["cases"]["222_b"], portfolio["gestor"])
+    db.session.commit()
+
+    query = Case.query.order_by(Case.id)
+    expected = [c.to_dict(include_relations=True) for c in query.all()]
+    data = project_cases(query, "detail", include_relations=True)
+    assert data == expected
+
+    caso = {d["id"]: d for d in data}[portfolio["cases"]["111_a"].id]
+    assert len(caso["activities"]) == 10
+    assert caso["activities"][0]["notes"] == "a11"
+    assert caso["activities"][0]["created_by"] == "gestor"
+    assert caso["assigned_to"] == "gestor"
+
+
+def test_project_cases_field_sets(app, portfolio):
+    """Cada field set devuelve solo sus campos."""
+    for field_set, fields in FIELD_SETS.items():
+        data = project_cases(Case.query, field_set)
+        assert len(data) == len(portfolio["cases"])
+        assert all(tuple(d) == fields for d in data)
+    assert "notes" not in FIELD_SETS["list"]
+
+
+def test_list_cases_fields(app, authenticated_client, portfolio):
+    """El listado admin usa "detail" por defecto (compatible) y acepta fields=list."""
+    data = authenticated_client.get("/api/cases").get_json()["data"]
+    assert set(data[0]) == set(FIELD_SETS["detail"])
+    assert "notes" in data[0]
+
+    data = authenticated_client.get("/api/cases?fields=list&cursor=").get_json()["data"]
+    assert set(data[0]) == set(FIELD_SETS["list"])
+
+    response = authenticated_client.get("/api/cases?fields=todo")
+    assert response.status_code == 400
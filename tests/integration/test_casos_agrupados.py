@@ -0,0 +1,90 @@
+"""
+Tests para el agrupamiento de casos por DNI.
+"""
+
+import pytest
+
+from app.core.database import db
+from app.services.dashboard import get_casos_agrupados_por_dni, get_gestor_worklist, paginate_casos_agrupados_por_dni
+from app.utils.exceptions import ValidationError
+
+
+def _dnis(grupos):
+    return [g["dni"] or g["deudas"][0]["id"] for g in grupos]
+
+
+def test_agrupados_sin_filtros_ordena_por_deuda_mas_reciente(app, portfolio):
+    """Los grupos se ordenan por su deuda más reciente y contienen todas las deudas."""
+    grupos = get_casos_agrupados_por_dni()
+
+    assert _dnis(grupos) == ["111", "333", "222", portfolio["cases"]["sin_dni_b"].id]
+    grupo_111 = grupos[0]
+    assert grupo_111["total_deudas"] == 2
+    assert grupo_111["deuda_consolidada"] == 1500.0
+    assert [d["id"] for d in grupo_111["deudas"]] == [portfolio["cases"]["111_b"].id, portfolio["cases"]["111_a"].id]
+
+
+def test_agrupados_por_gestor_mantiene_todas_las_deudas_del_cliente(app, portfolio):
+    """El filtro por gestor elige grupos pero no recorta sus deudas."""
+    grupos = get_casos_agrupados_por_dni(gestor_id=portfolio["gestor"].id)
+
+    assert _dnis(grupos) == ["111", "222", portfolio["cases"]["sin_dni_b"].id]
+    assert grupos[0]["total_deudas"] == 2
+
+
+def test_agrupados_por_cartera_y_gestor(app, portfolio):
+    """Un grupo califica con una deuda en la cartera y otra asignada al gestor."""
+    grupos = get_casos_agrupados_por_dni(cartera_id=portfolio["cartera_b"].id, gestor_id=portfolio["gestor"].id)
+
+    # 111 tiene deuda en B (sin asignar) y deuda asignada al gestor (en A)
+    assert _dnis(grupos) == ["111", "222", portfolio["cases"]["sin_dni_b"].id]
+
+    grupos = get_casos_agrupados_por_dni(cartera_id=portfolio["cartera_a"].id, gestor_id=portfolio["gestor"].id)
+    assert _dnis(grupos) == ["111"]
+
+
+def test_agrupados_dni_vacio_cuenta_como_sin_dni(app, portfolio):
+    """Un caso con DNI vacío forma su propio grupo, igual que uno con DNI nulo."""
+    sin_dni = portfolio["cases"]["sin_dni_b"]
+    sin_dni.dni = ""
+    db.session.commit()
+
+    esperado = ["111", "333", "222", sin_dni.id]
+    assert _dnis(get_casos_agrupados_por_dni()) == esperado
+    assert _dnis(get_casos_agrupados_por_dni(gestor_id=portfolio["gestor"].id)) == ["111", "222", sin_dni.id]
+    assert _dnis(get_gestor_worklist(per_page=10)[0]) == esperado
+
+
+def test_agrupados_paginacion_por_cursor(app, portfolio):
+    """Recorrer las páginas con el cursor devuelve todos los grupos sin repetir."""
+    vistos = []
+    cursor = None
+    while True:
+        grupos, cursor = paginate_casos_agrupados_por_dni(limit=1, cursor=cursor)
+        vistos.extend(_dnis(grupos))
+        if cursor is None:
+            break
+
+    assert vistos == _dnis(get_casos_agrupados_por_dni())
+
+
+def test_agrupados_cursor_invalido(app, portfolio):
+    """Un cursor mal formado es un error de validación."""
+    with pytest.raises(ValidationError):
+        paginate_casos_agrupados_por_dni(limit=1, cursor="no-es-un-cursor")
+
+
+def test_agrupados_endpoint_paginado(client, portfolio):
+    """El endpoint expone next_cursor cuando se pide limit."""
+    client.post("/api/login", data={"username": "gestor", "password": "gestor123"})
+
+    response = client.get("/api/cases/gestor/agrupados?limit=2")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["total_grupos"] == 2
+    assert data["next_cursor"]
+
+    response = client.get(f"/api/cases/gestor/agrupados?limit=2&cursor={data['next_cursor']}")
+    data = response.get_json()
+    assert data["total_grupos"] == 1
+    assert data["next_cursor"] is None
@@ -0,0 +1,103 @@
+"""
+Tests para el rollup diario daily_stats.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.core.database import db
+from app.features.activities.models import Activity
+from app.features.cases.promise import Promise
+from app.features.stats.models import DailyStat
+from app.services.daily_stats import METRICS, rebuild_daily_stats
+from app.services.dashboard import get_cartera_distribution, get_cases_status_distribution
+
+
+def _snapshot():
+    """Filas de daily_stats con alguna métrica distinta de cero."""
+    rows = {}
+    for s in DailyStat.query.all():
+        metrics = tuple(float(getattr(s, m)) for m in METRICS)
+        if any(metrics):
+            rows[(s.fecha, s.cartera_id, s.gestor_id, s.status_id)] = metrics
+    return rows
+
+
+def _assert_matches_rebuild():
+    incremental = _snapshot()
+    rebuild_daily_stats()
+    assert _snapshot() == incremental
+
+
+def test_rollup_mantenido_en_altas(app, portfolio):
+    """Los casos, promesas y actividades creados por el ORM quedan en el rollup."""
+    case = portfolio["cases"]["111_a"]
+    db.session.add(Promise(case_id=case.id, amount=Decimal("10"), promise_date=date(2026, 1, 2), status="fulfilled"))
+    db.session.add(Activity(case_id=case.id, type="call", created_by_id=portfolio["gestor"].id))
+    db.session.commit()
+
+    totals = db.session.query(
+        db.func.sum(DailyStat.casos_count), db.func.sum(DailyStat.promesas_cumplidas), db.func.sum(DailyStat.actividades_count)
+    ).one()
+    assert tuple(totals) == (5, 1, 1)
+    _assert_matches_rebuild()
+
+
+def test_rollup_mueve_metricas_al_cambiar_el_caso(app, portfolio):
+    """Cambiar estado, gestor o cartera mueve el caso y sus promesas/actividades."""
+    case = portfolio["cases"]["111_a"]
+    db.session.add(Promise(case_id=case.id, amount=Decimal("10"), promise_date=date(2026, 1, 2), status="pending"))
+    db.session.add(Activity(case_id=case.id, type="call", created_by_id=portfolio["gestor"].id))
+    db.session.commit()
+
+    case.status_id = portfolio["con_arreglo"].id
+    case.assigned_to_id = None
+    case.total = Decimal("1200.00")
+    db.session.commit()
+    _assert_matches_rebuild()
+
+    case.cartera_id = portfolio["cartera_b"].id
+    case.created_at = datetime(2026, 3, 1)
+    promise = case.promises.first()
+    promise.status = "fulfilled"
+    db.session.commit()
+    _assert_matches_rebuild()
+
+
+def test_rollup_mantenido_en_bajas(app, portfolio):
+    """Eliminar un caso (con cascada) descuenta todas sus métricas."""
+    case = portfolio["cases"]["222_b"]
+    db.session.add(Promise(case_id=case.id, amount=Decimal("10"), promise_date=date(2026, 1, 2), status="fulfilled"))
+    db.session.add(Activity(case_id=case.id, type="call", created_by_id=portfolio["gestor"].id))
+    db.session.commit()
+
+    db.session.delete(case)
+    db.session.commit()
+
+    assert get_cases_status_distribution() == {"Sin Arreglo": 4, "Con Arreglo": 0}
+    _assert_matches_rebuild()
+
+
+def test_rebuild_por_rango(app, portfolio):
+    """El rebuild parcial solo reescribe los días del rango."""
+    DailyStat.query.delete()
+    db.session.commit()
+
+    written = rebuild_daily_stats(date(2026, 1, 2), date(2026, 1, 3))
+    assert written == 2
+    assert sum(s.casos_count for s in DailyStat.query.all()) == 2
+
+
+def test_distribucion_por_cartera_desde_rollup(app, portfolio):
+    """La distribución por cartera suma los totales del rollup."""
+    data = get_cartera_distribution()
+    assert dict(zip(data["labels"], data["datasets"][0]["data"])) == {"Cartera A": 1300.0, "Cartera B": 2550.0}
+
+
+def test_rebuild_command(app, runner, portfolio):
+    """El comando CLI recalcula el rollup."""
+    DailyStat.query.delete()
+    db.session.commit()
+
+    result = runner.invoke(args=["daily-stats", "rebuild"])
+    assert "5 filas" in result.output
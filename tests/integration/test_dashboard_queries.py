@@ -0,0 +1,157 @@
+"""
+Tests de regresión de cantidad de consultas SQL en los servicios del dashboard.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.core.database import db
+from app.features.activities.models import Activity
+from app.features.cases.models import Case
+from app.features.cases.promise import Promise
+from app.features.users.models import User
+from app.services.dashboard import get_gestores_ranking, get_kpis, get_performance_chart_data
+from app.services.reference_data import get_reference_data
+from app.utils.exceptions import ValidationError
+
+
+@pytest.fixture
+def warm_refdata(portfolio):
+    """Carga el registro de estados y carteras antes de contar (es una vez por proceso)."""
+    get_reference_data()
+
+
+def _grow_portfolio(portfolio, n):
+    """Agrega n casos (con promesa y actividad) a la cartera de ejemplo."""
+    gestor = portfolio["gestor"]
+    base = datetime(2026, 2, 1)
+    for i in range(n):
+        status = portfolio["con_arreglo"] if i % 2 else portfolio["sin_arreglo"]
+        c = Case(
+            name=f"Extra {i}",
+            lastname="Extra",
+            dni=f"9{i:05d}",
+            total=Decimal("100.00"),
+            cartera_id=portfolio["cartera_a"].id,
+            status_id=status.id,
+            assigned_to_id=gestor.id,
+            created_at=base + timedelta(hours=i),
+        )
+        db.session.add(c)
+        db.session.flush()
+        db.session.add(Promise(case_id=c.id, amount=Decimal("10.00"), promise_date=base.date(), status="fulfilled"))
+        db.session.add(Activity(case_id=c.id, type="call", created_by_id=gestor.id))
+    db.session.commit()
+
+
+def test_get_kpis_values(app, portfolio):
+    """Los KPIs agregados coinciden con los datos de ejemplo."""
+    kpis = get_kpis()
+
+    assert kpis["total_casos"] == 5
+    assert kpis["casos_pagados"] == 1
+    assert kpis["monto_recuperado"] == 2000.0
+    assert kpis["total_deuda"] == 3850.0
+    assert kpis["tasa_recupero"] == round(2000 / 3850 * 100, 2)
+
+    kpis = get_kpis(gestor_id=portfolio["gestor"].id, cartera_id=portfolio["cartera_b"].id)
+    assert kpis["total_casos"] == 2
+    assert kpis["total_deuda"] == 2050.0
+
+
+@pytest.mark.parametrize("filter_name", [None, "gestor_id", "cartera_id"])
+def test_get_kpis_constant_query_count(app, portfolio, warm_refdata, filter_name, count_queries):
+    """La cantidad de consultas de get_kpis no crece con el tamaño de la cartera."""
+    filters = {}
+    if filter_name == "gestor_id":
+        filters["gestor_id"] = portfolio["gestor"].id
+    elif filter_name == "cartera_id":
+        filters["cartera_id"] = portfolio["cartera_a"].id
+
+    with count_queries() as small:
+        get_kpis(**filters)
+
+    _grow_portfolio(portfolio, 50)
+
+    with count_queries() as large:
+        kpis = get_kpis(**filters)
+
+    assert len(large) == len(small) <= 3
+    assert kpis["total_casos"] >= 50
+
+
+def test_get_gestores_ranking_values(app, portfolio):
+    """El ranking agrupado calcula las métricas por gestor y respeta los filtros."""
+    otro = User(username="gestor2", password_hash="x", role="gestor", active=True)
+    db.session.add(otro)
+    db.session.commit()
+
+    ranking = get_gestores_ranking()
+    assert [g["gestor_name"] for g in ranking] == ["gestor", "gestor2"]
+    assert ranking[0]["monto_recuperado"] == 2000.0
+    assert ranking[0]["total_casos"] == 3
+    assert ranking[0]["casos_pagados"] == 1
+    assert ranking[1]["total_casos"] == 0
+
+    ranking = get_gestores_ranking(cartera_id=portfolio["cartera_a"].id)
+    assert ranking[0]["total_casos"] == 1
+    assert ranking[0]["monto_recuperado"] == 0.0
+
+    ranking = get_gestores_ranking(start_date=datetime(2030, 1, 1))
+    assert all(g["total_casos"] == 0 for g in ranking)
+
+
+def test_get_gestores_ranking_constant_query_count(app, portfolio, warm_refdata, count_queries):
+    """El ranking usa una sola consulta sin importar la cantidad de gestores."""
+    with count_queries() as few:
+        get_gestores_ranking()
+
+    for i in range(10):
+        db.session.add(User(username=f"extra{i}", password_hash="x", role="gestor", active=True))
+    db.session.commit()
+    _grow_portfolio(portfolio, 20)
+
+    with count_queries() as many:
+        ranking = get_gestores_ranking(limit=20)
+
+    assert len(many) == len(few) == 1
+    assert len(ranking) == 11
+
+
+@pytest.mark.parametrize(
+    "granularity,expected_labels",
+    [("week", ["Sem 1", "Sem 2"]), ("month", ["12/2025", "01/2026"]), ("day", None)],
+)
+def test_get_performance_chart_buckets(app, portfolio, granularity, expected_labels):
+    """El gráfico agrupa por bucket de fecha y completa los vacíos con 0."""
+    start, end = datetime(2025, 12, 30), datetime(2026, 1, 10)
+    chart = get_performance_chart_data(start, end, granularity=granularity)
+
+    if expected_labels:
+        assert chart["labels"] == expected_labels
+    else:
+        assert len(chart["labels"]) == 11
+    datasets = {d["label"]: d["data"] for d in chart["datasets"]}
+    assert sum(datasets["Cartera B"]) == 2000.0
+    assert sum(datasets["Cartera A"]) == 0.0
+    assert len(datasets["Cartera B"]) == len(chart["labels"])
+
+    # El caso con arreglo (2026-01-04, domingo) cae en la semana del lunes 29/12
+    if granularity == "week":
+        assert datasets["Cartera B"] == [2000.0, 0.0]
+
+
+def test_get_performance_chart_single_query(app, portfolio, warm_refdata, count_queries):
+    """El gráfico usa una sola consulta de montos sin importar el rango (carteras en memoria)."""
+    with count_queries() as statements:
+        get_performance_chart_data(datetime(2025, 1, 1), datetime(2026, 12, 31), granularity="day")
+
+    assert len(statements) == 1
+
+
+def test_get_performance_chart_invalid_granularity(app):
+    """Una granularidad desconocida es un error de validación."""
+    with pytest.raises(ValidationError):
+        get_performance_chart_data(granularity="year")
@@ -0,0 +1,144 @@
+"""
+Tests del resumen por cliente (tabla debtors).
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.core.database import db
+from app.features.cases.models import Case
+from app.features.stats.models import Debtor
+from app.services.case_import import import_cases
+from app.services.dashboard import get_clientes_con_multiples_deudas
+from app.services.debtors import rebuild_debtors
+
+
+def _snapshot():
+    return {d.dni: d.to_dict() for d in Debtor.query.all()}
+
+
+def _assert_matches_rebuild():
+    incremental = _snapshot()
+    rebuild_debtors()
+    assert _snapshot() == incremental
+
+
+def test_resumen_mantenido_en_altas(app, portfolio):
+    """Cada DNI tiene su fila con totales, carteras y gestores; los casos sin DNI no."""
+    rows = _snapshot()
+
+    assert sorted(rows) == ["111", "222", "333"]
+    assert rows["111"]["total_deudas"] == 2
+    assert rows["111"]["deuda_consolidada"] == 1500.0
+    assert rows["111"]["cartera_ids"] == sorted([portfolio["cartera_a"].id, portfolio["cartera_b"].id])
+    assert rows["111"]["gestor_ids"] == [portfolio["gestor"].id]
+    assert rows["111"]["ultima_deuda"] == portfolio["cases"]["111_b"].created_at.isoformat()
+    assert rows["333"]["gestor_ids"] == []
+    _assert_matches_rebuild()
+
+
+def test_resumen_sigue_cambios_de_caso_y_de_dni(app, portfolio):
+    cases = portfolio["cases"]
+    cases["111_a"].total = Decimal("1200.00")
+    cases["111_a"].fecha_ultimo_pago = date(2026, 2, 1)
+    cases["333_a"].assigned_to_id = portfolio["gestor"].id
+    db.session.commit()
+
+    debtor = db.session.get(Debtor, "111")
+    assert (float(debtor.deuda_consolidada), debtor.fecha_ultimo_pago) == (1700.0, date(2026, 2, 1))
+    assert db.session.get(Debtor, "333").gestor_ids == [portfolio["gestor"].id]
+    _assert_matches_rebuild()
+
+    # Cambiar el DNI mueve la deuda de un cliente a otro (expirado tras el commit)
+    cases["111_b"].dni = "444"
+    cases["sin_dni_b"].dni = "222"
+    db.session.commit()
+
+    rows = _snapshot()
+    assert rows["111"]["total_deudas"] == 1
+    assert rows["444"]["total_deudas"] == 1
+    assert rows["222"]["total_deudas"] == 2
+    _assert_matches_rebuild()
+
+
+def test_resumen_mantenido_en_bajas(app, portfolio):
+    db.session.delete(portfolio["cases"]["333_a"])
+    db.session.delete(portfolio["cases"]["111_b"])
+    db.session.commit()
+
+    rows = _snapshot()
+    assert sorted(rows) == ["111", "222"]
+    assert rows["111"]["cartera_ids"] == [portfolio["cartera_a"].id]
+    _assert_matches_rebuild()
+
+
+def test_importacion_actualiza_resumen(app, portfolio):
+    kwargs = {"cartera_id": portfolio["cartera_a"].id, "status_id": portfolio["sin_arreglo"].id}
+    rows = [
+        {"nro_cliente": "900001", "name": "ANA", "lastname": "PEREZ", "dni": "222", "total": "100"},
+        {"nro_cliente": "900002", "name": "JUAN", "lastname": "GOMEZ", "dni": "555", "total": "50"},
+    ]
+    import_cases(rows, **kwargs)
+    assert db.session.get(Debtor, "222").total_deudas == 2
+    assert db.session.get(Debtor, "555").total_deudas == 1
+
+    # La actualización sin DNI saca la deuda del cliente anterior
+    import_cases([dict(rows[1], dni="")], on_conflict="update", **kwargs)
+    assert db.session.get(Debtor, "555") is None
+    _assert_matches_rebuild()
+
+
+def test_multiples_deudas_desde_resumen(app, portfolio, count_queries):
+    db.session.add(
+        Case(
+            name="Otro",
+            lastname="Cliente",
+            dni="222",
+            total=Decimal("10.00"),
+            cartera_id=portfolio["cartera_a"].id,
+            status_id=portfolio["sin_arreglo"].id,
+            created_at=datetime(2026, 1, 10),
+        )
+    )
+    db.session.commit()
+
+    with count_queries() as statements:
+        clientes = get_clientes_con_multiples_deudas()
+    assert [c["dni"] for c in clientes] == ["222", "111"]
+    assert clientes[0]["deuda_consolidada"] == 2010.0
+    assert statements and not any("GROUP BY" in s for s in statements)
+
+    # Con filtros se cuentan solo las deudas de esa cartera
+    assert get_clientes_con_multiples_deudas(cartera_id=portfolio["cartera_b"].id) == []
+
+
+def test_rebuild_command(app, runner, portfolio):
+    Debtor.query.delete()
+    db.session.commit()
+
+    result = runner.invoke(args=["debtors", "rebuild"])
+    assert "3 clientes" in result.output
+    assert db.session.get(Debtor, "111").total_deudas == 2
+
+
+def test_cambio_de_dni_invalida_reporte_cacheado(app, portfolio):
+    """Editar el DNI no mueve el rollup, pero el reporte por cartera/gestor se recalcula."""
+    cartera_b, gestor = portfolio["cartera_b"].id, portfolio["gestor"].id
+    assert get_clientes_con_multiples_deudas(cartera_id=cartera_b) == []
+    assert get_clientes_con_multiples_deudas(gestor_id=gestor) == []
+
+    portfolio["cases"]["sin_dni_b"].dni = "222"
+    db.session.commit()
+
+    assert [c["dni"] for c in get_clientes_con_multiples_deudas(cartera_id=cartera_b)] == ["222"]
+    assert [c["dni"] for c in get_clientes_con_multiples_deudas(gestor_id=gestor)] == ["222"]
+
+
+def test_importacion_sin_cambio_de_total_invalida_reporte(app, portfolio):
+    kwargs = {"cartera_id": portfolio["cartera_a"].id, "status_id": portfolio["sin_arreglo"].id}
+    row = {"nro_cliente": "900001", "name": "ANA", "lastname": "PEREZ", "dni": "555", "total": "100"}
+    import_cases([row], **kwargs)
+    assert get_clientes_con_multiples_deudas(cartera_id=kwargs["cartera_id"]) == []
+
+    import_cases([dict(row, dni="111")], on_conflict="update", **kwargs)
+    assert [c["dni"] for c in get_clientes_con_multiples_deudas(cartera_id=kwargs["cartera_id"])] == ["111"]
@@ -0,0 +1,147 @@
+"""
+Tests de la cola de emails salientes (email_outbox) contra un SMTP local.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from app.core.database import db
+from app.features.contact.models import OutboundEmail
+from app.services.email_outbox import OutboxSender, enqueue_email, process_outbox
+
+
+def _enqueue():
+    return enqueue_email(
+        recipients=["equipo@test.com", "otro@test.com"],
+        subject="Solicitud - Empresa Test",
+        body_text="Texto",
+        body_html="<p>Texto</p>",
+        reply_to="juan@test.com",
+    )
+
+
+def test_contact_form_enqueues_without_sending(client, app, sample_submission, monkeypatch):
+    """El endpoint solo encola: no abre conexiones SMTP dentro del request."""
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("el request no debe enviar por SMTP")
+
+    monkeypatch.setattr("app.services.email_outbox.send_many", _fail)
+    monkeypatch.setattr("app.services.email_service.smtplib.SMTP", _fail)
+
+    response = client.post("/api/contact", data=sample_submission)
+
+    assert response.status_code == 200
+    emails = OutboundEmail.query.all()
+    assert len(emails) == 1
+    assert emails[0].status == OutboundEmail.PENDING
+    assert emails[0].reply_to == sample_submission["email"]
+    assert emails[0].recipient_list == app.config["CONTACT_RECIPIENTS"]
+
+
+def test_process_outbox_sends_pending(app, smtp_server):
+    email = _enqueue()
+
+    stats = process_outbox()
+
+    assert stats == {"sent": 1, "retried": 0, "failed": 0, "held": 0}
+    db.session.refresh(email)
+    assert email.status == OutboundEmail.SENT
+    assert email.attempts == 1
+    assert email.sent_at is not None
+    assert len(smtp_server.messages) == 1
+    message = smtp_server.messages[0]
+    assert message["to"] == ["equipo@test.com", "otro@test.com"]
+    assert "Reply-To: juan@test.com" in message["data"]
+
+    # Ya enviado: una segunda pasada no lo reenvía
+    assert process_outbox()["sent"] == 0
+    assert len(smtp_server.messages) == 1
+
+
+def test_process_outbox_without_credentials_holds_and_warns(app, caplog):
+    """Sin credenciales los emails quedan en la cola y cada pasada lo advierte."""
+    app.config.update(MAIL_USERNAME="", MAIL_PASSWORD="")
+    email = _enqueue()
+
+    for _ in range(2):
+        caplog.clear()
+        assert process_outbox() == {"sent": 0, "retried": 0, "failed": 0, "held": 1}
+        assert any("1 emails esperan en la cola" in r.getMessage() for r in caplog.records if r.levelname == "WARNING")
+
+    db.session.refresh(email)
+    assert email.status == OutboundEmail.PENDING
+    assert email.attempts == 0
+
+
+def test_process_outbox_retries_with_backoff(app, smtp_server):
+    app.config["MAIL_OUTBOX_BACKOFF_BASE"] = 60
+    smtp_server.fail_next = 1
+    email = _enqueue()
+
+    stats = process_outbox()
+
+    assert stats["retried"] == 1
+    db.session.refresh(email)
+    assert email.status == OutboundEmail.PENDING
+    assert email.attempts == 1
+    assert email.last_error
+    assert email.next_attempt_at > datetime.utcnow() + timedelta(seconds=50)
+
+    # Antes de que venza el backoff no se reintenta
+    assert process_outbox() == {"sent": 0, "retried": 0, "failed": 0, "held": 0}
+
+    email.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert process_outbox()["sent"] == 1
+    db.session.refresh(email)
+    assert email.status == OutboundEmail.SENT
+    assert email.attempts == 2
+    assert email.last_error is None
+
+
+def test_process_outbox_gives_up_after_max_attempts(app, smtp_server):
+    app.config["MAIL_OUTBOX_MAX_ATTEMPTS"] = 2
+    smtp_server.fail_next = 5
+    email = _enqueue()
+
+    assert process_outbox()["retried"] == 1
+    email.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert process_outbox()["failed"] == 1
+
+    db.session.refresh(email)
+    assert email.status == OutboundEmail.FAILED
+    assert email.attempts == 2
+    assert smtp_server.messages == []
+
+
+def test_claimed_email_is_retaken_after_lease(app, smtp_server):
+    """Un email "sending" de otro proceso solo se vuelve a tomar al vencer su lease."""
+    email = _enqueue()
+    email.status = OutboundEmail.SENDING
+    email.attempts = 1
+    email.next_attempt_at = datetime.utcnow() + timedelta(seconds=60)
+    db.session.commit()
+
+    assert process_outbox()["sent"] == 0
+
+    email.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert process_outbox()["sent"] == 1
+    assert len(smtp_server.messages) == 1
+
+
+def test_outbox_sender_thread_sends_after_wake(app, smtp_server):
+    app.config["MAIL_OUTBOX_POLL_INTERVAL"] = 60
+    email = _enqueue()
+    sender = OutboxSender(app)
+
+    sender.wake()
+    deadline = time.monotonic() + 5
+    while email.status != OutboundEmail.SENT and time.monotonic() < deadline:
+        time.sleep(0.05)
+        db.session.refresh(email)
+
+    assert email.status == OutboundEmail.SENT
+    assert len(smtp_server.messages) == 1
@@ -0,0 +1,132 @@
+"""
+Tests de la lista de trabajo del gestor (filtros, búsqueda, orden y paginación en SQL).
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.core.database import db
+from app.features.carteras.models import Cartera
+from app.services.dashboard import _fecha_limite_mora, get_casos_agrupados_por_dni, get_gestor_worklist
+from app.utils.exceptions import ValidationError
+
+
+def _dnis(grupos):
+    return [g["dni"] or g["deudas"][0]["id"] for g in grupos]
+
+
+def test_worklist_sin_filtros_coincide_con_agrupados(app, portfolio):
+    """Sin filtros la lista de trabajo es la misma que /gestor/agrupados, paginada."""
+    todos = _dnis(get_casos_agrupados_por_dni())
+
+    pagina_1, total = get_gestor_worklist(per_page=2)
+    pagina_2, _ = get_gestor_worklist(page=2, per_page=2)
+
+    assert total == 4
+    assert _dnis(pagina_1) + _dnis(pagina_2) == todos
+    assert pagina_1[0]["deuda_consolidada"] == 1500.0
+    assert get_gestor_worklist(page=3, per_page=2) == ([], 4)
+
+
+def test_worklist_filtra_por_cartera_gestor_y_estado(app, portfolio):
+    """Cartera y gestor siguen la regla de agrupados; el estado se exige en la misma deuda que la cartera."""
+    gestor_id = portfolio["gestor"].id
+    grupos, total = get_gestor_worklist(gestor_id=gestor_id, cartera_id=portfolio["cartera_b"].id)
+    assert _dnis(grupos) == _dnis(get_casos_agrupados_por_dni(cartera_id=portfolio["cartera_b"].id, gestor_id=gestor_id))
+    assert total == 3
+
+    grupos, _ = get_gestor_worklist(gestor_id=gestor_id, status_id=portfolio["con_arreglo"].id)
+    assert _dnis(grupos) == ["222"]
+
+    grupos, _ = get_gestor_worklist(cartera_id=portfolio["cartera_a"].id, status_id=portfolio["con_arreglo"].id)
+    assert grupos == []
+
+
+def test_worklist_rango_sobre_deuda_consolidada(app, portfolio):
+    grupos, _ = get_gestor_worklist(min_deuda=Decimal("1000"), sort="deuda")
+    assert _dnis(grupos) == ["222", "111"]
+
+    grupos, _ = get_gestor_worklist(max_deuda=Decimal("1000"), sort="deuda", descending=False)
+    assert _dnis(grupos) == [portfolio["cases"]["sin_dni_b"].id, "333"]
+
+    with pytest.raises(ValidationError):
+        get_gestor_worklist(min_deuda=Decimal("10"), max_deuda=Decimal("5"))
+
+
+def test_worklist_meses_de_mora(app, portfolio):
+    """Los meses de mora se cuentan desde fecha_ultimo_pago; sin fecha son 0."""
+    cases = portfolio["cases"]
+    cases["111_b"].fecha_ultimo_pago = _fecha_limite_mora(7, date.today())
+    cases["222_b"].fecha_ultimo_pago = _fecha_limite_mora(1, date.today())
+    db.session.commit()
+
+    grupos, _ = get_gestor_worklist(min_meses_mora=6)
+    assert _dnis(grupos) == ["111"]
+
+    grupos, _ = get_gestor_worklist(min_meses_mora=1, max_meses_mora=1)
+    assert _dnis(grupos) == ["222"]
+
+    grupos, _ = get_gestor_worklist(sort="mora")
+    assert _dnis(grupos)[:2] == ["111", "222"]
+
+
+def test_fecha_limite_mora_acota_el_dia():
+    assert _fecha_limite_mora(1, date(2026, 3, 31)) == date(2026, 2, 28)
+    assert _fecha_limite_mora(12, date(2026, 1, 15)) == date(2025, 1, 15)
+    assert _fecha_limite_mora(0, date(2026, 12, 31)) == date(2026, 12, 31)
+
+
+def test_worklist_busqueda_y_orden_por_nombre(app, portfolio):
+    grupos, total = get_gestor_worklist(search="apellido 222")
+    assert (_dnis(grupos), total) == (["222"], 1)
+
+    grupos, _ = get_gestor_worklist(search="33")
+    assert _dnis(grupos) == ["333"]
+
+    grupos, _ = get_gestor_worklist(sort="nombre", descending=False)
+    assert _dnis(grupos)[:3] == ["111", "222", "333"]
+
+
+def test_worklist_endpoint(client, portfolio):
+    """El gestor ve solo sus clientes, paginados por página."""
+    client.post("/api/login", data={"username": "gestor", "password": "gestor123"})
+
+    response = client.get("/api/cases/gestor/worklist?per_page=2&sort=deuda")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert _dnis(data["data"]) == ["222", "111"]
+    assert data["pagination"] == {"page": 1, "per_page": 2, "total": 3, "pages": 2}
+
+    response = client.get("/api/cases/gestor/worklist?per_page=2&sort=deuda&page=2")
+    assert _dnis(response.get_json()["data"]) == [portfolio["cases"]["sin_dni_b"].id]
+
+    response = client.get(f"/api/cases/gestor/worklist?cartera_id={portfolio['cartera_a'].id}&search=nombre")
+    assert _dnis(response.get_json()["data"]) == ["111"]
+
+    for query in ("sort=foo", "order=up", "min_deuda=abc", "max_meses_mora=-1", "per_page=500"):
+        response = client.get(f"/api/cases/gestor/worklist?{query}")
+        assert response.status_code == 400, query
+
+
+def test_carteras_con_casos_del_gestor(app, client, portfolio):
+    """El panel del gestor elige de entrada una cartera con casos asignados a él."""
+    db.session.add(Cartera(nombre="Cartera Vacía", activo=True))
+    db.session.commit()
+    client.post("/api/login", data={"username": "gestor", "password": "gestor123"})
+
+    carteras = client.get("/api/carteras?con_casos=true").get_json()
+    assert {c["nombre"]: c["con_casos"] for c in carteras} == {
+        portfolio["cartera_a"].nombre: True,
+        portfolio["cartera_b"].nombre: True,
+        "Cartera Vacía": False,
+    }
+    assert all("con_casos" not in c for c in client.get("/api/carteras").get_json())
+
+    # Al reasignar sus casos de la cartera B, deja de figurar (el cache se invalida)
+    for key in ("222_b", "sin_dni_b"):
+        portfolio["cases"][key].assigned_to_id = None
+    db.session.commit()
+    carteras = client.get("/api/carteras?con_casos=true").get_json()
+    assert [c["nombre"] for c in carteras if c["con_casos"]] == [portfolio["cartera_a"].nombre]
@@ -0,0 +1,60 @@
+"""
+Tests del endpoint /metrics (formato Prometheus).
+"""
+
+import pytest
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+from app.core.database import db  # noqa: E402
+from app.features.contact.models import OutboundEmail  # noqa: E402
+
+
+def _sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_latencia_y_requests_por_endpoint(authenticated_client):
+    antes = _sample("http_request_duration_seconds_count", endpoint="healthz", method="GET")
+    authenticated_client.get("/healthz")
+    authenticated_client.get("/healthz")
+
+    assert _sample("http_request_duration_seconds_count", endpoint="healthz", method="GET") == antes + 2
+    assert _sample("http_requests_total", endpoint="healthz", method="GET", status="200") >= 2
+
+
+def test_hit_ratio_del_cache(authenticated_client, portfolio):
+    hits = _sample("cache_requests_total", result="hit")
+    misses = _sample("cache_requests_total", result="miss")
+    authenticated_client.get("/api/dashboard/kpis")
+    authenticated_client.get("/api/dashboard/kpis")
+
+    assert _sample("cache_requests_total", result="miss") == misses + 1
+    assert _sample("cache_requests_total", result="hit") == hits + 1
+
+
+def test_exposicion_con_cola_de_emails(app, client):
+    db.session.add(OutboundEmail(recipients="a@example.com", subject="s", body_text="b"))
+    db.session.commit()
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert 'email_outbox_queue{status="pending"} 1.0' in body
+    assert "http_request_duration_seconds_bucket" in body
+    assert 'db_pool_connections{state="in_use"}' in body
+
+
+def test_token_y_rechazos(app, client):
+    app.config["METRICS_TOKEN"] = "secreto"
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer secreto"}).status_code == 200
+
+    from app.services.login_throttle import init_login_throttle
+
+    antes = _sample("http_rate_limited_total", endpoint="auth.login")
+    app.config["LOGIN_MAX_FAILURES"] = 1
+    init_login_throttle(app)
+    for _ in range(3):
+        client.post("/api/login", data={"username": "admin", "password": "mal"})
+    assert _sample("http_rate_limited_total", endpoint="auth.login") > antes
@@ -0,0 +1,102 @@
+"""
+Tests del readiness probe (/readyz).
+"""
+
+import time
+
+import pytest
+
+from app.core import redis_client as redis_module
+from app.core.database import db
+from app.services import readiness
+from app.services.readiness import _migration_heads
+
+
+@pytest.fixture
+def ready_app(app):
+    app.config["READYZ_CACHE_SECONDS"] = 0
+    return app
+
+
+def _heads(app):
+    return list(_migration_heads(str(app.config["ROOT_DIR"] + "/migrations")))
+
+
+def test_readyz_con_dependencias_sanas(ready_app, client):
+    response = client.get("/readyz")
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["status"] == "ready"
+    assert data["checks"]["database"]["status"] == "ok"
+    assert data["checks"]["database"]["latency_ms"] >= 0
+    assert data["checks"]["redis"]["status"] == "disabled"
+    # Tablas creadas con create_all: sin alembic_version no es una falla
+    assert data["checks"]["migrations"] == {
+        "status": "unversioned",
+        "head": _heads(ready_app),
+        "latency_ms": data["checks"]["migrations"]["latency_ms"],
+    }
+
+
+def test_readyz_compara_revision_con_head(ready_app, client):
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)")
+        connection.exec_driver_sql("INSERT INTO alembic_version VALUES ('20200101000000')")
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json()["checks"]["migrations"]["status"] == "mismatch"
+
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql(f"UPDATE alembic_version SET version_num = '{_heads(ready_app)[0]}'")
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json()["checks"]["migrations"]["status"] == "ok"
+
+
+def test_readyz_vence_si_la_base_no_responde(ready_app, client, monkeypatch):
+    release = []
+
+    def _hung(timeout):
+        while not release:
+            time.sleep(0.01)
+        return {"status": "ok"}
+
+    monkeypatch.setitem(readiness.CHECKS, "database", _hung)
+    ready_app.config["READYZ_TIMEOUT"] = 0.2
+    try:
+        started = time.monotonic()
+        response = client.get("/readyz")
+        assert time.monotonic() - started < 1
+        assert response.status_code == 503
+        assert response.get_json()["checks"]["database"]["status"] == "timeout"
+
+        # Mientras el chequeo anterior siga colgado no se lanza otro
+        response = client.get("/readyz")
+        assert response.get_json()["checks"]["database"]["error"] == "el chequeo anterior sigue en curso"
+    finally:
+        release.append(True)
+
+
+def test_redis_caido_degrada_sin_sacar_de_servicio(ready_app, client):
+    ready_app.config["REDIS_URL"] = "redis://localhost:6399/0"
+    ready_app.config["READYZ_TIMEOUT"] = 2
+    redis_module.init_redis(ready_app)
+
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "degraded"
+    assert response.get_json()["checks"]["redis"]["status"] == "down"
+
+    ready_app.config["READYZ_REQUIRE_REDIS"] = True
+    assert client.get("/readyz").status_code == 503
+
+
+def test_resultado_cacheado(app, client, monkeypatch):
+    calls = []
+    monkeypatch.setitem(readiness.CHECKS, "redis", lambda timeout: calls.append(1) or {"status": "ok"})
+
+    assert client.get("/readyz").get_json()["cached"] is False
+    assert client.get("/readyz").get_json()["cached"] is True
+    assert len(calls) == 1
@@ -0,0 +1,71 @@
+"""
+Tests del registro en memoria de estados y carteras.
+"""
+
+from app.core.database import db
+from app.services.dashboard import get_kpis
+from app.services.reference_data import get_reference_data
+
+
+def _registry(app):
+    return app.extensions["reference_data"]
+
+
+def test_registro_resuelve_sin_consultas(app, portfolio, count_queries):
+    """Tras la primera carga, estados y carteras se resuelven en memoria."""
+    refdata = get_reference_data()
+    assert refdata.status_id("Con Arreglo") == portfolio["con_arreglo"].id
+    assert refdata.cartera(str(portfolio["cartera_a"].id)).nombre == portfolio["cartera_a"].nombre
+    assert refdata.status_by_name("Inexistente") is None
+
+    loads = _registry(app).loads
+    status_id = portfolio["sin_arreglo"].id
+    with count_queries() as statements:
+        for _ in range(10):
+            assert get_reference_data().status(status_id).nombre == "Sin Arreglo"
+    assert statements == []
+    assert _registry(app).loads == loads
+
+
+def test_inactivos_solo_bajo_pedido(app, portfolio):
+    portfolio["cartera_b"].activo = False
+    db.session.commit()
+
+    refdata = get_reference_data()
+    assert refdata.cartera(portfolio["cartera_b"].id) is None
+    assert refdata.cartera(portfolio["cartera_b"].id, active_only=False).activo is False
+    assert portfolio["cartera_b"].id not in [c.id for c in refdata.carteras()]
+
+
+def test_alta_y_baja_de_cartera_invalidan(app, authenticated_client, portfolio):
+    response = authenticated_client.get("/api/carteras")
+    antes = {c["nombre"] for c in response.get_json()}
+
+    response = authenticated_client.post("/api/carteras", json={"nombre": "Cartera Nueva"})
+    assert response.status_code in (200, 201)
+    cartera_id = response.get_json()["data"]["id"]
+
+    response = authenticated_client.get("/api/carteras")
+    assert {c["nombre"] for c in response.get_json()} == antes | {"Cartera Nueva"}
+    assert get_reference_data().cartera(cartera_id) is not None
+
+    authenticated_client.delete(f"/api/carteras/{cartera_id}")
+    assert get_reference_data().cartera(cartera_id) is None
+
+
+def test_rollback_no_invalida(app, portfolio):
+    get_reference_data()
+    loads = _registry(app).loads
+
+    portfolio["cartera_a"].nombre = "Renombrada"
+    db.session.flush()
+    db.session.rollback()
+
+    assert get_reference_data().cartera(portfolio["cartera_a"].id).nombre != "Renombrada"
+    assert _registry(app).loads == loads
+
+
+def test_kpis_usan_estado_resuelto(app, portfolio):
+    kpis = get_kpis()
+    assert kpis["casos_pagados"] == 1
+    assert kpis["monto_recuperado"] == 2000.0
@@ -0,0 +1,69 @@
+"""
+Tests de la instrumentación por request (Server-Timing, log por request, consultas lentas).
+"""
+
+import json
+import logging
+import re
+
+from app.services.profiling import normalize_sql, request_profile_stats
+
+
+def _timing(response):
+    header = response.headers["Server-Timing"]
+    queries = int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', header).group(1))
+    hits, misses = map(int, re.search(r'cache;desc="(\d+) hits, (\d+) misses"', header).groups())
+    return queries, hits, misses
+
+
+def test_server_timing_cuenta_consultas_y_cache(authenticated_client, portfolio):
+    response = authenticated_client.get("/api/dashboard/kpis")
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("app;dur=")
+    queries, hits, misses = _timing(response)
+    assert queries >= 1 and (hits, misses) == (0, 1)
+
+    # Segunda vez sale del cache: sin la consulta de KPIs
+    response = authenticated_client.get("/api/dashboard/kpis")
+    assert _timing(response)[1:] == (1, 0)
+    assert _timing(response)[0] < queries
+
+    stats = request_profile_stats()["api_v1.dashboard_kpis"]
+    assert stats["requests"] == 2
+    assert stats["cache_hits"] == 1 and stats["queries"] >= queries
+
+
+def test_log_por_request(app, client, caplog):
+    with caplog.at_level(logging.INFO, logger="request_profile"):
+        client.get("/healthz")
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["endpoint"] == "healthz"
+    assert record["status"] == 200
+    assert record["queries"] == 0
+
+    app.config["REQUEST_LOG"] = False
+    app.config["SERVER_TIMING"] = False
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="request_profile"):
+        response = client.get("/healthz")
+    assert not caplog.records
+    assert "Server-Timing" not in response.headers
+
+
+def test_log_de_consultas_lentas(app, authenticated_client, caplog):
+    with caplog.at_level(logging.WARNING, logger="slow_query"):
+        authenticated_client.get("/api/case-statuses")
+    assert not caplog.records
+
+    app.config["SLOW_QUERY_MS"] = 0.000001
+    with caplog.at_level(logging.WARNING, logger="slow_query"):
+        authenticated_client.get("/api/cases?status=1")
+    records = [json.loads(r.getMessage()) for r in caplog.records]
+    assert records and all(r["endpoint"] == "api_v1.list_cases" for r in records)
+    assert all("'" not in r["sql"] and "\n" not in r["sql"] for r in records)
+
+
+def test_normalize_sql():
+    sql = "SELECT *\n  FROM cases\n WHERE dni = '30.111' AND id IN (?, ?, ?) AND total > 10.5 LIMIT %(param_1)s"
+    assert normalize_sql(sql) == "SELECT * FROM cases WHERE dni = ? AND id IN (?, ...) AND total > ? LIMIT ?"
+    assert normalize_sql("SELECT anon_1.x FROM t WHERE y = :y_1") == "SELECT anon_1.x FROM t WHERE y = ?"
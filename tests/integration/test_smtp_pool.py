@@ -0,0 +1,70 @@
+"""
+Tests del envío en lote (send_many) sobre sesiones SMTP reutilizadas.
+"""
+
+import socket
+
+from app.services.email_service import EXTENSION_KEY, send_many
+from app.utils.exceptions import EmailError
+
+
+def _messages(n):
+    return [{"recipients": [f"deudor{i}@test.com"], "subject": f"Recordatorio {i}", "body_text": "Texto"} for i in range(n)]
+
+
+def test_send_many_uses_one_session(app, smtp_server):
+    results = send_many(_messages(3))
+
+    assert results == [None, None, None]
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+
+
+def test_session_is_reused_between_batches(app, smtp_server):
+    send_many(_messages(2))
+    send_many(_messages(2))
+
+    assert len(smtp_server.messages) == 4
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+
+
+def test_reconnects_when_session_was_closed(app, smtp_server):
+    send_many(_messages(1))
+    pooled = app.extensions[EXTENSION_KEY]._idle[0]
+    pooled._smtp.sock.shutdown(socket.SHUT_RDWR)
+
+    results = send_many(_messages(2))
+
+    assert results == [None, None]
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 2
+
+
+def test_rejected_message_does_not_stop_batch(app, smtp_server):
+    smtp_server.fail_next = 1
+
+    results = send_many(_messages(3))
+
+    assert isinstance(results[0], EmailError)
+    assert results[1:] == [None, None]
+    assert smtp_server.connections == 1
+
+
+def test_session_renewed_after_max_messages(app, smtp_server):
+    app.config["MAIL_POOL_MAX_MESSAGES"] = 2
+
+    results = send_many(_messages(3))
+
+    assert results == [None, None, None]
+    assert smtp_server.connections == 2
+
+
+def test_unreachable_server_fails_whole_batch(app, smtp_server):
+    app.config["MAIL_PORT"] = 1
+
+    results = send_many(_messages(3))
+
+    assert all(isinstance(r, EmailError) for r in results)
+    assert "conectar" in results[0].message
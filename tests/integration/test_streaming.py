@@ -0,0 +1,59 @@
+"""
+Tests de las respuestas en streaming (JSON / NDJSON).
+"""
+
+import gzip
+import json
+
+
+def _login_gestor(client):
+    client.post("/api/login", data={"username": "gestor", "password": "gestor123"})
+
+
+def test_gestor_cases_stream_json(app, client, portfolio):
+    """stream=json devuelve el mismo documento que la respuesta normal."""
+    _login_gestor(client)
+    expected = client.get("/api/cases/gestor").get_json()
+
+    response = client.get("/api/cases/gestor?stream=json", headers={"Accept-Encoding": "deflate"})
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert "Content-Encoding" not in response.headers
+    assert json.loads(response.get_data()) == expected
+
+
+def test_gestor_cases_stream_ndjson(app, client, portfolio):
+    """stream=ndjson envía un caso por línea."""
+    _login_gestor(client)
+    expected = client.get("/api/cases/gestor").get_json()["data"]
+
+    response = client.get("/api/cases/gestor?stream=ndjson")
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == expected
+
+
+def test_stream_gzip_incremental(app, client, portfolio):
+    """Con Accept-Encoding gzip el stream sale comprimido una sola vez."""
+    _login_gestor(client)
+    expected = client.get("/api/cases/gestor").get_json()
+
+    response = client.get("/api/cases/gestor?stream=json", headers={"Accept-Encoding": "gzip, deflate, br"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.get_data())) == expected
+
+
+def test_agrupados_stream_json(app, client, portfolio):
+    """La vista agrupada en streaming incluye los totales al final del documento."""
+    _login_gestor(client)
+    expected = client.get("/api/cases/gestor/agrupados").get_json()
+
+    data = json.loads(client.get("/api/cases/gestor/agrupados?stream=json").get_data())
+    assert data == expected
+    assert data["total_grupos"] == 3
+
+
+def test_stream_invalido(app, client, portfolio):
+    _login_gestor(client)
+    assert client.get("/api/cases/gestor?stream=xml").status_code == 400
+    assert client.get("/api/cases/gestor/agrupados?stream=json&limit=2").status_code == 400
@@ -0,0 +1,241 @@
+"""
+Tests para el servicio de cache (invalidación por generaciones).
+"""
+
+import fnmatch
+import json
+import threading
+from decimal import Decimal
+
+import pytest
+
+from app.core.database import db
+from app.services import cache as cache_service
+from app.services.cache import cache_result, get_cache_key, invalidate_cache, invalidate_scopes
+
+
+class FakeRedis:
+    """Cliente Redis mínimo en memoria para tests."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def setex(self, key, timeout, value):
+        self.data[key] = value
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def delete(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+    def scan_iter(self, match=None, count=None):
+        return [k for k in list(self.data) if fnmatch.fnmatch(k, match)]
+
+    def unlink(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(cache_service, "get_redis_client", lambda: client)
+    return client
+
+
+@pytest.fixture
+def counted():
+    """Función cacheada con scope por cartera/gestor que cuenta sus ejecuciones."""
+    calls = []
+
+    @cache_result(timeout=60, key_prefix="test", scope=("cartera_id", "gestor_id"))
+    def compute(cartera_id=None, gestor_id=None):
+        calls.append((cartera_id, gestor_id))
+        return {"cartera_id": cartera_id, "gestor_id": gestor_id}
+
+    return compute, calls
+
+
+def test_cache_hit(app, fake_redis, counted):
+    """La segunda llamada con los mismos argumentos sale de cache."""
+    compute, calls = counted
+    assert compute(1) == compute(1)
+    assert len(calls) == 1
+
+
+def test_invalidate_scopes_solo_afecta_scopes_relacionados(app, fake_redis, counted):
+    """Invalidar una cartera vuelve obsoletas sus entradas y las globales, no las demás."""
+    compute, calls = counted
+    compute(cartera_id=1)
+    compute(cartera_id=2)
+    compute()
+
+    invalidate_scopes(cartera_ids=[1])
+    calls.clear()
+
+    compute(cartera_id=1)
+    compute(cartera_id=2)
+    compute()
+    assert calls == [(1, None), (None, None)]
+
+
+def test_invalidacion_al_confirmar_escrituras(app, fake_redis, counted, portfolio):
+    """Un commit que modifica casos invalida la cartera y el gestor afectados."""
+    compute, calls = counted
+    gestor_id = portfolio["gestor"].id
+    cartera_a, cartera_b = portfolio["cartera_a"].id, portfolio["cartera_b"].id
+    compute(cartera_id=cartera_a)
+    compute(cartera_id=cartera_b)
+    compute(gestor_id=gestor_id)
+
+    case = portfolio["cases"]["333_a"]
+    case.total = Decimal("999.00")
+    db.session.commit()
+    calls.clear()
+
+    compute(cartera_id=cartera_a)
+    compute(cartera_id=cartera_b)
+    compute(gestor_id=gestor_id)
+    # 333_a es de Cartera A y no tiene gestor
+    assert calls == [(cartera_a, None)]
+
+
+def test_rollback_no_invalida(app, fake_redis, counted, portfolio):
+    """Los cambios revertidos no invalidan cache."""
+    compute, calls = counted
+    compute(cartera_id=portfolio["cartera_a"].id)
+
+    portfolio["cases"]["333_a"].total = Decimal("1.00")
+    db.session.flush()
+    db.session.rollback()
+    calls.clear()
+
+    compute(cartera_id=portfolio["cartera_a"].id)
+    assert calls == []
+
+
+def test_invalidate_cache_por_patron(app, fake_redis):
+    """invalidate_cache elimina las claves que coinciden usando SCAN."""
+    fake_redis.data.update({"cache:kpis:1": "x", "cache:kpis:2": "y", "cache:otro:1": "z"})
+    invalidate_cache("cache:kpis:*")
+    assert list(fake_redis.data) == ["cache:otro:1"]
+
+
+def _join_refreshes():
+    for thread in threading.enumerate():
+        if thread.name.startswith("cache-refresh-"):
+            thread.join(timeout=5)
+
+
+def test_stale_while_revalidate(app, fake_redis, monkeypatch):
+    """Una entrada vencida dentro de stale_ttl se sirve y se recalcula en segundo plano."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache_service.time, "time", lambda: now[0])
+    calls = []
+
+    @cache_result(timeout=60, key_prefix="swr", stale_ttl=120)
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert compute() == 1
+    now[0] += 61
+    assert compute() == 1  # valor viejo, sin esperar el recálculo
+    _join_refreshes()
+    assert len(calls) == 2
+    assert compute() == 2
+
+
+def test_espera_calculo_de_otro_proceso(app, fake_redis):
+    """Si otro proceso tiene el lock de la clave, se espera su valor en lugar de recalcular."""
+    calls = []
+
+    @cache_result(timeout=60, key_prefix="coalesce")
+    def compute():
+        calls.append(1)
+        return 0
+
+    key = get_cache_key("coalesce")
+    lock_key = f"{cache_service.LOCK_PREFIX}:{key}"
+    fake_redis.data[lock_key] = "1"
+    threading.Timer(0.05, lambda: fake_redis.data.__setitem__(key, json.dumps(7))).start()
+
+    assert compute() == 7
+    assert calls == []
+    assert lock_key in fake_redis.data  # el lock ajeno no se libera
+
+
+def test_hit_en_l1_no_consulta_redis(app, fake_redis, counted, monkeypatch):
+    """Con los contadores de generación recientes, un hit en L1 no hace round trips a Redis."""
+    compute, calls = counted
+    compute(cartera_id=1)
+
+    redis_calls = []
+    for name in ("get", "mget"):
+        original = getattr(fake_redis, name)
+        monkeypatch.setattr(fake_redis, name, lambda *a, _o=original, _n=name: redis_calls.append(_n) or _o(*a))
+
+    assert compute(cartera_id=1) == {"cartera_id": 1, "gestor_id": None}
+    assert redis_calls == [] and len(calls) == 1
+
+
+def test_invalidacion_de_otro_worker_tras_el_intervalo(app, fake_redis, counted, monkeypatch):
+    """Un INCR hecho por otro proceso se ve al vencer CACHE_GENERATION_CHECK_INTERVAL."""
+    now = [1000.0]
+    monkeypatch.setattr(cache_service.time, "monotonic", lambda: now[0])
+    compute, calls = counted
+    compute(cartera_id=1)
+
+    fake_redis.incr(f"{cache_service.GENERATION_PREFIX}:cartera:1")
+    compute(cartera_id=1)
+    assert len(calls) == 1
+
+    now[0] += app.extensions[cache_service.GENERATIONS_KEY].interval
+    compute(cartera_id=1)
+    assert len(calls) == 2
+
+
+def test_stale_while_revalidate_sin_redis(app, monkeypatch):
+    """Solo con L1, pasado CACHE_L1_TTL la entrada se sirve vencida y se refresca en segundo plano."""
+    assert cache_service.get_redis_client() is None
+    now = [1_000_000.0]
+    # Un solo reloj para la frescura (time) y la vida de la entrada en L1 (monotonic)
+    monkeypatch.setattr(cache_service.time, "time", lambda: now[0])
+    monkeypatch.setattr(cache_service.time, "monotonic", lambda: now[0])
+    calls = []
+
+    @cache_result(timeout=300, key_prefix="swr_l1", stale_ttl=120)
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert compute() == 1
+    now[0] += app.config["CACHE_L1_TTL"] + 1
+    assert compute() == 1  # sigue en L1: se sirve sin recalcular en el request
+    _join_refreshes()
+    assert len(calls) == 2
+    assert compute() == 2
@@ -0,0 +1,102 @@
+"""
+Tests para el cache en memoria del proceso (L1).
+"""
+
+import threading
+import time
+
+from app.services.cache import cache_result, cache_stats, invalidate_cache, invalidate_scopes
+from app.utils import local_cache as local_cache_module
+from app.utils.local_cache import LocalCache
+
+
+def test_lru_desaloja_la_entrada_menos_usada():
+    cache = LocalCache(max_entries=2)
+    cache.set("a", 1, size=1)
+    cache.set("b", 2, size=1)
+    cache.get("a")
+    cache.set("c", 3, size=1)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_limite_por_bytes():
+    cache = LocalCache(max_bytes=10)
+    cache.set("a", "x", size=6)
+    cache.set("b", "y", size=6)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 6
+    # Un valor más grande que el cache completo no se guarda
+    cache.set("c", "z", size=11)
+    assert cache.get("c") is None
+
+
+def test_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(local_cache_module.time, "monotonic", lambda: now[0])
+    cache = LocalCache(ttl=30)
+    cache.set("a", 1, size=1, ttl=300)  # acotado al TTL del cache
+    now[0] += 29
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_delete_matching():
+    cache = LocalCache()
+    cache.set("cache:kpis:1", 1, size=1)
+    cache.set("cache:otro:1", 2, size=1)
+    assert cache.delete_matching("cache:kpis:*") == 1
+    assert cache.get("cache:otro:1") == 2
+
+
+def test_cache_result_sin_redis(app):
+    """Sin REDIS_URL el L1 cachea y se invalida por scope dentro del proceso."""
+    calls = []
+
+    @cache_result(timeout=60, key_prefix="l1test", scope=("cartera_id",))
+    def compute(cartera_id=None):
+        calls.append(cartera_id)
+        return {"cartera_id": cartera_id}
+
+    compute(1)
+    compute(2)
+    assert compute(1) == {"cartera_id": 1}
+    assert calls == [1, 2]
+
+    invalidate_scopes(cartera_ids=[1])
+    compute(1)
+    compute(2)
+    assert calls == [1, 2, 1]
+    assert cache_stats()["l1"]["hits"] >= 2
+
+    invalidate_cache("cache:l1test:*")
+    compute(2)
+    assert calls == [1, 2, 1, 2]
+
+
+def test_estampida_un_solo_calculo(app):
+    """Con varios threads pidiendo la misma clave, la función se ejecuta una vez."""
+    calls = []
+
+    @cache_result(timeout=60, key_prefix="stampede")
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return 42
+
+    results = []
+
+    def worker():
+        with app.app_context():
+            results.append(slow())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [42] * 8
+    assert len(calls) == 1
@@ -0,0 +1,75 @@
+"""
+Tests para el cliente Redis compartido (pool por proceso + circuit breaker).
+"""
+
+import pytest
+
+from app.core import redis_client as redis_module
+from app.core.redis_client import CircuitBreaker, RedisPool, get_redis_client, record_redis_failure
+
+
+@pytest.fixture
+def redis_app(app):
+    """App con REDIS_URL configurada (no se abre ninguna conexión hasta usar el cliente)."""
+    app.config["REDIS_URL"] = "redis://localhost:6399/0"
+    app.config["REDIS_BREAKER_THRESHOLD"] = 2
+    app.config["REDIS_BREAKER_COOLDOWN"] = 30
+    redis_module.init_redis(app)
+    return app
+
+
+def test_sin_redis_url_no_hay_cliente(app):
+    """Sin REDIS_URL el cache queda deshabilitado."""
+    assert get_redis_client() is None
+
+
+def test_cliente_compartido_entre_llamadas(redis_app):
+    """El mismo proceso reutiliza cliente y pool de conexiones."""
+    client = get_redis_client()
+    assert client is not None
+    assert get_redis_client() is client
+    pool = client.connection_pool
+    assert pool.connection_kwargs["socket_timeout"] == 0.5
+    assert pool.connection_kwargs["health_check_interval"] == 30
+
+
+def test_pool_se_recrea_tras_fork(redis_app, monkeypatch):
+    """Si cambia el PID (worker forkeado) se crea un pool nuevo."""
+    client = get_redis_client()
+    monkeypatch.setattr(redis_module.os, "getpid", lambda: -1)
+    assert get_redis_client() is not client
+
+
+def test_breaker_saltea_redis_durante_cooldown(redis_app, monkeypatch):
+    """Tras varias fallas seguidas no se entrega cliente hasta que pase el cooldown."""
+    now = [1000.0]
+    monkeypatch.setattr(redis_module.time, "monotonic", lambda: now[0])
+
+    record_redis_failure()
+    assert get_redis_client() is not None
+    record_redis_failure()
+    assert get_redis_client() is None
+
+    now[0] += 31
+    assert get_redis_client() is not None  # half-open: llamada de prueba
+    assert get_redis_client() is None
+
+
+def test_breaker_se_cierra_con_exito():
+    """Un éxito resetea el conteo de fallas."""
+    breaker = CircuitBreaker(threshold=2, cooldown=0)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open
+
+
+def test_url_no_soportada(app):
+    """Esquemas distintos de redis:// / rediss:// / unix:// deshabilitan el cache."""
+    app.config["REDIS_URL"] = "memory://"
+    assert not RedisPool(app).enabled